@@ -0,0 +1,3 @@
+# Benchmark and stress scripts. Run them from lib/, e.g.
+#   python -m benchmarks.booking_stress
+# Each script builds its own throwaway database through DATABASE_URL.
@@ -0,0 +1,92 @@
+"""Concurrent event lookups per second: models.aio on one event loop vs the sync models in a thread pool.
+
+At each concurrency level the same number of Event.find_by_id calls run with
+that many in flight: as asyncio tasks awaiting AsyncEvent.find_by_id, and as
+ThreadPoolExecutor workers calling Event.find_by_id. The event cache is off
+so every lookup reaches the database.
+
+    python -m benchmarks.async_lookups --lookups 5000 --concurrency 1 16 64 256
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='async_lookups_'), 'bench.db')}"
+
+from sqlalchemy import insert  # noqa: E402
+
+from models import create_tables, get_session  # noqa: E402
+from models.cache import event_cache  # noqa: E402
+from models.event import Event  # noqa: E402
+from models.attendee import Attendee  # noqa: E402,F401
+from models.ticket import Ticket  # noqa: E402,F401
+from models.aio import AsyncEvent, async_engine  # noqa: E402
+
+
+def seed(events):
+    session = get_session()
+    try:
+        session.execute(insert(Event), [
+            {"name": f"Event {i}", "location": "Nairobi", "date": datetime.date(2030, 1, 1), "capacity": 100}
+            for i in range(1, events + 1)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def run_threads(event_ids, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for found in pool.map(Event.find_by_id, event_ids):
+            assert found is not None
+    return time.perf_counter() - started
+
+
+async def run_tasks(event_ids, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def lookup(event_id):
+        async with slots:
+            assert await AsyncEvent.find_by_id(event_id) is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup(event_id) for event_id in event_ids))
+    elapsed = time.perf_counter() - started
+    # The pool belongs to this event loop; the next asyncio.run needs a new one
+    await async_engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=5000, help="lookups per run")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 16, 64, 256])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    create_tables()
+    seed(args.events)
+    event_cache.enabled = False
+    rng = random.Random(args.seed)
+    event_ids = [rng.randint(1, args.events) for _ in range(args.lookups)]
+
+    print(f"{args.lookups} lookups over {args.events} events, event cache off\n")
+    print(f"{'in flight':>9} {'threads/s':>10} {'asyncio/s':>10}")
+    for concurrency in args.concurrency:
+        threaded = run_threads(event_ids, concurrency)
+        awaited = asyncio.run(run_tasks(event_ids, concurrency))
+        print(f"{concurrency:>9} {args.lookups / threaded:>10.0f} {args.lookups / awaited:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Group-commit booking queue against direct Ticket.create, at 1, 8 and 64 callers.
+
+For each caller count, threads book `--bookings` tickets between them, each
+thread waiting for one booking before it sends the next, first by calling
+Ticket.create directly and then through a BookingService. Every run books
+its own event, sized so that every booking fits. Reports bookings/s, median
+and p99 latency, and for the service how many requests went into each
+commit. A booking that fails with "database is locked" is counted, not
+retried.
+
+Then `--processes` producer processes book and cancel through
+BookingClients connected to one service.
+
+Every event must end with tickets == events.tickets_sold and no attendee
+ticketed twice.
+
+    python -m benchmarks.booking_queue --bookings 2000 --callers 1 8 64 --batch-size 64 --linger 0
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_callers(callers, attendee_ids, book):
+    """Book every attendee from `callers` threads; returns (seconds, latencies in ms, locked)"""
+    share = -(-len(attendee_ids) // callers)
+    latencies = [[] for _ in range(callers)]
+    locked = [0] * callers
+    gate = threading.Barrier(callers + 1)
+
+    def caller(number):
+        gate.wait()
+        for attendee_id in attendee_ids[number * share:(number + 1) * share]:
+            started = time.perf_counter()
+            try:
+                book(attendee_id)
+            except Exception as e:
+                if "locked" not in str(e):
+                    raise
+                locked[number] += 1
+                continue
+            latencies[number].append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=caller, args=(number,)) for number in range(callers)]
+    for thread in threads:
+        thread.start()
+    gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, sorted(t for chunk in latencies for t in chunk), sum(locked)
+
+
+def producer(connection, event_id, attendee_ids):
+    """Book through a BookingClient, then cancel every other ticket"""
+    from models.booking_service import BookingClient
+    client = BookingClient(connection)
+    tickets = [future.result() for future in [client.book(event_id, a) for a in attendee_ids]]
+    for future in [client.cancel(ticket.id) for ticket in tickets[::2]]:
+        future.result()
+    client.close()
+
+
+def check(connection, event_id):
+    from sqlalchemy import text
+    sold = connection.execute(text("SELECT count(*) FROM tickets WHERE event_id = :e"), {"e": event_id}).scalar()
+    distinct = connection.execute(
+        text("SELECT count(DISTINCT attendee_id) FROM tickets WHERE event_id = :e"), {"e": event_id}
+    ).scalar()
+    counter = connection.execute(text("SELECT tickets_sold FROM events WHERE id = :e"), {"e": event_id}).scalar()
+    assert distinct == sold, "an attendee was ticketed twice"
+    assert counter == sold, f"events.tickets_sold is {counter} but {sold} tickets exist"
+    return sold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=2000, help="bookings per run")
+    parser.add_argument("--callers", type=int, nargs="*", default=[1, 8, 64])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--linger", type=float, default=0.0, help="seconds")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--profile", default="default", help="engine profile (see models.ENGINE_PROFILES)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="booking_queue_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'queue.db')}"
+    os.environ["EVENT_TICKETING_DB_PROFILE"] = args.profile
+
+    from sqlalchemy import text
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket
+    from models.booking_service import BookingService
+
+    create_tables()
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO attendees (id, name, contact, contact_normalized) VALUES (:id, :name, :contact, :contact)"),
+            [{"id": attendee_id, "name": "Queue Attendee", "contact": f"queue{attendee_id}@example.com"}
+             for attendee_id in range(1, args.bookings + 1)],
+        )
+    attendee_ids = list(range(1, args.bookings + 1))
+
+    print(f"profile={args.profile} bookings per run={args.bookings:,} "
+          f"batch_size={args.batch_size} linger={args.linger * 1000:g} ms\n")
+    print(f"{'callers':>7} {'mode':<8} {'bookings/s':>10} {'median ms':>10} {'p99 ms':>8} {'locked':>7} {'per commit':>10}")
+    for callers in args.callers:
+        event = Event.create(f"Direct {callers}", "Nairobi", "2030-01-01", args.bookings)
+        elapsed, latencies, locked = run_callers(callers, attendee_ids, lambda a: Ticket.create(event.id, a))
+        print(f"{callers:>7} {'direct':<8} {len(latencies) / elapsed:>10.0f} {statistics.median(latencies):>10.2f} "
+              f"{latencies[int(len(latencies) * 0.99)]:>8.2f} {locked:>7} {1:>10.1f}")
+        with engine.connect() as conn:
+            assert check(conn, event.id) == len(latencies), "a direct booking went missing"
+
+        event = Event.create(f"Queued {callers}", "Nairobi", "2030-01-01", args.bookings)
+        with BookingService(args.batch_size, args.linger) as bookings:
+            elapsed, latencies, locked = run_callers(
+                callers, attendee_ids, lambda a: bookings.book(event.id, a).result()
+            )
+        print(f"{callers:>7} {'queued':<8} {len(latencies) / elapsed:>10.0f} {statistics.median(latencies):>10.2f} "
+              f"{latencies[int(len(latencies) * 0.99)]:>8.2f} {locked:>7} {bookings.applied / bookings.batches:>10.1f}")
+        with engine.connect() as conn:
+            assert check(conn, event.id) == len(latencies), "a queued booking went missing"
+
+    # Producers in other processes, through one service
+    event = Event.create("Cross-process", "Mombasa", "2030-01-01", args.bookings)
+    engine.dispose()
+    share = args.bookings // args.processes
+    with BookingService(args.batch_size, args.linger) as bookings:
+        workers = []
+        for number in range(args.processes):
+            ours, theirs = multiprocessing.Pipe()
+            bookings.listen(ours)
+            worker = multiprocessing.Process(
+                target=producer, args=(theirs, event.id, attendee_ids[number * share:(number + 1) * share])
+            )
+            worker.start()
+            theirs.close()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0, "a producer process failed"
+    with engine.connect() as conn:
+        sold = check(conn, event.id)
+    expected = args.processes * (share // 2)
+    print(f"\n{args.processes} producer processes: {sold:,} tickets left after booking "
+          f"{args.processes * share:,} and cancelling every other one, "
+          f"{bookings.applied / bookings.batches:.1f} requests per commit")
+    assert sold == expected, f"expected {expected} tickets, found {sold}"
+    print("OK: every booking accounted for, tickets match events.tickets_sold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Sales-curve reports from the hourly rollups against ad-hoc aggregates over tickets, at growing scale.
+
+For each `--scales` preset, builds a database with benchmarks.datagen,
+backfills booking_stats_hourly with HourlyBookingStats.rebuild() and takes
+the event with the most tickets. Then times its 30-day hourly sales curve,
+its daily totals and its event report from the rollups, and the same
+hourly curve as a GROUP BY over its tickets. Both curves must agree.
+
+The rollup reports should cost about the same at every scale; the ad-hoc
+aggregate grows with the event's ticket count.
+
+    python -m benchmarks.booking_stats --scales 100k 1m
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen  # noqa: E402
+
+# Whole hours, as the rollup keeps them: the curve up to `until` includes the hour starting at `until`
+ADHOC_CURVE = (
+    "SELECT strftime('%Y-%m-%d %H:00:00', booked_at) AS hour, count(*) FROM tickets "
+    "WHERE event_id = ? AND booked_at >= ? AND booked_at < ? GROUP BY hour ORDER BY hour"
+)
+
+
+def median_ms(call, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run_scale(scale, repeats, path, results):
+    """Build one database and time the reports against it; puts the timings on `results`"""
+    # Spawned fresh, so models picks up this scale's DATABASE_URL on import
+    datagen.create_database(path, tickets=datagen.SCALES[scale])
+    from models import engine
+    from models.event import Event  # noqa: F401
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    from models.booking_stats import HourlyBookingStats
+
+    started = time.perf_counter()
+    hourly_rows = HourlyBookingStats.rebuild()
+    rebuild = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        event_id, sold = conn.exec_driver_sql(
+            "SELECT id, tickets_sold FROM events ORDER BY tickets_sold DESC LIMIT 1"
+        ).one()
+        last = conn.exec_driver_sql("SELECT max(booked_at) FROM tickets WHERE event_id = ?", (event_id,)).scalar()
+    until = HourlyBookingStats._hour(datetime.fromisoformat(last)) + timedelta(hours=1)
+    first, past = until - timedelta(days=30) + timedelta(hours=1), until + timedelta(hours=1)
+
+    def adhoc():
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(
+                ADHOC_CURVE, (event_id, first.strftime("%Y-%m-%d %H:%M:%S"), past.strftime("%Y-%m-%d %H:%M:%S"))
+            ).all()
+
+    rolled = HourlyBookingStats.sales_curve(event_id, 30, until)
+    expected = adhoc()
+    assert [(hour.strftime("%Y-%m-%d %H:00:00"), bookings) for hour, bookings, _ in rolled] == \
+        [tuple(row) for row in expected], "rollup curve differs from the tickets table"
+    assert sum(bookings for _, bookings, _ in rolled) > 0, "the 30-day window has no bookings"
+
+    results.put({
+        "tickets": datagen.SCALES[scale], "event tickets": sold, "hourly rows": hourly_rows,
+        "rebuild s": rebuild,
+        "curve (rollup) ms": median_ms(lambda: HourlyBookingStats.sales_curve(event_id, 30, until), repeats),
+        "daily (rollup) ms": median_ms(lambda: HourlyBookingStats.daily(event_id, 30, until), repeats),
+        "report (rollup) ms": median_ms(lambda: HourlyBookingStats.event_report(event_id, until), repeats),
+        "curve (tickets) ms": median_ms(adhoc, repeats),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="*", choices=datagen.SCALES, default=["100k", "1m"])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="booking_stats_")
+    os.environ["EVENT_TICKETING_CACHE"] = "off"
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for scale in args.scales:
+        path = os.path.join(workdir, f"{scale}.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_scale, args=(scale, args.repeats, path, queue))
+        process.start()
+        process.join()
+        assert process.exitcode == 0, f"the {scale} run failed"
+        results[scale] = queue.get()
+
+    print(f"{'':<20}" + "".join(f"{scale:>12}" for scale in args.scales))
+    for key in next(iter(results.values())):
+        cells = []
+        for scale in args.scales:
+            value = results[scale][key]
+            cells.append(f"{value:>12,.2f}" if isinstance(value, float) else f"{value:>12,}")
+        print(f"{key:<20}" + "".join(cells))
+    print("\nOK: rollup curves match the tickets table at every scale")
+
+
+if __name__ == "__main__":
+    main()
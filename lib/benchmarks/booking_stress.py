@@ -0,0 +1,121 @@
+"""Multi-process booking stress test for Ticket.create.
+
+Several processes book one event at the same moment, each with its own
+attendees plus a shared attendee that every process tries to book. At the
+end the tickets table must hold exactly `capacity` rows, matching the
+events.tickets_sold counter, with no duplicate (event, attendee) pairs and
+the shared attendee booked exactly once.
+
+    python -m benchmarks.booking_stress --processes 8 --attempts 200 --capacity 500
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def book_worker(worker_id, event_id, attendee_ids, shared_attendee_id, barrier, results):
+    from models import engine
+    from models.ticket import Ticket
+
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    booked = full = duplicate = locked = 0
+    barrier.wait()
+    started = time.perf_counter()
+    for attendee_id in [shared_attendee_id] + attendee_ids:
+        try:
+            Ticket.create(event_id, attendee_id)
+            booked += 1
+        except ValueError as e:
+            if "full capacity" in str(e):
+                full += 1
+            else:
+                duplicate += 1
+        except Exception as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    results.put((worker_id, booked, full, duplicate, locked, time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=200, help="bookings attempted per process")
+    parser.add_argument("--capacity", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="booking_stress_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+
+    from sqlalchemy import text
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee
+    from models.ticket import Ticket  # noqa: F401 (registers the tickets table)
+
+    create_tables()
+    event = Event.create("Stress Test Launch", "Nairobi", "2030-01-01", args.capacity)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO attendees (name, contact, contact_normalized) VALUES (:name, :contact, :contact)"),
+            [{"name": "Stress Attendee", "contact": f"stress{i}@example.com"}
+             for i in range(args.processes * args.attempts + 1)],
+        )
+    shared_attendee_id = 1
+    engine.dispose()
+
+    barrier = multiprocessing.Barrier(args.processes)
+    results = multiprocessing.Queue()
+    workers = []
+    for worker_id in range(args.processes):
+        first = 2 + worker_id * args.attempts
+        attendee_ids = list(range(first, first + args.attempts))
+        worker = multiprocessing.Process(
+            target=book_worker,
+            args=(worker_id, event.id, attendee_ids, shared_attendee_id, barrier, results),
+        )
+        worker.start()
+        workers.append(worker)
+
+    started = time.perf_counter()
+    rows = [results.get() for _ in workers]
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+
+    with engine.connect() as conn:
+        sold = conn.execute(text("SELECT count(*) FROM tickets WHERE event_id = :e"), {"e": event.id}).scalar()
+        pairs = conn.execute(text(
+            "SELECT count(*) FROM (SELECT DISTINCT event_id, attendee_id FROM tickets)"
+        )).scalar()
+        counter = conn.execute(text("SELECT tickets_sold FROM events WHERE id = :e"), {"e": event.id}).scalar()
+        shared = conn.execute(text(
+            "SELECT count(*) FROM tickets WHERE attendee_id = :a"), {"a": shared_attendee_id}
+        ).scalar()
+
+    booked = sum(r[1] for r in rows)
+    print(f"processes={args.processes} attempts/process={args.attempts + 1} capacity={args.capacity}")
+    print(f"booked={booked} full={sum(r[2] for r in rows)} duplicate={sum(r[3] for r in rows)} "
+          f"locked={sum(r[4] for r in rows)}")
+    print(f"tickets in table={sold} events.tickets_sold={counter} distinct pairs={pairs} shared attendee tickets={shared}")
+    print(f"throughput={booked / elapsed:.0f} bookings/s over {elapsed:.2f}s")
+
+    expected = min(args.capacity, args.processes * args.attempts + 1)
+    assert sold == booked, "a booking reported success but no ticket was stored"
+    assert sold <= args.capacity, f"oversold: {sold} tickets for {args.capacity} seats"
+    assert counter == sold, f"events.tickets_sold is {counter} but {sold} tickets exist"
+    assert pairs == sold, "an attendee holds more than one ticket for the event"
+    assert shared == 1, "the shared attendee was booked more than once"
+    if sum(r[4] for r in rows) == 0:
+        assert sold == expected, f"expected {expected} tickets, found {sold}"
+    print("OK: no oversell, no duplicate tickets")
+
+
+if __name__ == "__main__":
+    main()
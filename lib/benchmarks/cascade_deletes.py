@@ -0,0 +1,146 @@
+"""Event deletes by ON DELETE CASCADE against the ORM cascade that loads every ticket, and a bulk purge.
+
+Builds a database with benchmarks.datagen (`--scale`) and copies it. On the
+copies, deletes the same `--events` events, those closest to `--tickets`
+tickets each, two ways, each in a fresh process:
+
+- orm: load the event and its tickets into a session and session.delete()
+  it, as Event.delete did before the cascade foreign keys
+- cascade: Event.delete(), one DELETE by id
+
+Then purges every event dated before today from the cascade copy with
+Event.purge_before(). Reports ms and SQL statements per event, and the purge
+time. The ORM's per-ticket DELETEs go out as one executemany, so the rows
+each way loads show the difference better than its statement count.
+Afterwards no row may point at a deleted event or attendee, and every
+remaining event's tickets_sold must match its tickets.
+
+    python -m benchmarks.cascade_deletes --scale 1m --events 5 --tickets 10000
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen  # noqa: E402
+
+
+def build(path, tickets, results):
+    datagen.create_database(path, tickets=tickets)
+    results.put(None)
+
+
+def delete_events(way, event_ids, purge, results):
+    from sqlalchemy.orm import selectinload
+    from models import write_session
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    from models.instrumentation import sql_trace
+
+    sql_trace.enable()
+    timings, statements, rows = [], [], []
+    for event_id in event_ids:
+        started = time.perf_counter()
+        with sql_trace.action(way) as trace:
+            if way == "orm":
+                with write_session() as session:
+                    event = session.get(Event, event_id, options=[selectinload(Event.tickets)])
+                    session.delete(event)
+            else:
+                Event.find_by_id(event_id).delete()
+        timings.append((time.perf_counter() - started) * 1000)
+        statements.append(trace.statements)
+        rows.append(trace.rows)
+    result = {"ms": statistics.median(timings), "statements": statistics.median(statements),
+              "rows": statistics.median(rows)}
+    if purge:
+        started = time.perf_counter()
+        result["purged"] = Event.purge_before(date.today())
+        result["purge s"] = time.perf_counter() - started
+    results.put(result)
+
+
+def check(path):
+    """Past events left in the database at path, after checking its foreign keys and counters"""
+    connection = sqlite3.connect(path)
+    try:
+        assert not connection.execute("PRAGMA foreign_key_check").fetchall(), "rows point at deleted parents"
+        drift = connection.execute(
+            "SELECT count(*) FROM events WHERE tickets_sold != "
+            "(SELECT count(*) FROM tickets WHERE tickets.event_id = events.id)"
+        ).fetchone()[0]
+        assert drift == 0, f"{drift} events have tickets_sold out of step with their tickets"
+        return connection.execute(
+            "SELECT count(*) FROM events WHERE date < ?", (date.today().isoformat(),)
+        ).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def run(ctx, target, *args):
+    """Call target(*args, queue) in a fresh process and return what it put on the queue"""
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, results))
+    process.start()
+    process.join()
+    assert process.exitcode == 0, f"{target.__name__} failed"
+    return results.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=datagen.SCALES, default="1m")
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--tickets", type=int, default=10_000, help="target tickets per deleted event")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cascade_deletes_")
+    os.environ["EVENT_TICKETING_CACHE"] = "off"
+    ctx = multiprocessing.get_context("spawn")
+    paths = {way: os.path.join(workdir, f"{way}.db") for way in ("orm", "cascade")}
+    os.environ["DATABASE_URL"] = f"sqlite:///{paths['orm']}"
+    run(ctx, build, paths["orm"], datagen.SCALES[args.scale])
+    shutil.copy(paths["orm"], paths["cascade"])
+
+    connection = sqlite3.connect(paths["orm"])
+    chosen = connection.execute(
+        "SELECT id, tickets_sold FROM events ORDER BY abs(tickets_sold - ?) LIMIT ?", (args.tickets, args.events)
+    ).fetchall()
+    connection.close()
+    event_ids = [event_id for event_id, _ in chosen]
+    print(f"{args.scale} tickets; deleting {len(chosen)} events of "
+          f"{min(sold for _, sold in chosen):,}-{max(sold for _, sold in chosen):,} tickets\n")
+
+    results = {}
+    for way, path in paths.items():
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        results[way] = run(ctx, delete_events, way, event_ids, way == "cascade")
+    # The ORM sends its per-ticket DELETEs as one executemany, which counts as one statement
+    print(f"{'way':<8} {'ms per event':>12} {'statements':>10} {'rows loaded':>11}")
+    for way, result in results.items():
+        print(f"{way:<8} {result['ms']:>12.1f} {result['statements']:>10.0f} {result['rows']:>11,.0f}")
+
+    for way, path in paths.items():
+        connection = sqlite3.connect(path)
+        left = connection.execute(
+            f"SELECT count(*) FROM tickets WHERE event_id IN ({','.join('?' * len(event_ids))})", event_ids
+        ).fetchone()[0]
+        connection.close()
+        assert left == 0, f"{way}: {left} tickets of deleted events remain"
+    past = check(paths["cascade"])
+    assert past == 0, f"{past} past events survived the purge"
+    print(f"\npurge_before(today): {results['cascade']['purged']:,} events in {results['cascade']['purge s']:.2f}s")
+    print("OK: no rows left pointing at deleted events, tickets_sold matches the tickets everywhere")
+
+
+if __name__ == "__main__":
+    main()
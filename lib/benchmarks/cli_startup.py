@@ -0,0 +1,96 @@
+"""Wall-clock time of one-shot cli.py subcommands, from process start to exit.
+
+Each command runs in a fresh interpreter, as an ops script would call it,
+after one untimed warm-up run. Read-only commands are expected to finish
+within READ_ONLY_BUDGET_MS; the bare interpreter and the menu's imports are
+timed alongside for reference. Afterwards, a command for a missing event
+must exit non-zero and write nothing.
+
+    python -m benchmarks.cli_startup --runs 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+LIB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(LIB_DIR)
+
+READ_ONLY_BUDGET_MS = 150
+
+COMMANDS = [
+    ("python (no imports)", ["-c", "pass"], None),
+    ("events list", ["cli.py", "events", "list"], "read"),
+    ("events show 1", ["cli.py", "events", "show", "1"], "read"),
+    ("attendee show 1", ["cli.py", "attendee", "show", "1"], "read"),
+    ("ticket book", ["cli.py", "ticket", "book", "1", "--name", "Bench Guest", "--contact", "{contact}"], "write"),
+    ("menu imports", ["-c", "import helpers"], None),
+]
+
+
+def seed(environment):
+    subprocess.run(
+        [sys.executable, "cli.py", "events", "create", "--name", "Startup Benchmark",
+         "--location", "Nairobi", "--date", "2030-01-01", "--capacity", "10000"],
+        cwd=LIB_DIR, env=environment, check=True, stdout=subprocess.DEVNULL,
+    )
+    subprocess.run(
+        [sys.executable, "cli.py", "ticket", "book", "1", "--name", "Bench Guest", "--contact", "seed@example.com"],
+        cwd=LIB_DIR, env=environment, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def time_command(arguments, environment, runs):
+    timings = []
+    for run in range(runs + 1):
+        command = [sys.executable] + [part.format(contact=f"guest{run}-{time.time_ns()}@example.com")
+                                      for part in arguments]
+        started = time.perf_counter()
+        subprocess.run(command, cwd=LIB_DIR, env=environment, check=True, stdout=subprocess.DEVNULL)
+        elapsed = (time.perf_counter() - started) * 1000
+        if run:
+            timings.append(elapsed)
+    return timings
+
+
+def check_refused(environment, workdir):
+    """Exporting an event that does not exist must fail without creating the file"""
+    path = os.path.join(workdir, "missing.csv")
+    result = subprocess.run([sys.executable, "cli.py", "export", "999", path],
+                            cwd=LIB_DIR, env=environment, capture_output=True, text=True)
+    assert result.returncode == 1, f"export of a missing event exited {result.returncode}"
+    assert "Event not found" in result.stdout, result.stdout
+    assert not os.path.exists(path), "export of a missing event wrote a file"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15, help="timed runs per command")
+    args = parser.parse_args()
+
+    environment = dict(os.environ)
+    workdir = tempfile.mkdtemp(prefix='cli_startup_')
+    environment["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    seed(environment)
+
+    print(f"{'Command':<22} {'median ms':>10} {'min ms':>8}")
+    over_budget = []
+    for label, arguments, kind in COMMANDS:
+        timings = time_command(arguments, environment, args.runs)
+        median = statistics.median(timings)
+        print(f"{label:<22} {median:>10.0f} {min(timings):>8.0f}")
+        if kind == "read" and median > READ_ONLY_BUDGET_MS:
+            over_budget.append(label)
+
+    check_refused(environment, workdir)
+    if over_budget:
+        print(f"\nOver the {READ_ONLY_BUDGET_MS} ms read-only budget: {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"\nEvery read-only command is within {READ_ONLY_BUDGET_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
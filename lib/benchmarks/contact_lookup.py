@@ -0,0 +1,65 @@
+"""Attendee.find_by_contact at millions of attendees, with contacts spelled the way people type them.
+
+Each lookup takes a generated contact and changes its case or adds
+surrounding spaces, then checks the stored attendee comes back. The query
+plan is printed to show the single probe of uq_attendees_contact_normalized.
+
+    python -m benchmarks.contact_lookup --attendees 5000000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=5_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    datagen.create_database(os.path.join(tempfile.mkdtemp(prefix="contact_lookup_"), "bench.db"),
+                            tickets=10_000, attendees=args.attendees, seed=args.seed)
+    print(f"{args.attendees:,} attendees generated in {time.perf_counter() - started:.1f}s")
+
+    from models import engine, read_session
+    from models.event import Event  # noqa: F401
+    from models.attendee import Attendee
+    from models.ticket import Ticket  # noqa: F401
+
+    rng = random.Random(args.seed)
+    with read_session() as session:
+        targets = [session.get(Attendee, rng.randint(1, args.attendees)) for _ in range(args.lookups)]
+    spellings = [
+        rng.choice([str.upper, str.title, lambda contact: f"  {contact} "])(attendee.contact)
+        for attendee in targets
+    ]
+
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM attendees WHERE contact_normalized = ?", ("x",)
+        ).all()
+    print(f"plan: {plan[0][-1]}")
+
+    timings = []
+    for attendee, spelling in zip(targets, spellings):
+        started = time.perf_counter()
+        found = Attendee.find_by_contact(spelling)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert found.id == attendee.id, (spelling, found)
+    timings.sort()
+    print(f"{args.lookups} lookups: median {statistics.median(timings):.3f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms, every one found its attendee")
+
+
+if __name__ == "__main__":
+    main()
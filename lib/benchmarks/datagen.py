@@ -0,0 +1,152 @@
+"""Deterministic synthetic data for benchmarks: events, attendees and tickets at any scale.
+
+Ticket counts across events follow a Zipf curve (--skew), so a few events are
+huge and most are small, like real sales. The same --seed always produces
+the same database. Rows go in through executemany on one stdlib sqlite3
+connection with syncing off, and the secondary indexes and the search index
+are rebuilt once at the end instead of being updated row by row.
+
+    python -m benchmarks.datagen /tmp/bench.db --scale 1m
+    python -m benchmarks.datagen /tmp/bench.db --tickets 250000 --events 500 --skew 1.3
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+TICKETS_PER_ATTENDEE = 5
+FIRST_NAMES = ["Amina", "Brian", "Cynthia", "David", "Esther", "Felix", "Grace", "Hassan", "Irene", "James",
+               "Kevin", "Lucy", "Mercy", "Njeri", "Otieno", "Peter", "Queen", "Rose", "Samuel", "Tabitha"]
+LAST_NAMES = ["Achieng", "Barasa", "Chebet", "Kamau", "Kariuki", "Kiprop", "Mutua", "Mwangi", "Njoroge",
+              "Ochieng", "Odhiambo", "Omondi", "Otieno", "Wafula", "Wanjiku"]
+LOCATIONS = ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Thika", "Nyeri", "Machakos"]
+EVENT_KINDS = ["Concert", "Conference", "Match", "Festival", "Workshop", "Expo", "Summit", "Gala"]
+# Made-up words for event names, so a name word is as selective as in a real catalog
+SYLLABLES = ["ba", "ki", "lo", "mu", "ne", "sa", "to", "wa", "zi", "ra", "ko", "ma", "ni", "pe", "ju",
+             "go", "ha", "li", "mo", "nu", "ta", "vi", "ye", "du"]
+FIRST_DATE = date(2026, 1, 1)
+# Coprime strides walk every attendee exactly once per event
+STRIDES = (1_000_003, 1_000_033)
+
+
+def name_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def ticket_counts(tickets, events, skew, rng):
+    """Tickets per event: Zipf weights over a shuffled event order, summing to `tickets`"""
+    weights = [1 / rank ** skew for rank in range(1, events + 1)]
+    total = sum(weights)
+    counts = [int(tickets * weight / total) for weight in weights]
+    for rank in range(tickets - sum(counts)):
+        counts[rank % events] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+def generate(path, tickets, events=None, attendees=None, skew=1.1, seed=42):
+    """Fill the (already created) schema at path; returns a dict of row counts and timings"""
+    rng = random.Random(seed)
+    events = events or max(1, min(10_000, tickets // 500))
+    counts = ticket_counts(tickets, events, skew, rng)
+    attendees = max(attendees or tickets // TICKETS_PER_ATTENDEE, max(counts), 1)
+    stride = next(s for s in STRIDES if attendees % s)
+
+    started = time.perf_counter()
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute("PRAGMA journal_mode=MEMORY")
+        connection.execute("PRAGMA cache_size=-262144")
+        # Indexes and triggers (the search index's) are rebuilt once after the load
+        deferred = connection.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND sql IS NOT NULL "
+            "AND tbl_name IN ('events', 'attendees', 'tickets')"
+        ).fetchall()
+        for kind, name, _ in deferred:
+            connection.execute(f"DROP {kind.upper()} {name}")
+
+        connection.executemany(
+            "INSERT INTO events (id, name, location, date, capacity, tickets_sold) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (event_id, f"{name_word(rng).title()} {name_word(rng).title()} {rng.choice(EVENT_KINDS)}",
+                 rng.choice(LOCATIONS),
+                 (FIRST_DATE + timedelta(days=rng.randrange(730))).isoformat(),
+                 count + rng.randint(0, max(10, count // 4)), count)
+                for event_id, count in enumerate(counts, start=1)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO attendees (id, name, contact, contact_normalized) VALUES (?, ?, ?, ?)",
+            (
+                # Generated contacts are already in normalized form
+                (attendee_id, f"{first} {last}", contact, contact)
+                for attendee_id in range(1, attendees + 1)
+                for first, last in [(FIRST_NAMES[attendee_id % len(FIRST_NAMES)],
+                                     LAST_NAMES[(attendee_id // len(FIRST_NAMES)) % len(LAST_NAMES)])]
+                for contact in [f"{first}.{last}{attendee_id}@example.com".lower()]
+            ),
+        )
+        starts = [rng.randrange(attendees) for _ in counts]
+        booked_from = datetime(2025, 6, 1)
+        connection.executemany(
+            "INSERT INTO tickets (event_id, attendee_id, booked_at) VALUES (?, ?, ?)",
+            (
+                (event_id, (start + k * stride) % attendees + 1,
+                 (booked_from + timedelta(seconds=k * 37 % 15_552_000)).strftime("%Y-%m-%d %H:%M:%S.000000"))
+                for event_id, (count, start) in enumerate(zip(counts, starts), start=1)
+                for k in range(count)
+            ),
+        )
+        loaded = time.perf_counter() - started
+
+        for _, _, sql in deferred:
+            connection.execute(sql)
+        if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'").fetchone():
+            connection.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    return {
+        "events": events, "attendees": attendees, "tickets": tickets, "skew": skew, "seed": seed,
+        "largest_event": max(counts), "load_seconds": round(loaded, 2),
+        "total_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def create_database(path, **options):
+    """Create the schema at path through the models, then generate into it"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from models import create_tables
+    create_tables()
+    return generate(path, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="new SQLite file to create")
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="ticket count preset")
+    parser.add_argument("--tickets", type=int, help="overrides --scale")
+    parser.add_argument("--events", type=int, help="default: one per 500 tickets, at most 10,000")
+    parser.add_argument("--attendees", type=int, help="default: one per 5 tickets")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for event popularity")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+    stats = create_database(os.path.abspath(args.path), tickets=args.tickets or SCALES[args.scale],
+                            events=args.events, attendees=args.attendees, skew=args.skew, seed=args.seed)
+    print(f"{stats['tickets']:,} tickets, {stats['attendees']:,} attendees, {stats['events']:,} events "
+          f"(largest {stats['largest_event']:,}) in {stats['total_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Read and write throughput of each engine profile under concurrency.
+
+For every profile in models.ENGINE_PROFILES, reader processes loop over
+Event.find_by_id and a Ticket.page while writer processes book tickets,
+all against the same fresh database for a fixed time.
+
+    python -m benchmarks.engine_profiles --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ATTENDEES_PER_WRITER = 200_000
+
+
+def worker(role, worker_id, seconds, start, results):
+    # Spawned fresh, so models picks up this profile's environment on import
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401 (registers the attendees table)
+    from models.ticket import Ticket
+
+    ops = errors = 0
+    next_attendee = worker_id * ATTENDEES_PER_WRITER + 1
+    start.wait()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if role == "reader":
+                Event.find_by_id(1)
+                Ticket.page(event_id=1, after_id=max(0, ops * 7 % 5000))
+            else:
+                Ticket.create(1, next_attendee)
+                next_attendee += 1
+            ops += 1
+        except Exception as e:
+            if "locked" not in str(e):
+                raise
+            errors += 1
+    results.put((role, ops, errors))
+
+
+def run_profile(profile, readers, writers, seconds, workdir):
+    url = f"sqlite:///{os.path.join(workdir, f'{profile}.db')}"
+    os.environ["DATABASE_URL"] = url
+    os.environ["EVENT_TICKETING_DB_PROFILE"] = profile
+
+    ctx = multiprocessing.get_context("spawn")
+    setup = ctx.Process(target=seed, args=(writers,))
+    setup.start()
+    setup.join()
+
+    start = ctx.Barrier(readers + writers)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=worker, args=("reader", i, seconds, start, results)) for i in range(readers)]
+    workers += [ctx.Process(target=worker, args=("writer", i, seconds, start, results)) for i in range(writers)]
+    for process in workers:
+        process.start()
+    rows = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+
+    totals = {"reader": [0, 0], "writer": [0, 0]}
+    for role, ops, errors in rows:
+        totals[role][0] += ops
+        totals[role][1] += errors
+    return totals
+
+
+def seed(writers):
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+
+    create_tables()
+    Event.create("Profile Benchmark", "Nairobi", "2030-01-01", 10_000_000)
+    raw = engine.raw_connection()
+    try:
+        # Raw connections are in autocommit mode; one transaction, not one per row
+        cursor = raw.cursor()
+        cursor.execute("BEGIN")
+        cursor.executemany(
+            "INSERT INTO attendees (id, name, contact, contact_normalized) VALUES (?, 'Bench Attendee', ?, ?)",
+            ((i, f"bench{i}@example.com", f"bench{i}@example.com")
+             for i in range(1, writers * ATTENDEES_PER_WRITER + 1)),
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--profiles", nargs="*", help="profiles to compare (default: all)")
+    args = parser.parse_args()
+
+    from models import ENGINE_PROFILES
+    profiles = args.profiles or list(ENGINE_PROFILES)
+    workdir = tempfile.mkdtemp(prefix="engine_profiles_")
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile\n")
+    print(f"{'Profile':<12} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+    for profile in profiles:
+        totals = run_profile(profile, args.readers, args.writers, args.seconds, workdir)
+        print(f"{profile:<12} {totals['reader'][0] / args.seconds:>10.0f} "
+              f"{totals['writer'][0] / args.seconds:>10.0f} "
+              f"{totals['reader'][1] + totals['writer'][1]:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""SQL statements and time saved by the event cache on a menu-like workload.
+
+Each step looks an event up by id, as the booking, find and attendee menus
+do, with a few hot events getting most of the traffic. Every tenth step
+books a ticket, which writes the new count through to the cache. The same
+seeded workload runs with the cache off and then on.
+
+    python -m benchmarks.event_cache --steps 20000 --events 500
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='event_cache_'), 'bench.db')}"
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from models import create_tables, engine, get_session  # noqa: E402
+from models.cache import event_cache  # noqa: E402
+from models.event import Event  # noqa: E402
+from models.attendee import Attendee  # noqa: E402
+from models.ticket import Ticket  # noqa: E402
+
+BOOK_EVERY = 10
+
+
+def seed(events, attendees):
+    session = get_session()
+    try:
+        session.execute(insert(Event), [
+            {"name": f"Event {i}", "location": "Nairobi", "date": datetime.date(2030, 1, 1), "capacity": attendees}
+            for i in range(1, events + 1)
+        ])
+        session.execute(insert(Attendee), [
+            {"name": "Bench Attendee", "contact": f"bench{i}@example.com", "contact_normalized": f"bench{i}@example.com"}
+            for i in range(1, attendees + 1)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def run(steps, events, seed_value, attendee_offset):
+    rng = random.Random(seed_value)
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    event_cache.reset_stats()
+    started = time.perf_counter()
+    try:
+        for step in range(steps):
+            # Skewed towards low ids: a handful of events get most lookups
+            event_id = min(int(rng.paretovariate(1.2)), events)
+            found = Event.find_by_id(event_id)
+            found.available_spots()
+            if step % BOOK_EVERY == 0:
+                Ticket.create(event_id, attendee_offset + step // BOOK_EVERY + 1)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return statements[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    bookings = args.steps // BOOK_EVERY + 1
+    create_tables()
+    seed(args.events, 2 * bookings)
+
+    print(f"{args.steps} lookups over {args.events} events, one booking every {BOOK_EVERY}\n")
+    print(f"{'Cache':<6} {'statements':>11} {'per lookup':>11} {'seconds':>9} {'row hits':>9} {'count hits':>11}")
+    for enabled, offset in ((False, 0), (True, bookings)):
+        event_cache.enabled = enabled
+        statements, elapsed = run(args.steps, args.events, args.seed, offset)
+        stats = event_cache.stats()
+        rows = stats["rows"]
+        counts = stats["availability"]
+        row_hits = f"{rows['hits'] / (rows['hits'] + rows['misses']):.0%}" if enabled else "-"
+        count_hits = f"{counts['hits'] / max(1, counts['hits'] + counts['misses']):.0%}" if enabled else "-"
+        print(f"{'on' if enabled else 'off':<6} {statements:>11} {statements / args.steps:>11.2f} "
+              f"{elapsed:>9.2f} {row_hits:>9} {count_hits:>11}")
+
+
+if __name__ == "__main__":
+    main()
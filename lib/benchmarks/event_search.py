@@ -0,0 +1,78 @@
+"""Event.search against a LIKE '%text%' scan, on a datagen catalog of many events.
+
+Search words are taken from the names of random events, so every query has
+matches: a whole word, a three-letter prefix, two words, and a city (which
+matches about one event in eight and so ranks the most rows). The LIKE
+query sorts its matches by name, so like a ranked search it must see them
+all rather than stop at the first 20.
+
+    python -m benchmarks.event_search --events 1000000 --queries 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen  # noqa: E402
+
+
+def time_queries(search, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50, help="queries per kind")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    datagen.create_database(os.path.join(tempfile.mkdtemp(prefix="event_search_"), "bench.db"),
+                            tickets=0, events=args.events, seed=args.seed)
+    print(f"{args.events:,} events generated and indexed in {time.perf_counter() - started:.1f}s\n")
+
+    from models import read_session
+    from models.cache import event_cache
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    event_cache.enabled = False
+
+    def like(text):
+        # Sorted by name rather than id: like a ranking, it has to see every match
+        with read_session() as session:
+            return session.query(Event).filter(Event.name.like(f"%{text}%")).order_by(Event.name).limit(20).all()
+
+    rng = random.Random(args.seed)
+    with read_session() as session:
+        names = [session.get(Event, rng.randint(1, args.events)).name.split() for _ in range(args.queries)]
+        warm_up = [session.get(Event, rng.randint(1, args.events)).name.split()[0] for _ in range(20)]
+    # Different words, so the timed queries still read their own index pages
+    time_queries(Event.search, warm_up + [word[:3] for word in warm_up])
+    kinds = [
+        ("one word", [words[0] for words in names]),
+        ("3-letter prefix", [words[0][:3] for words in names]),
+        ("two words", [f"{words[1]} {words[0]}" for words in names]),
+        ("city", [rng.choice(datagen.LOCATIONS) for _ in names]),
+    ]
+
+    print(f"{'Query':<16} {'search ms':>10} {'max':>8} {'LIKE ms':>10} {'max':>8}")
+    for label, queries in kinds:
+        searched = time_queries(Event.search, queries)
+        scanned = time_queries(like, queries[:5])
+        print(f"{label:<16} {searched[0]:>10.2f} {searched[1]:>8.2f} {scanned[0]:>10.1f} {scanned[1]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
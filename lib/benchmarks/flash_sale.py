@@ -0,0 +1,221 @@
+"""Flash-sale load generator: many threads racing for a small event, plus a crash mid-sale.
+
+`--threads` threads send `--requests` grant requests between them for an
+event with `--capacity` seats, drawing attendees at random from a pool of
+`--attendees`, so many requests are repeats. Grants per second are measured
+from the first request to the last, and again up to the point where close()
+has written every ticket. For comparison, `--baseline` bookings go through
+Ticket.create one at a time.
+
+Then a child process opens a sale on a second event, grants seats, and dies
+with os._exit while some grants are still only in memory. FlashSale.recover
+must bring the event's counters back in line with its tickets, and a second
+sale must then sell it out exactly.
+
+Last, a sale on a third event has its background writer fail partway.
+close() must re-raise the failure after giving the unwritten seats back,
+recover() must not take this process for a sale still running, and a new
+sale must open.
+
+Both events must end with no oversell: tickets == capacity, no attendee
+ticketed twice, events.tickets_sold equal to the tickets table and
+events.seats_held back at 0.
+
+    python -m benchmarks.flash_sale --requests 50000 --capacity 10000 --threads 16
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def crash_mid_sale(event_id, first, last, flush_interval):
+    """Grant half the attendees, let them be written, grant the rest and die"""
+    from models import engine
+    from models.event import Event  # noqa: F401
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    from models.flash_sale import FlashSale
+
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    sale = FlashSale.open(event_id, flush_interval=flush_interval)
+    middle = (first + last) // 2
+    for attendee_id in range(first, middle):
+        sale.grant(attendee_id)
+    time.sleep(flush_interval * 10)
+    for attendee_id in range(middle, last):
+        sale.grant(attendee_id)
+    os._exit(1)
+
+
+def check(connection, event_id, capacity):
+    """(tickets, tickets_sold, seats_held) for an event, after the oversell checks"""
+    from sqlalchemy import text
+    sold = connection.execute(text("SELECT count(*) FROM tickets WHERE event_id = :e"), {"e": event_id}).scalar()
+    distinct = connection.execute(
+        text("SELECT count(DISTINCT attendee_id) FROM tickets WHERE event_id = :e"), {"e": event_id}
+    ).scalar()
+    counters = connection.execute(
+        text("SELECT tickets_sold, seats_held FROM events WHERE id = :e"), {"e": event_id}
+    ).one()
+    assert sold <= capacity, f"oversold: {sold} tickets for {capacity} seats"
+    assert distinct == sold, "an attendee was ticketed twice"
+    assert counters[0] == sold, f"events.tickets_sold is {counters[0]} but {sold} tickets exist"
+    return sold, counters[0], counters[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--capacity", type=int, default=10_000)
+    parser.add_argument("--attendees", type=int, default=20_000, help="pool the requests draw from")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    parser.add_argument("--baseline", type=int, default=500, help="bookings timed through Ticket.create")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.attendees < args.capacity * 2:
+        parser.error("--attendees must be at least twice --capacity, so both events can sell out")
+
+    workdir = tempfile.mkdtemp(prefix="flash_sale_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'flash.db')}"
+
+    from sqlalchemy import text
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket
+    from models.flash_sale import FlashSale
+
+    create_tables()
+    event = Event.create("Flash Drop", "Nairobi", "2030-01-01", args.capacity)
+    crashed = Event.create("Crashed Drop", "Mombasa", "2030-01-01", args.capacity)
+    baseline = Event.create("Regular Sale", "Kisumu", "2030-01-01", args.baseline)
+    failed = Event.create("Failed Drop", "Nakuru", "2030-01-01", args.capacity)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO attendees (id, name, contact, contact_normalized) VALUES (:id, :name, :contact, :contact)"),
+            [{"id": attendee_id, "name": "Flash Attendee", "contact": f"flash{attendee_id}@example.com"}
+             for attendee_id in range(1, args.attendees + 1)],
+        )
+
+    started = time.perf_counter()
+    for attendee_id in range(1, args.baseline + 1):
+        Ticket.create(baseline.id, attendee_id)
+    baseline_rate = args.baseline / (time.perf_counter() - started)
+
+    rng = random.Random(args.seed)
+    requests = [rng.randint(1, args.attendees) for _ in range(args.requests)]
+    share = -(-args.requests // args.threads)
+    results = [None] * args.threads
+    gate = threading.Barrier(args.threads + 1)
+
+    def buyer(number):
+        granted = []
+        gate.wait()
+        for attendee_id in requests[number * share:(number + 1) * share]:
+            if sale.grant(attendee_id):
+                granted.append(attendee_id)
+        results[number] = granted
+
+    sale = FlashSale.open(event.id, args.shards, args.batch_size, args.flush_interval)
+    buyers = [threading.Thread(target=buyer, args=(number,)) for number in range(args.threads)]
+    for thread in buyers:
+        thread.start()
+    gate.wait()
+    started = time.perf_counter()
+    for thread in buyers:
+        thread.join()
+    granting = time.perf_counter() - started
+    summary = sale.close()
+    durable = time.perf_counter() - started
+
+    granted = [attendee_id for chunk in results for attendee_id in chunk]
+    with engine.connect() as conn:
+        sold, _, held = check(conn, event.id, args.capacity)
+        ticketed = set(conn.execute(
+            text("SELECT attendee_id FROM tickets WHERE event_id = :e"), {"e": event.id}
+        ).scalars())
+
+    print(f"requests={args.requests:,} capacity={args.capacity:,} attendees={args.attendees:,} "
+          f"threads={args.threads} shards={args.shards}")
+    print(f"granted={len(granted):,} persisted={summary['persisted']:,} rejected={summary['rejected']} "
+          f"tickets={sold:,} events.seats_held={held}")
+    print(f"grants: {args.requests / granting:,.0f} requests/s answered, "
+          f"{len(granted) / durable:,.0f} tickets/s written (close() included, {durable:.2f}s)")
+    print(f"Ticket.create one at a time: {baseline_rate:,.0f} bookings/s")
+
+    assert len(granted) == len(set(granted)), "an attendee was granted twice"
+    assert set(granted) == ticketed, "granted attendees and ticketed attendees differ"
+    assert sold == args.capacity, f"expected a sell-out of {args.capacity}, sold {sold}"
+    assert held == 0, "seats were left reserved after close()"
+
+    # Crash mid-sale, then recover and sell out what is left
+    engine.dispose()
+    first = args.capacity + 1
+    child = multiprocessing.Process(
+        target=crash_mid_sale, args=(crashed.id, first, first + args.capacity, args.flush_interval)
+    )
+    child.start()
+    child.join()
+    with engine.connect() as conn:
+        written, _, reserved = check(conn, crashed.id, args.capacity)
+    try:
+        FlashSale.open(crashed.id)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a sale opened over a crashed sale's reservation")
+    tickets_sold, seats_held = FlashSale.recover(crashed.id)
+    print(f"\ncrash: {written:,} tickets written before the child died, "
+          f"events.seats_held={reserved:,} left reserved; "
+          f"recovered tickets_sold={tickets_sold:,} seats_held={seats_held}")
+    assert (tickets_sold, seats_held) == (written, 0), "recover() did not match the tickets table"
+
+    with FlashSale.open(crashed.id) as resale:
+        for attendee_id in range(1, args.attendees + 1):
+            resale.grant(attendee_id)
+    with engine.connect() as conn:
+        sold, _, held = check(conn, crashed.id, args.capacity)
+    assert sold == args.capacity and held == 0, f"resale after recovery sold {sold} of {args.capacity}"
+
+    # The writer fails mid-sale: close() must still release the event
+    sale = FlashSale.open(failed.id, flush_interval=args.flush_interval)
+    half = args.capacity // 2
+    for attendee_id in range(1, half + 1):
+        sale.grant(attendee_id)
+    time.sleep(args.flush_interval * 10)
+
+    def broken_flush():
+        raise RuntimeError("injected writer failure")
+    sale._flush = broken_flush
+    for attendee_id in range(half + 1, args.capacity + 1):
+        sale.grant(attendee_id)
+    try:
+        sale.close()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("close() swallowed the writer's failure")
+    with engine.connect() as conn:
+        written, _, held = check(conn, failed.id, args.capacity)
+        reservations = conn.execute(text("SELECT count(*) FROM flash_sales WHERE event_id = :e"),
+                                    {"e": failed.id}).scalar()
+    assert held == 0 and reservations == 0, "close() left seats reserved after the writer failed"
+    assert FlashSale.recover(failed.id) == (written, 0), "recover() refused or miscounted after close()"
+    FlashSale.open(failed.id).close()
+    print(f"writer failure: {written:,} tickets written, the other {args.capacity - written:,} seats released")
+    print("OK: no oversell, no double tickets, counters match the tickets table after a crash and a writer failure")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Lookup latency before and after the tickets/attendees indexes.
+
+Builds a database with --tickets tickets (1M by default), times the model
+lookups with the indexes dropped, builds the indexes and times them again.
+
+    python -m benchmarks.lookup_indexes --tickets 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TICKETS_PER_ATTENDEE = 5
+
+
+def populate(engine, tickets, events):
+    """Bulk load events, attendees and tickets with unique (event, attendee) pairs"""
+    attendees = tickets // TICKETS_PER_ATTENDEE
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # Raw connections are in autocommit mode; one transaction, not one per row
+        cursor.execute("BEGIN")
+        cursor.executemany(
+            "INSERT INTO events (id, name, location, date, capacity, tickets_sold) VALUES (?, ?, ?, ?, ?, 0)",
+            ((i, f"Event {i}", "Nairobi", "2030-01-01", tickets) for i in range(1, events + 1)),
+        )
+        cursor.executemany(
+            "INSERT INTO attendees (id, name, contact, contact_normalized) VALUES (?, ?, ?, ?)",
+            ((i, f"Attendee {i}", f"attendee{i}@example.com", f"attendee{i}@example.com")
+             for i in range(1, attendees + 1)),
+        )
+        # Each attendee gets TICKETS_PER_ATTENDEE distinct events
+        cursor.executemany(
+            "INSERT INTO tickets (event_id, attendee_id, booked_at) VALUES (?, ?, '2030-01-01 00:00:00')",
+            (((a * 7 + k * 131) % events + 1, a)
+             for a in range(1, attendees + 1) for k in range(TICKETS_PER_ATTENDEE)),
+        )
+        cursor.execute(
+            "UPDATE events SET tickets_sold = counts.sold FROM "
+            "(SELECT event_id, count(*) AS sold FROM tickets GROUP BY event_id) AS counts "
+            "WHERE counts.event_id = events.id"
+        )
+        raw.commit()
+    finally:
+        raw.close()
+    return attendees
+
+
+def time_calls(fn, args_list):
+    """Per-call latencies in milliseconds"""
+    latencies = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def run_lookups(samples, events, attendees, seed):
+    from models.attendee import Attendee
+    from models.ticket import Ticket
+
+    rng = random.Random(seed)
+    event_ids = [(rng.randint(1, events),) for _ in range(samples)]
+    attendee_ids = [(rng.randint(1, attendees),) for _ in range(samples)]
+    contacts = [(f"attendee{a}@example.com",) for (a,) in attendee_ids]
+    pairs = [(e, a) for (e,), (a,) in zip(event_ids, attendee_ids)]
+    return {
+        "Ticket.get_tickets_for_event": time_calls(Ticket.get_tickets_for_event, event_ids),
+        "Ticket.get_tickets_for_attendee": time_calls(Ticket.get_tickets_for_attendee, attendee_ids),
+        "Ticket.find_by_event_and_attendee": time_calls(Ticket.find_by_event_and_attendee, pairs),
+        "Attendee.find_by_contact": time_calls(Attendee.find_by_contact, contacts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--events", type=int, default=2_000)
+    parser.add_argument("--samples", type=int, default=20, help="calls timed per method")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="lookup_indexes_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'lookups.db')}"
+
+    from models import Base, create_tables, engine
+    from models.event import Event  # noqa: F401 (registers the events table)
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+
+    create_tables()
+    indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+    for index in indexes:
+        index.drop(engine)
+
+    started = time.perf_counter()
+    attendees = populate(engine, args.tickets, args.events)
+    print(f"loaded {args.tickets} tickets, {attendees} attendees, {args.events} events "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    before = run_lookups(args.samples, args.events, attendees, args.seed)
+    started = time.perf_counter()
+    for index in indexes:
+        index.create(engine)
+    print(f"built {len(indexes)} indexes in {time.perf_counter() - started:.1f}s")
+    after = run_lookups(args.samples, args.events, attendees, args.seed)
+
+    print(f"\n{'Lookup':<36} {'before p50 ms':>14} {'after p50 ms':>13} {'speedup':>9}")
+    for name in before:
+        b = statistics.median(before[name])
+        a = statistics.median(after[name])
+        print(f"{name:<36} {b:>14.3f} {a:>13.3f} {b / a:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Capacity analytics from an OccupancySnapshot against the same analytics over Event ORM objects.
+
+For each `--scales` preset, builds a database with benchmarks.datagen, then
+runs each path in a fresh process:
+
+- numpy: OccupancySnapshot.load(), then fill_summary(), daily_bookings(),
+  repeat_attendees() and predicted_sellouts()
+- orm: Event objects from one query and `len(event.tickets)` per event,
+  with the same four results computed in Python
+
+Reports seconds and the peak resident memory each path added after its
+imports. Both paths must give the same results. The ORM path is skipped
+above `--orm-max` tickets (10M tickets of ORM objects need far more memory
+than the snapshot).
+
+    python -m benchmarks.occupancy --scales 100k 1m 10m --orm-max 1m
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen  # noqa: E402
+
+WINDOW_DAYS = 7
+
+
+def peak_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build(path, tickets, results):
+    datagen.create_database(path, tickets=tickets)
+    from models import engine
+    from datetime import datetime
+    with engine.connect() as conn:
+        last = conn.exec_driver_sql("SELECT max(booked_at) FROM tickets").scalar()
+    # "Now" is the last booking, so the sell-out window has recent sales in it
+    results.put(datetime.fromisoformat(last))
+
+
+def numpy_path(now, results):
+    from models.attendee import Attendee  # noqa: F401
+    from models.occupancy import OccupancySnapshot
+    import numpy as np
+    baseline = peak_mib()
+    started = time.perf_counter()
+    snapshot = OccupancySnapshot.load()
+    summary = snapshot.fill_summary()
+    days, bookings = snapshot.daily_bookings()
+    repeat = snapshot.repeat_attendees()
+    sellouts = snapshot.predicted_sellouts(WINDOW_DAYS, now)
+    seconds = time.perf_counter() - started
+    booked = np.nonzero(bookings)[0]
+    results.put({
+        "seconds": seconds, "peak MiB": peak_mib() - baseline,
+        "sold_out": summary["sold_out"], "repeat": repeat,
+        "daily": {str(days[i]): int(bookings[i]) for i in booked},
+        "sellouts": sorted(int(event_id) for event_id in sellouts),
+    })
+
+
+def orm_path(now, results):
+    from models import read_session
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    baseline = peak_mib()
+    started = time.perf_counter()
+    daily, per_attendee, sellouts, sold_out = Counter(), Counter(), [], 0
+    window_start = now - timedelta(days=WINDOW_DAYS)
+    with read_session() as session:
+        for event in session.query(Event).order_by(Event.id).all():
+            tickets = event.tickets
+            if len(tickets) + event.seats_held >= event.capacity:
+                sold_out += 1
+            recent = 0
+            for ticket in tickets:
+                daily[ticket.booked_at.date().isoformat()] += 1
+                per_attendee[ticket.attendee_id] += 1
+                if window_start < ticket.booked_at <= now:
+                    recent += 1
+            remaining = event.capacity - len(tickets) - event.seats_held
+            if remaining > 0 and recent:
+                rate = recent / (WINDOW_DAYS * 86400)
+                if (now + timedelta(seconds=math.ceil(remaining / rate))).date() <= event.date:
+                    sellouts.append(event.id)
+    seconds = time.perf_counter() - started
+    results.put({
+        "seconds": seconds, "peak MiB": peak_mib() - baseline,
+        "sold_out": sold_out, "repeat": sum(1 for count in per_attendee.values() if count >= 2),
+        "daily": dict(daily), "sellouts": sellouts,
+    })
+
+
+def run(ctx, target, *args):
+    """Call target(*args, queue) in a fresh process and return what it put on the queue"""
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            assert process.is_alive() or not results.empty(), f"{target.__name__} failed"
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="*", choices=datagen.SCALES, default=["100k", "1m", "10m"])
+    parser.add_argument("--orm-max", choices=datagen.SCALES, default="1m",
+                        help="largest scale the ORM path runs at")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="occupancy_")
+    os.environ["EVENT_TICKETING_CACHE"] = "off"
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'tickets':>12} {'path':<6} {'seconds':>9} {'peak MiB':>9}")
+    for scale in args.scales:
+        tickets = datagen.SCALES[scale]
+        path = os.path.join(workdir, f"{scale}.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        now = run(ctx, build, path, tickets)
+        results = {"numpy": run(ctx, numpy_path, now)}
+        if tickets <= datagen.SCALES[args.orm_max]:
+            results["orm"] = run(ctx, orm_path, now)
+        for name, result in results.items():
+            print(f"{tickets:>12,} {name:<6} {result['seconds']:>9.2f} {result['peak MiB']:>9.0f}")
+        if "orm" in results:
+            numpy_result, orm_result = results["numpy"], results["orm"]
+            for key in ("sold_out", "repeat", "daily", "sellouts"):
+                assert numpy_result[key] == orm_result[key], f"{key} differs between the paths"
+            print(f"{'':>12} {'ratio':<6} {orm_result['seconds'] / numpy_result['seconds']:>8.1f}x "
+                  f"{orm_result['peak MiB'] / max(numpy_result['peak MiB'], 1):>8.1f}x")
+    print("\nOK: the snapshot and the ORM path agree wherever both ran")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cost of the startup schema check on an up-to-date database.
+
+Compares the old startup step, Base.metadata.create_all (a has_table probe per
+table), with models.schema.migrate, which reads alembic_version once and
+returns. Counts SQL statements and times both on a migrated database.
+
+    python -m benchmarks.schema_check --runs 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='schema_check_'), 'bench.db')}"
+
+from sqlalchemy import event  # noqa: E402
+
+from models import Base, engine  # noqa: E402
+from models.schema import migrate  # noqa: E402
+
+
+def measure(step, runs):
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    for _ in range(runs):
+        step()
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", count)
+    return statements[0] / runs, elapsed / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    migrate()
+    print(f"{'Startup step':<28} {'statements':>10} {'ms':>8}")
+    for label, step in (("create_all (old)", lambda: Base.metadata.create_all(bind=engine)),
+                        ("migrate, already current", migrate)):
+        statements, ms = measure(step, args.runs)
+        print(f"{label:<28} {statements:>10.0f} {ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Hold/confirm checkout throughput, with a share of checkouts abandoned to expire.
+
+Every checkout holds a seat and, unless it is one of the abandoned ones
+(`--churn`, default 10%), confirms it into a ticket. Abandoned holds get a
+short ttl and are reclaimed by the sweep that runs inside later hold()
+calls, so their seats are sold again. The event is sized so that it sells
+out only if the expired seats really come back.
+
+At the end every seat must be a ticket, events.seats_held must be 0 and
+seat_holds empty, and events.tickets_sold must match the tickets table.
+Also times a sweep with nothing expired among `--active` live holds, which
+should stay a single index probe.
+
+    python -m benchmarks.seat_holds --checkouts 5000 --churn 0.1
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkouts", type=int, default=5000)
+    parser.add_argument("--churn", type=float, default=0.1, help="share of holds left to expire")
+    parser.add_argument("--active", type=int, default=100_000, help="live holds present for the idle sweep timing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="seat_holds_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from sqlalchemy import text
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    from models.seat_hold import SeatHold
+
+    create_tables()
+    rng = random.Random(args.seed)
+    abandoned = set(rng.sample(range(args.checkouts), int(args.checkouts * args.churn)))
+    # Seats for every checkout that confirms; the abandoned ones must be resold
+    capacity = args.checkouts - len(abandoned)
+    event = Event.create("Checkout Launch", "Nairobi", "2030-01-01", capacity)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO attendees (name, contact, contact_normalized) VALUES (:name, :contact, :contact)"),
+            [{"name": "Checkout Attendee", "contact": f"checkout{i}@example.com"} for i in range(args.checkouts)],
+        )
+
+    holds = confirms = refused = 0
+    hold_times, confirm_times = [], []
+    started = time.perf_counter()
+    for number in range(args.checkouts):
+        call_started = time.perf_counter()
+        try:
+            # An abandoned hold runs out almost at once; the next hold() sweeps it
+            hold = SeatHold.hold(event.id, number + 1, ttl=0 if number in abandoned else 600)
+        except ValueError:
+            refused += 1
+            continue
+        hold_times.append((time.perf_counter() - call_started) * 1000)
+        holds += 1
+        if number in abandoned:
+            continue
+        call_started = time.perf_counter()
+        SeatHold.confirm(hold.id)
+        confirm_times.append((time.perf_counter() - call_started) * 1000)
+        confirms += 1
+    elapsed = time.perf_counter() - started
+    reclaimed = SeatHold.release_expired()
+
+    with engine.connect() as conn:
+        sold = conn.execute(text("SELECT count(*) FROM tickets WHERE event_id = :e"), {"e": event.id}).scalar()
+        counters = conn.execute(
+            text("SELECT tickets_sold, seats_held FROM events WHERE id = :e"), {"e": event.id}
+        ).one()
+        left = conn.execute(text("SELECT count(*) FROM seat_holds")).scalar()
+
+    print(f"checkouts={args.checkouts} abandoned={len(abandoned)} capacity={capacity}")
+    print(f"holds={holds} confirmed={confirms} refused={refused} reclaimed at the end={reclaimed}")
+    print(f"tickets={sold} events.tickets_sold={counters[0]} events.seats_held={counters[1]} holds left={left}")
+    print(f"hold: median {statistics.median(hold_times):.2f} ms   "
+          f"confirm: median {statistics.median(confirm_times):.2f} ms")
+    print(f"throughput={confirms / elapsed:.0f} confirmed checkouts/s over {elapsed:.2f}s")
+
+    assert sold == capacity, f"expected a sell-out of {capacity}, sold {sold}"
+    assert counters[0] == sold, f"events.tickets_sold is {counters[0]} but {sold} tickets exist"
+    assert counters[1] == 0 and left == 0, "held seats were not all confirmed or reclaimed"
+    assert refused == 0, "a hold was refused although expired seats should have come back"
+
+    # Idle sweep: many live holds, none expired
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE events SET capacity = capacity + :n WHERE id = :e"),
+                     {"n": args.active, "e": event.id})
+        conn.execute(
+            text("INSERT INTO attendees (name, contact, contact_normalized) VALUES (:name, :contact, :contact)"),
+            [{"name": "Idle Attendee", "contact": f"idle{i}@example.com"} for i in range(args.active)],
+        )
+        conn.execute(text(
+            "INSERT INTO seat_holds (event_id, attendee_id, created_at, expires_at) "
+            "SELECT :e, id, CURRENT_TIMESTAMP, :expires FROM attendees WHERE contact LIKE 'idle%'"
+        ), {"e": event.id, "expires": expires_at})
+    timings = []
+    for _ in range(200):
+        call_started = time.perf_counter()
+        SeatHold.release_expired()
+        timings.append((time.perf_counter() - call_started) * 1000)
+    print(f"sweep with {args.active:,} live holds and none expired: median {statistics.median(timings):.2f} ms")
+    print("OK: every abandoned seat was resold, no held seat left behind")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-call cost of the SQL trace: disabled, enabled outside any action, and recording.
+
+Times Ticket.page with its attendees joined (one query, 20 rows) and a
+page of attendees with their ticket counts (two queries) in each mode.
+
+    python -m benchmarks.sql_trace --calls 2000 --rounds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen  # noqa: E402
+
+datagen.create_database(os.path.join(tempfile.mkdtemp(prefix="sql_trace_"), "bench.db"), tickets=20_000)
+
+from models.instrumentation import sql_trace  # noqa: E402
+from models.event import Event  # noqa: E402,F401
+from models.attendee import Attendee  # noqa: E402
+from models.ticket import Ticket  # noqa: E402
+
+
+def tickets_page(number):
+    return Ticket.page(after_id=number % 10_000, with_attendee=True)
+
+
+def attendees_page(number):
+    attendees = Attendee.page(after_id=number % 2_000)
+    return Ticket.count_by_attendee([attendee.id for attendee in attendees])
+
+
+def time_calls(call, calls, traced):
+    started = time.perf_counter()
+    for number in range(calls):
+        with sql_trace.action("bench") if traced else nullcontext():
+            call(number)
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000, help="calls per mode per round")
+    parser.add_argument("--rounds", type=int, default=5, help="the best round of each mode is reported")
+    args = parser.parse_args()
+
+    print(f"{'Call':<16} {'off us':>8} {'on, idle us':>12} {'traced us':>10}")
+    for name, call in [("ticket page", tickets_page), ("attendee page", attendees_page)]:
+        time_calls(call, args.calls // 10, False)
+        timings = {"off": [], "idle": [], "traced": []}
+        # Rounds interleave the modes so drift on the machine hits them all alike
+        for _ in range(args.rounds):
+            timings["off"].append(time_calls(call, args.calls, False))
+            sql_trace.enable()
+            timings["idle"].append(time_calls(call, args.calls, False))
+            timings["traced"].append(time_calls(call, args.calls, True))
+            sql_trace.disable()
+            sql_trace.actions.clear()
+        print(f"{name:<16} {min(timings['off']):>8.0f} {min(timings['idle']):>12.0f} {min(timings['traced']):>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Micro-benchmarks for every model method and menu listing, with JSON results to diff between commits.
+
+Runs against a database made by benchmarks.datagen (a fresh one at --scale,
+or a copy of --db so the original is never written to). Each case is timed
+for --samples calls with random ids from --seed and reported as p50/p95/p99
+milliseconds; one more call runs under tracemalloc for its peak allocation.
+Write cases set up their own rows outside the timed call. Full-table reads
+(get_all) take --scan-samples calls since one can run for seconds at scale.
+
+    python -m benchmarks.suite --scale 100k --output before.json
+    python -m benchmarks.suite --scale 100k --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+LIB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(LIB_DIR)
+
+from benchmarks import datagen  # noqa: E402
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def cases(rng, scan_samples):
+    """(name, samples, prepare) triples; prepare() does untimed setup and returns the call to time"""
+    from models import unit_of_work
+    from models.cache import event_cache
+    from models.event import Event
+    from models.attendee import Attendee
+    from models.ticket import Ticket
+    from models.waitlist import WaitlistEntry
+    from models.seat_hold import SeatHold
+    from helpers import print_events_page, print_event_choices, print_tickets_page, print_attendees_page
+
+    with unit_of_work() as session:
+        events = session.query(Event.id).order_by(Event.id.desc()).first()[0]
+        attendees = session.query(Attendee.id).order_by(Attendee.id.desc()).first()[0]
+        tickets = session.query(Ticket.id).order_by(Ticket.id.desc()).first()[0]
+    fresh = iter(range(1, 10**9))
+
+    def event_id():
+        return rng.randint(1, events)
+
+    def attendee_id():
+        return rng.randint(1, attendees)
+
+    def new_event(capacity=100):
+        return Event.create(f"Benchmark Event {next(fresh)}", "Nairobi", date(2030, 1, 1), capacity)
+
+    def new_attendee():
+        number = next(fresh)
+        # Names are letters only; the contact keeps each attendee distinct
+        return Attendee.create("Benchmark Guest", f"bench{number}-{time.time_ns()}@example.com")
+
+    def uncached_find():
+        event_cache.enabled = False
+        try:
+            Event.find_by_id(event_id())
+        finally:
+            event_cache.enabled = True
+
+    def listing(fetch_page, show_page):
+        # One page fetch plus its display in one unit, as browse_pages does
+        def call(after_id):
+            with unit_of_work(), contextlib.redirect_stdout(io.StringIO()):
+                show_page(fetch_page(after_id=after_id))
+        return call
+
+    def after(last_id):
+        return max(0, rng.randint(0, last_id) - 20)
+
+    def full_event():
+        event = new_event(capacity=1)
+        return event.id, Ticket.create(event.id, attendee_id())
+
+    def waiting_for(event):
+        return WaitlistEntry.join(event, new_attendee().id)
+
+    def promoting_cancel():
+        event, ticket = full_event()
+        waiting_for(event)
+        return ticket.delete
+
+    def booked_ticket():
+        found = Ticket.find_by_id(rng.randint(1, tickets))
+        return found.event_id, found.attendee_id
+
+    return [
+        ("Event.create", None, lambda: new_event),
+        ("Event.find_by_id", None, lambda: (lambda event=event_id(): Event.find_by_id(event))),
+        ("Event.find_by_id (cache off)", None, lambda: uncached_find),
+        ("Event.page", None, lambda: (lambda start=after(events): Event.page(after_id=start))),
+        ("Event.get_all", scan_samples, lambda: Event.get_all),
+        ("Event.get_attendees", scan_samples, lambda: Event.find_by_id(event_id()).get_attendees),
+        ("Event.delete", None, lambda: new_event().delete),
+
+        ("Attendee.create", None, lambda: new_attendee),
+        ("Attendee.find_by_id", None, lambda: (lambda attendee=attendee_id(): Attendee.find_by_id(attendee))),
+        ("Attendee.find_by_contact", None,
+         lambda: (lambda contact=Attendee.find_by_id(attendee_id()).contact: Attendee.find_by_contact(contact))),
+        ("Attendee.page", None, lambda: (lambda start=after(attendees): Attendee.page(after_id=start))),
+        ("Attendee.get_all", scan_samples, lambda: Attendee.get_all),
+        ("Attendee.get_events", None, lambda: Attendee.find_by_id(attendee_id()).get_events),
+        ("Attendee.delete", None, lambda: new_attendee().delete),
+
+        ("Ticket.create", None, lambda: (lambda event=new_event().id, attendee=attendee_id():
+                                         Ticket.create(event, attendee))),
+        ("Ticket.create_many (10)", None, lambda: (lambda event=new_event().id, number=next(fresh): Ticket.create_many(
+            event, [(f"Group Guest {chr(65 + k)}", f"group{number}-{k}-{time.time_ns()}@example.com") for k in range(10)]))),
+        ("Ticket.find_by_id", None, lambda: (lambda ticket_id=rng.randint(1, tickets): Ticket.find_by_id(ticket_id))),
+        ("Ticket.find_by_event_and_attendee", None,
+         lambda: (lambda pair=booked_ticket(): Ticket.find_by_event_and_attendee(*pair))),
+        ("Ticket.page", None, lambda: (lambda start=after(tickets): Ticket.page(after_id=start))),
+        ("Ticket.page (event, with attendee)", None,
+         lambda: (lambda event=event_id(): Ticket.page(event_id=event, with_attendee=True))),
+        ("Ticket.count_by_attendee (50)", None,
+         lambda: (lambda ids=[attendee_id() for _ in range(50)]: Ticket.count_by_attendee(ids))),
+        ("Ticket.get_tickets_for_event", scan_samples,
+         lambda: (lambda event=event_id(): Ticket.get_tickets_for_event(event))),
+        ("Ticket.get_tickets_for_attendee", None,
+         lambda: (lambda attendee=attendee_id(): Ticket.get_tickets_for_attendee(attendee))),
+        ("Ticket.get_all", scan_samples, lambda: Ticket.get_all),
+        ("Ticket.delete", None, lambda: Ticket.create(new_event().id, attendee_id()).delete),
+        ("Ticket.delete (promotes waitlist)", None, promoting_cancel),
+
+        ("WaitlistEntry.join", None,
+         lambda: (lambda event=full_event()[0], attendee=new_attendee().id: WaitlistEntry.join(event, attendee))),
+        ("WaitlistEntry.delete", None, lambda: waiting_for(full_event()[0]).delete),
+
+        ("SeatHold.hold", None, lambda: (lambda event=new_event().id, attendee=attendee_id():
+                                         SeatHold.hold(event, attendee))),
+        ("SeatHold.confirm", None,
+         lambda: (lambda hold_id=SeatHold.hold(new_event().id, attendee_id()).id: SeatHold.confirm(hold_id))),
+        ("SeatHold.release", None, lambda: SeatHold.hold(new_event().id, attendee_id()).release),
+        ("SeatHold.release_expired (none due)", None, lambda: SeatHold.release_expired),
+
+        ("listing: events", None,
+         lambda: (lambda start=after(events): listing(Event.page, print_events_page)(start))),
+        ("listing: event choices", None,
+         lambda: (lambda start=after(events): listing(Event.page, print_event_choices)(start))),
+        ("listing: attendees", None,
+         lambda: (lambda start=after(attendees): listing(Attendee.page, print_attendees_page)(start))),
+        ("listing: event attendees", None,
+         lambda: (lambda event=event_id(): listing(
+             lambda **keys: Ticket.page(event_id=event, with_attendee=True, **keys), print_tickets_page)(None))),
+    ]
+
+
+def measure(prepare, samples):
+    timings = []
+    for _ in range(samples):
+        call = prepare()
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    call = prepare()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50": round(percentile(timings, 0.50), 3),
+        "p95": round(percentile(timings, 0.95), 3),
+        "p99": round(percentile(timings, 0.99), 3),
+        "mean": round(statistics.fmean(timings), 3),
+        "samples": samples,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=LIB_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\nAgainst {baseline_path} (p50 / p95 change, negative is faster):")
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"  {name:<38} new")
+            continue
+        changes = [f"{(stats[key] - old[key]) / old[key] * 100:+6.1f}%" if old[key] else "   n/a" for key in ("p50", "p95")]
+        print(f"  {name:<38} {changes[0]} {changes[1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="datagen database to copy instead of generating one")
+    parser.add_argument("--scale", choices=datagen.SCALES, default="10k")
+    parser.add_argument("--samples", type=int, default=200, help="timed calls per case")
+    parser.add_argument("--scan-samples", type=int, default=5, help="timed calls per full-table case")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", metavar="JSON", help="print the change from an earlier --output")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="suite_"), "bench.db")
+    if args.db:
+        shutil.copyfile(args.db, path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        generated = None
+    else:
+        generated = datagen.create_database(path, tickets=datagen.SCALES[args.scale], seed=args.seed)
+    from models import create_tables
+    create_tables()
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'Case':<38} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KiB':>9}")
+    for name, samples, prepare in cases(rng, args.scan_samples):
+        if args.only and args.only not in name:
+            continue
+        stats = results[name] = measure(prepare, samples or args.samples)
+        print(f"{name:<38} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} {stats['peak_kib']:>9.1f}")
+
+    if args.output:
+        import sqlalchemy
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(), "run_at": datetime.now().isoformat(timespec="seconds"),
+                    "database": args.db or generated, "seed": args.seed, "samples": args.samples,
+                    "python": platform.python_version(), "sqlalchemy": sqlalchemy.__version__,
+                    "sqlite": sqlite3.sqlite_version,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
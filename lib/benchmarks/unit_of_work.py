@@ -0,0 +1,92 @@
+"""Pool checkouts, statements and time per user action, with and without a unit of work.
+
+Each action is the sequence of model calls one menu makes: booking a ticket
+(find the event, find or create the attendee, book) and showing a page of
+attendees with their ticket counts. Run bare, every model call opens its own
+session and connection; inside models.unit_of_work they share one.
+
+    python -m benchmarks.unit_of_work --actions 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='unit_of_work_'), 'bench.db')}"
+
+from contextlib import nullcontext  # noqa: E402
+
+from sqlalchemy import event  # noqa: E402
+
+from models import create_tables, engine, unit_of_work  # noqa: E402
+from models.event import Event  # noqa: E402
+from models.attendee import Attendee  # noqa: E402
+from models.ticket import Ticket  # noqa: E402
+
+
+class Counters:
+    def __init__(self):
+        self.checkouts = 0
+        self.statements = 0
+
+    def checkout(self, *args):
+        self.checkouts += 1
+
+    def statement(self, *args):
+        self.statements += 1
+
+
+def book(event_id, number):
+    event = Event.find_by_id(event_id)
+    contact = f"guest{number}@example.com"
+    attendee = Attendee.find_by_contact(contact)
+    if attendee is None:
+        attendee = Attendee.create("Bench Guest", contact)
+    ticket = Ticket.create(event.id, attendee.id)
+    return ticket.id
+
+
+def show_page(number):
+    attendees = Attendee.page(after_id=number % 1000)
+    return Ticket.count_by_attendee([attendee.id for attendee in attendees])
+
+
+def run(name, action, actions, scoped, counters):
+    scope = unit_of_work if scoped else nullcontext
+    counters.checkouts = counters.statements = 0
+    started = time.perf_counter()
+    for number in range(actions):
+        with scope():
+            action(number)
+    elapsed = time.perf_counter() - started
+    label = "unit of work" if scoped else "per call"
+    print(f"{name:<12} {label:<14} {counters.checkouts / actions:>10.1f} "
+          f"{counters.statements / actions:>12.1f} {elapsed / actions * 1000:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=2000, help="actions timed per mode")
+    args = parser.parse_args()
+
+    create_tables()
+    # One event per mode, each big enough for every booking
+    per_call = Event.create("Per Call", "Nairobi", "2030-01-01", args.actions)
+    scoped = Event.create("Unit of Work", "Nairobi", "2030-01-01", args.actions)
+
+    counters = Counters()
+    event.listen(engine, "checkout", counters.checkout)
+    event.listen(engine, "before_cursor_execute", counters.statement)
+
+    print(f"{'Action':<12} {'Mode':<14} {'checkouts':>10} {'statements':>12} {'ms/action':>10}")
+    run("book", lambda n: book(per_call.id, n), args.actions, False, counters)
+    run("book", lambda n: book(scoped.id, args.actions + n), args.actions, True, counters)
+    run("show page", show_page, args.actions, False, counters)
+    run("show page", show_page, args.actions, True, counters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Upcoming-event and calendar queries over a large events table, with and without the date indexes.
+
+Loads `--events` events (1M by default), `--past` of them (95%) dated in
+the last five years and the rest in the coming year, spread over a few
+venues. Then times the first page of Event.upcoming, a page deep into the
+upcoming range, Event.on_date and Event.by_location_and_range, first with
+ix_events_date and ix_events_location_date dropped and then with them
+built, and prints each query plan.
+
+With the indexes every view must be an index range scan, and paging through
+a sample of the upcoming range must return each event once, in (date, id)
+order.
+
+    python -m benchmarks.upcoming_events --events 1000000 --past 0.95
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOCATIONS = ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Thika", "Nyeri", "Machakos"]
+DATE_INDEXES = {
+    "ix_events_date": "CREATE INDEX ix_events_date ON events (date)",
+    "ix_events_location_date": "CREATE INDEX ix_events_location_date ON events (location, date)",
+}
+
+
+def load(path, events, past, today, rng):
+    """Bulk insert the events with the stdlib driver; the search index is rebuilt once at the end"""
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA synchronous=OFF")
+        triggers = connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'events'"
+        ).fetchall()
+        for name, _ in triggers:
+            connection.execute(f"DROP TRIGGER {name}")
+        connection.executemany(
+            "INSERT INTO events (id, name, location, date, capacity, tickets_sold, seats_held) "
+            "VALUES (?, ?, ?, ?, 100, 0, 0)",
+            (
+                (event_id, f"Event {event_id}", rng.choice(LOCATIONS),
+                 (today - timedelta(days=rng.randint(1, 5 * 365)) if rng.random() < past
+                  else today + timedelta(days=rng.randrange(365))).isoformat())
+                for event_id in range(1, events + 1)
+            ),
+        )
+        for _, sql in triggers:
+            connection.execute(sql)
+        connection.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+
+def time_views(views, repeats):
+    """Median ms per view"""
+    timings = {}
+    for name, view in views.items():
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            view()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--past", type=float, default=0.95, help="share of events already over")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--walk", type=int, default=200, help="pages walked to check the paging order")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="upcoming_events_")
+    path = os.path.join(workdir, "events.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # Pages must hit the database every time
+    os.environ["EVENT_TICKETING_CACHE"] = "off"
+
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+
+    create_tables()
+    today = date.today()
+    started = time.perf_counter()
+    load(path, args.events, args.past, today, random.Random(args.seed))
+    with engine.connect() as conn:
+        upcoming_count = conn.exec_driver_sql(
+            "SELECT count(*) FROM events WHERE date >= ?", (today.isoformat(),)
+        ).scalar()
+        deep = conn.exec_driver_sql(
+            "SELECT id FROM events WHERE date >= ? ORDER BY date, id LIMIT 1 OFFSET ?",
+            (today.isoformat(), upcoming_count // 2),
+        ).scalar()
+    print(f"{args.events:,} events loaded in {time.perf_counter() - started:.1f}s, "
+          f"{upcoming_count:,} upcoming")
+
+    day = today + timedelta(days=30)
+    views = {
+        "upcoming, first page": lambda: Event.upcoming(),
+        "upcoming, halfway in": lambda: Event.upcoming(after_id=deep),
+        "next 7 days": lambda: Event.upcoming(today, today + timedelta(days=7)),
+        "on one date": lambda: Event.on_date(day),
+        "venue, next 30 days": lambda: Event.by_location_and_range("Kisumu", today, day),
+    }
+    plans = {
+        # A page after a known event, as Event.upcoming(after_id=...) sends it
+        "upcoming": ("SELECT * FROM events WHERE (date, id) > (?, ?) ORDER BY date, id LIMIT 20",
+                     (day.isoformat(), deep)),
+        "venue": ("SELECT * FROM events WHERE location = ? AND date >= ? AND date <= ? ORDER BY date, id LIMIT 20",
+                  ("Kisumu", today.isoformat(), day.isoformat())),
+    }
+
+    results = {}
+    for state in ("without", "with"):
+        with engine.begin() as conn:
+            for name, sql in DATE_INDEXES.items():
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+                if state == "with":
+                    conn.exec_driver_sql(sql)
+            conn.exec_driver_sql("ANALYZE")
+        engine.dispose()
+        results[state] = time_views(views, args.repeats)
+        with engine.connect() as conn:
+            print(f"\n{state} the date indexes:")
+            for name, (sql, params) in plans.items():
+                plan = " / ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+                print(f"  {name} plan: {plan}")
+                if state == "with":
+                    assert "SCAN events" not in plan and "TEMP B-TREE" not in plan, f"{name} is not a range scan"
+
+    print(f"\n{'view':<24} {'no index ms':>12} {'indexed ms':>12}")
+    for name in views:
+        print(f"{name:<24} {results['without'][name]:>12.2f} {results['with'][name]:>12.2f}")
+
+    # Paging must visit every upcoming event once, in (date, id) order
+    seen = []
+    page = Event.upcoming()
+    for _ in range(args.walk):
+        if not page:
+            break
+        seen.extend((event.date, event.id) for event in page)
+        page = Event.upcoming(after_id=page[-1].id)
+    with engine.connect() as conn:
+        expected = [
+            (date.fromisoformat(row[0]), row[1]) for row in conn.exec_driver_sql(
+                "SELECT date, id FROM events WHERE date >= ? ORDER BY date, id LIMIT ?",
+                (today.isoformat(), len(seen)),
+            )
+        ]
+    assert seen == expected, "paging skipped, repeated or misordered upcoming events"
+    back = Event.upcoming(before_id=seen[40][1])
+    assert [(event.date, event.id) for event in back] == seen[20:40], "paging backwards went wrong"
+    print(f"\nOK: {len(seen):,} upcoming events paged in order, every view an index range scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Waitlist stress test: bursts of cancellations against a full event with a long queue.
+
+A full event gets `--waitlist` queued attendees. Several processes then
+cancel its tickets in bursts, every process starting each burst at the same
+moment, so every cancellation promotes the head of the queue while other
+promotions are in flight. At the end the event must still be exactly full,
+the promoted attendees must be the front of the queue in queue order, and no
+attendee may hold a ticket and a queue place at once.
+
+Before the bursts, single cancellations are timed against the long queue and
+against a short one: promotion is a few index probes, so the two should cost
+about the same.
+
+    python -m benchmarks.waitlist_stress --waitlist 100000 --processes 4 --rounds 10 --burst 20
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def cancel_worker(worker_id, ticket_ids, rounds, burst, barrier, results):
+    from models import engine
+    from models.event import Event  # noqa: F401
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket
+
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    promoted, cancelled, locked, timings = [], 0, 0, []
+    tickets = iter(ticket_ids)
+    for _ in range(rounds):
+        barrier.wait()
+        for _ in range(burst):
+            ticket = Ticket.find_by_id(next(tickets))
+            started = time.perf_counter()
+            try:
+                promotion = ticket.delete()
+            except Exception as e:
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+            cancelled += 1
+            if promotion:
+                promoted.append((promotion.id, promotion.attendee_id))
+    results.put((worker_id, cancelled, locked, promoted, timings))
+
+
+def add_queue(connection, event_id, capacity, waiting, first_attendee):
+    """Fill an event with tickets and queue `waiting` more attendees; returns ticket ids"""
+    from sqlalchemy import text
+    ticketed = range(first_attendee, first_attendee + capacity)
+    queued = range(first_attendee + capacity, first_attendee + capacity + waiting)
+    connection.execute(
+        text("INSERT INTO attendees (id, name, contact, contact_normalized) VALUES (:id, :name, :contact, :contact)"),
+        [{"id": attendee_id, "name": "Stress Attendee", "contact": f"stress{attendee_id}@example.com"}
+         for attendee_id in [*ticketed, *queued]],
+    )
+    connection.execute(
+        text("INSERT INTO tickets (event_id, attendee_id, booked_at) VALUES (:e, :a, CURRENT_TIMESTAMP)"),
+        [{"e": event_id, "a": attendee_id} for attendee_id in ticketed],
+    )
+    # Inserted in attendee order, so the queue order is the attendee order
+    connection.execute(
+        text("INSERT INTO waitlist (event_id, attendee_id, joined_at) VALUES (:e, :a, CURRENT_TIMESTAMP)"),
+        [{"e": event_id, "a": attendee_id} for attendee_id in queued],
+    )
+    connection.execute(text("UPDATE events SET tickets_sold = capacity WHERE id = :e"), {"e": event_id})
+    return connection.execute(
+        text("SELECT id FROM tickets WHERE event_id = :e ORDER BY id"), {"e": event_id}
+    ).scalars().all()
+
+
+def time_cancellations(ticket_ids):
+    from models.ticket import Ticket
+    timings = []
+    for ticket_id in ticket_ids:
+        ticket = Ticket.find_by_id(ticket_id)
+        started = time.perf_counter()
+        assert ticket.delete() is not None, "a cancellation with a queue promoted nobody"
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--waitlist", type=int, default=100_000, help="attendees queued for the full event")
+    parser.add_argument("--capacity", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--burst", type=int, default=20, help="cancellations per process per round")
+    parser.add_argument("--timed", type=int, default=200, help="single cancellations timed per queue length")
+    args = parser.parse_args()
+    cancellations = args.processes * args.rounds * args.burst
+    if cancellations + args.timed > min(args.capacity, args.waitlist):
+        parser.error("capacity and waitlist must both exceed processes * rounds * burst + timed")
+
+    workdir = tempfile.mkdtemp(prefix="waitlist_stress_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+
+    from sqlalchemy import text
+    from models import create_tables, engine
+    from models.event import Event
+    from models.attendee import Attendee  # noqa: F401
+    from models.ticket import Ticket  # noqa: F401
+    from models.waitlist import WaitlistEntry  # noqa: F401
+
+    create_tables()
+    event = Event.create("Sold Out Launch", "Nairobi", "2030-01-01", args.capacity)
+    control = Event.create("Small Queue Launch", "Mombasa", "2030-01-01", args.timed)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        ticket_ids = add_queue(connection, event.id, args.capacity, args.waitlist, 1)
+        control_ids = add_queue(connection, control.id, args.timed, args.timed, 1 + args.capacity + args.waitlist)
+        head_plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM waitlist WHERE event_id = ? ORDER BY id LIMIT 1", (event.id,)
+        ).all()
+    print(f"{args.capacity:,} tickets and {args.waitlist:,} waitlisted attendees loaded "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"head of queue plan: {head_plan[0][-1]}")
+
+    short = time_cancellations(control_ids)
+    long = time_cancellations(ticket_ids[:args.timed])
+    print(f"cancel + promote median: {short:.2f} ms with {args.timed:,} waiting, "
+          f"{long:.2f} ms with {args.waitlist:,} waiting")
+    engine.dispose()
+
+    barrier = multiprocessing.Barrier(args.processes)
+    results = multiprocessing.Queue()
+    workers = []
+    share = args.rounds * args.burst
+    for worker_id in range(args.processes):
+        first = args.timed + worker_id * share
+        worker = multiprocessing.Process(
+            target=cancel_worker,
+            args=(worker_id, ticket_ids[first:first + share], args.rounds, args.burst, barrier, results),
+        )
+        worker.start()
+        workers.append(worker)
+
+    started = time.perf_counter()
+    rows = [results.get() for _ in workers]
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+
+    cancelled = sum(r[1] for r in rows)
+    locked = sum(r[2] for r in rows)
+    promoted = sorted(promotion for r in rows for promotion in r[3])
+    timings = sorted(timing for r in rows for timing in r[4])
+
+    with engine.connect() as conn:
+        sold = conn.execute(text("SELECT count(*) FROM tickets WHERE event_id = :e"), {"e": event.id}).scalar()
+        counter = conn.execute(text("SELECT tickets_sold FROM events WHERE id = :e"), {"e": event.id}).scalar()
+        pairs = conn.execute(text(
+            "SELECT count(*) FROM (SELECT DISTINCT event_id, attendee_id FROM tickets)"
+        )).scalar()
+        total = conn.execute(text("SELECT count(*) FROM tickets")).scalar()
+        both = conn.execute(text(
+            "SELECT count(*) FROM waitlist JOIN tickets USING (event_id, attendee_id)"
+        )).scalar()
+        waiting = conn.execute(text("SELECT count(*) FROM waitlist WHERE event_id = :e"), {"e": event.id}).scalar()
+
+    # The queue was loaded in attendee order, just after the ticketed attendees
+    first_queued = 1 + args.capacity
+    expected_order = list(range(first_queued + args.timed, first_queued + args.timed + len(promoted)))
+    print(f"\nprocesses={args.processes} rounds={args.rounds} burst={args.burst}")
+    print(f"cancelled={cancelled} promoted={len(promoted)} locked={locked}")
+    print(f"tickets in table={sold} events.tickets_sold={counter} still waiting={waiting:,}")
+    if timings:
+        print(f"cancel + promote under load: median {statistics.median(timings):.2f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms")
+    print(f"throughput={cancelled / elapsed:.0f} cancellations/s over {elapsed:.2f}s")
+
+    assert len(promoted) == cancelled, "a cancellation with a queue promoted nobody"
+    assert sold == args.capacity, f"event should still be full: {sold} tickets for {args.capacity} seats"
+    assert counter == sold, f"events.tickets_sold is {counter} but {sold} tickets exist"
+    assert pairs == total, "an attendee holds more than one ticket for an event"
+    assert both == 0, f"{both} attendees hold a ticket and a waitlist place"
+    assert waiting == args.waitlist - args.timed - len(promoted), "waitlist entries were lost or kept"
+    # Ticket ids are handed out in commit order, so they replay the promotions
+    assert [attendee_id for _, attendee_id in promoted] == expected_order, "promotions skipped the queue order"
+    print("OK: event stays full, promotions follow the queue, nobody ticketed and waiting")
+
+
+if __name__ == "__main__":
+    main()
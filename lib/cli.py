@@ -1,18 +1,38 @@
-from helpers import (
-    exit_program,
-    create_event_menu,
-    book_ticket_menu,
-    cancel_ticket_menu,
-    view_events_menu,
-    view_attendees_menu,
-    view_all_attendees_menu,
-    find_event_menu,
-    find_attendee_menu
-)
-# Import create_tables to ensure database is set up
-from models import create_tables
+import argparse
+import sys
 
 def main():
+    parser = argparse.ArgumentParser(prog="cli.py", add_help=False)
+    parser.add_argument("--trace-sql", action="store_true")
+    parser.add_argument("--trace-json", metavar="PATH")
+    options, rest = parser.parse_known_args()
+    # Any other arguments select a scriptable subcommand (see commands.py)
+    if rest:
+        from commands import run
+        sys.exit(run(sys.argv[1:]))
+
+    from helpers import (
+        exit_program,
+        create_event_menu,
+        book_ticket_menu,
+        cancel_ticket_menu,
+        view_events_menu,
+        view_attendees_menu,
+        view_all_attendees_menu,
+        find_event_menu,
+        find_attendee_menu,
+        book_group_menu,
+        import_data_menu,
+        export_manifest_menu,
+        search_events_menu,
+        join_waitlist_menu,
+        leave_waitlist_menu,
+        view_waitlist_menu,
+        sales_report_menu,
+        purge_events_menu
+    )
+    from models import create_tables
+
      # Create tables if they don't exist
     try:
         create_tables()
@@ -34,19 +54,40 @@ def main():
         "6": view_all_attendees_menu,
         "7": find_event_menu,
         "8": find_attendee_menu,
+        "9": book_group_menu,
+        "10": import_data_menu,
+        "11": export_manifest_menu,
+        "12": search_events_menu,
+        "13": join_waitlist_menu,
+        "14": leave_waitlist_menu,
+        "15": view_waitlist_menu,
+        "16": sales_report_menu,
+        "17": purge_events_menu,
     }
 
-    while True:
-        display_menu()
-        choice = input("\nEnter your choice (0-8): ").strip()
+    # --trace-sql prints each action's SQL summary, --trace-json saves them all on exit
+    from models.instrumentation import sql_trace
+    if options.trace_sql or options.trace_json:
+        sql_trace.enable()
+
+    try:
+        while True:
+            display_menu()
+            choice = input("\nEnter your choice (0-17): ").strip()
 
-        # Use dictionary lookup instead of if/elif
-        action = menu_actions.get(choice)
-        if action:
-            action()
-        else:
-            print("\n❌ Invalid choice! Please select a number between 0-8.")
-            input("Press Enter to continue...")
+            # Use dictionary lookup instead of if/elif
+            action = menu_actions.get(choice)
+            if action:
+                with sql_trace.action(action.__name__) as trace:
+                    action()
+                if options.trace_sql:
+                    print(f"\n{trace.summary()}")
+            else:
+                print("\n❌ Invalid choice! Please select a number between 0-17.")
+                input("Press Enter to continue...")
+    finally:
+        if options.trace_json:
+            sql_trace.export(options.trace_json)
 
 def display_menu():
     print("\n" + "-"*50)
@@ -55,11 +96,20 @@ def display_menu():
     print("1. Create New Event")
     print("2. Book Ticket")
     print("3. Cancel Ticket")
-    print("4. View All Events")
+    print("4. View Events")
     print("5. View Attendees for Event")
     print("6. View All Attendees")
     print("7. Find Event by ID")
     print("8. Find Attendee by ID")
+    print("9. Book Group Tickets")
+    print("10. Import Events/Attendees from File")
+    print("11. Export Attendee Manifest")
+    print("12. Search Events")
+    print("13. Join Waitlist")
+    print("14. Leave Waitlist")
+    print("15. View Waitlist")
+    print("16. Sales Report")
+    print("17. Purge Past Events")
     print("0. Exit")
     print("-"*50)
 
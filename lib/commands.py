@@ -0,0 +1,507 @@
+"""Non-interactive subcommands with JSON output, for scripts and ops jobs.
+
+    python cli.py events list --limit 50
+    python cli.py events show 3
+    python cli.py ticket book 3 --name "Ann Lee" --contact ann@example.com
+    python cli.py ticket cancel 42
+    python cli.py ticket hold 3 --name "Ann Lee" --contact ann@example.com --ttl 600
+    python cli.py ticket confirm 17
+    python cli.py --pretty attendee show 7
+
+Results are printed to stdout as JSON. A refused request prints
+{"error": "..."} and exits with status 1.
+
+Read-only commands query SQLite through the standard library and never import
+SQLAlchemy, so they start in a fraction of the time the menu needs. Commands
+that write import the models when they run. The schema check is one read of
+alembic_version; only a database behind settings.SCHEMA_REVISION loads
+Alembic and migrates (`python cli.py migrate` does that explicitly).
+
+--trace-sql prints the SQL trace of a write command to stderr and
+--trace-json PATH saves it (see models/instrumentation.py). Read-only
+commands do not go through SQLAlchemy, so there is nothing to trace.
+"""
+import argparse
+import csv
+import json
+import pathlib
+import sqlite3
+import sys
+from datetime import date, datetime
+
+import settings
+
+DEFAULT_LIMIT = 20
+
+
+def stored_revision(path):
+    """The database's alembic_version, or None if it is missing or unversioned"""
+    if path is None or not pathlib.Path(path).exists():
+        return None
+    connection = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        row = connection.execute("SELECT version_num FROM alembic_version").fetchone()
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        connection.close()
+    return row[0] if row else None
+
+
+def ensure_schema():
+    path = settings.sqlite_path()
+    if path is None:
+        raise ValueError("The command line needs a SQLite database file (check DATABASE_URL)")
+    if stored_revision(path) != settings.SCHEMA_REVISION:
+        from models import create_tables
+        create_tables()
+    return path
+
+
+def _read_only(path):
+    connection = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _timestamp(value):
+    """ISO 8601 for a datetime, or for SQLite's stored 'YYYY-MM-DD HH:MM:SS' text"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value.replace(" ", "T", 1)
+
+
+def _event_json(row):
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "location": row["location"],
+        "date": row["date"].isoformat() if isinstance(row["date"], date) else row["date"],
+        "capacity": row["capacity"],
+        "tickets_sold": row["tickets_sold"],
+        "seats_held": row["seats_held"],
+        "available": row["capacity"] - row["tickets_sold"] - row["seats_held"],
+    }
+
+
+def _event_row(event):
+    return {column: getattr(event, column)
+            for column in ("id", "name", "location", "date", "capacity", "tickets_sold", "seats_held")}
+
+
+def _page(connection, sql, params, filters, args):
+    """Keyset page in id order, like models.keyset_page"""
+    filters = list(filters)
+    if args.before is not None:
+        filters.append(("id < ?", args.before))
+    elif args.after is not None:
+        filters.append(("id > ?", args.after))
+    where = " AND ".join(clause for clause, _ in filters)
+    params = list(params) + [value for _, value in filters]
+    order = "DESC" if args.before is not None else "ASC"
+    rows = connection.execute(
+        f"{sql} {'WHERE ' + where if where else ''} ORDER BY id {order} LIMIT ?", params + [args.limit]
+    ).fetchall()
+    if args.before is not None:
+        rows.reverse()
+    return rows
+
+
+# Read-only commands: stdlib sqlite3 only
+
+def events_list(connection, args):
+    filters = [("location = ?", args.location)] if args.location else []
+    rows = _page(connection, "SELECT id, name, location, date, capacity, tickets_sold, seats_held FROM events",
+                 [], filters, args)
+    return [_event_json(row) for row in rows]
+
+
+def events_show(connection, args):
+    row = connection.execute(
+        "SELECT id, name, location, date, capacity, tickets_sold, seats_held FROM events WHERE id = ?", (args.event_id,)
+    ).fetchone()
+    if row is None:
+        raise ValueError("Event not found")
+    return _event_json(row)
+
+
+def events_attendees(connection, args):
+    events_show(connection, args)
+    rows = _page(
+        connection,
+        "SELECT * FROM (SELECT tickets.id AS id, attendees.id AS attendee_id, attendees.name AS name, "
+        "attendees.contact AS contact, tickets.booked_at AS booked_at FROM tickets "
+        "JOIN attendees ON attendees.id = tickets.attendee_id WHERE tickets.event_id = ?)",
+        [args.event_id], [], args,
+    )
+    return [
+        {"ticket_id": row["id"], "attendee_id": row["attendee_id"], "name": row["name"],
+         "contact": row["contact"], "booked_at": _timestamp(row["booked_at"])}
+        for row in rows
+    ]
+
+
+def attendees_list(connection, args):
+    filters = []
+    if args.name_prefix:
+        escaped = args.name_prefix.replace("/", "//").replace("%", "/%").replace("_", "/_")
+        filters.append(("name LIKE ? ESCAPE '/'", escaped + "%"))
+    rows = _page(connection, "SELECT id, name, contact FROM attendees", [], filters, args)
+    counts = {}
+    if rows:
+        ids = [row["id"] for row in rows]
+        counts = dict(connection.execute(
+            f"SELECT attendee_id, count(*) FROM tickets WHERE attendee_id IN ({', '.join('?' * len(ids))}) "
+            "GROUP BY attendee_id", ids
+        ).fetchall())
+    return [
+        {"id": row["id"], "name": row["name"], "contact": row["contact"],
+         "events_registered": counts.get(row["id"], 0)}
+        for row in rows
+    ]
+
+
+def attendee_show(connection, args):
+    row = connection.execute(
+        "SELECT id, name, contact FROM attendees WHERE id = ?", (args.attendee_id,)
+    ).fetchone()
+    if row is None:
+        raise ValueError("Attendee not found")
+    tickets = connection.execute(
+        "SELECT tickets.id, tickets.booked_at, events.id, events.name, events.date FROM tickets "
+        "JOIN events ON events.id = tickets.event_id WHERE tickets.attendee_id = ? ORDER BY tickets.id",
+        (args.attendee_id,),
+    ).fetchall()
+    return {
+        "id": row["id"], "name": row["name"], "contact": row["contact"],
+        "tickets": [
+            {"ticket_id": ticket[0], "booked_at": _timestamp(ticket[1]),
+             "event_id": ticket[2], "event": ticket[3], "date": ticket[4]}
+            for ticket in tickets
+        ],
+    }
+
+
+def ticket_show(connection, args):
+    row = connection.execute(
+        "SELECT tickets.id, tickets.booked_at, events.id, events.name, attendees.id, attendees.name, "
+        "attendees.contact FROM tickets JOIN events ON events.id = tickets.event_id "
+        "JOIN attendees ON attendees.id = tickets.attendee_id WHERE tickets.id = ?",
+        (args.ticket_id,),
+    ).fetchone()
+    if row is None:
+        raise ValueError("Ticket not found")
+    return {"ticket_id": row[0], "booked_at": _timestamp(row[1]), "event_id": row[2], "event": row[3],
+            "attendee_id": row[4], "name": row[5], "contact": row[6]}
+
+
+# Commands that write: the models are imported when they run
+
+def _load_models():
+    """Import the mapped classes together so their relationships resolve"""
+    from models.event import Event
+    from models.attendee import Attendee
+    from models.ticket import Ticket
+    return Event, Attendee, Ticket
+
+
+def events_create(args):
+    Event, _, _ = _load_models()
+    if not args.name.strip():
+        raise ValueError("Event name cannot be empty")
+    if not args.location.strip():
+        raise ValueError("Event location cannot be empty")
+    try:
+        event_date = datetime.strptime(args.date, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    if event_date < datetime.now().date():
+        raise ValueError("Event date cannot be in the past")
+    if args.capacity <= 0:
+        raise ValueError("Capacity must be a positive number")
+    event = Event.create(args.name.strip(), args.location.strip(), event_date, args.capacity)
+    return _event_json(_event_row(event))
+
+
+def events_purge(args):
+    Event, _, _ = _load_models()
+    try:
+        before = datetime.strptime(args.before, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    if args.batch_size <= 0:
+        raise ValueError("Batch size must be a positive number")
+    return {"before": before.isoformat(), "purged": Event.purge_before(before, args.batch_size)}
+
+
+def ticket_book(args):
+    from models import unit_of_work
+    _, Attendee, Ticket = _load_models()
+    if not args.name.strip():
+        raise ValueError("Attendee name cannot be empty")
+    if not args.contact.strip():
+        raise ValueError("Attendee contact cannot be empty")
+    with unit_of_work():
+        attendee = Attendee.find_by_contact(args.contact.strip())
+        new_attendee = attendee is None
+        if new_attendee:
+            attendee = Attendee.create(args.name.strip(), args.contact.strip())
+        ticket = Ticket.create(args.event_id, attendee.id)
+    return {"ticket_id": ticket.id, "event_id": ticket.event_id, "attendee_id": attendee.id,
+            "name": attendee.name, "contact": attendee.contact, "new_attendee": new_attendee,
+            "booked_at": _timestamp(ticket.booked_at)}
+
+
+def ticket_group(args):
+    _, _, Ticket = _load_models()
+    with open(args.path, newline="") as f:
+        attendees = [(row[0], row[1] if len(row) > 1 else "") for row in csv.reader(f) if row]
+    tickets = Ticket.create_many(args.event_id, attendees)
+    return {"event_id": args.event_id, "ticket_ids": [ticket.id for ticket in tickets]}
+
+
+def ticket_cancel(args):
+    _, _, Ticket = _load_models()
+    ticket = Ticket.find_by_id(args.ticket_id)
+    if not ticket:
+        raise ValueError("Ticket not found")
+    promoted = ticket.delete()
+    result = {"ticket_id": ticket.id, "event_id": ticket.event_id, "cancelled": True}
+    if promoted:
+        # The seat went to the head of the event's waitlist
+        result["promoted"] = {"ticket_id": promoted.id, "attendee_id": promoted.attendee_id}
+    return result
+
+
+def ticket_hold(args):
+    from models import unit_of_work
+    from models.seat_hold import SeatHold, DEFAULT_HOLD_TTL
+    _, Attendee, _ = _load_models()
+    if not args.name.strip():
+        raise ValueError("Attendee name cannot be empty")
+    if not args.contact.strip():
+        raise ValueError("Attendee contact cannot be empty")
+    with unit_of_work():
+        attendee = Attendee.find_by_contact(args.contact.strip())
+        if attendee is None:
+            attendee = Attendee.create(args.name.strip(), args.contact.strip())
+        hold = SeatHold.hold(args.event_id, attendee.id, args.ttl or DEFAULT_HOLD_TTL)
+    return {"hold_id": hold.id, "event_id": hold.event_id, "attendee_id": attendee.id,
+            "expires_at": _timestamp(hold.expires_at)}
+
+
+def ticket_confirm(args):
+    from models.seat_hold import SeatHold
+    _load_models()
+    ticket = SeatHold.confirm(args.hold_id)
+    return {"ticket_id": ticket.id, "event_id": ticket.event_id, "attendee_id": ticket.attendee_id,
+            "booked_at": _timestamp(ticket.booked_at)}
+
+
+def holds_sweep(args):
+    from models.seat_hold import SeatHold
+    _load_models()
+    return {"reclaimed": SeatHold.release_expired()}
+
+
+def flash_recover(args):
+    from models.flash_sale import FlashSale
+    _load_models()
+    tickets_sold, seats_held = FlashSale.recover(args.event_id, force=args.force)
+    return {"event_id": args.event_id, "tickets_sold": tickets_sold, "seats_held": seats_held}
+
+
+def stats_rebuild(args):
+    from models.booking_stats import HourlyBookingStats
+    _load_models()
+    return {"event_id": args.event, "hourly_rows": HourlyBookingStats.rebuild(args.event)}
+
+
+def import_data(args):
+    from importer import import_file
+    report = import_file(args.kind, args.path, args.chunk_size, args.rejects, args.restart)
+    return {
+        "kind": report.kind, "path": report.path, "already_imported": report.already_finished,
+        "resumed_from": report.resumed_from, "rows_read": report.rows_read, "imported": report.imported,
+        "duplicates": report.duplicates, "rejected": report.rejected,
+        "rejected_rows": [{"line": line_no, "error": message} for line_no, message in report.rejected_rows],
+        "seconds": round(report.elapsed, 3),
+    }
+
+
+def export_manifest(args):
+    from exporter import export_event, export_all_events
+    if args.event_id == "all":
+        results = export_all_events(args.path, args.format or "csv", args.workers)
+        return [{"event_id": event_id, "path": path, "rows": rows} for event_id, path, rows, _ in results]
+    try:
+        event_id = int(args.event_id)
+    except ValueError:
+        raise ValueError("Event ID must be a valid number")
+    Event, _, _ = _load_models()
+    # Checked first, so a typo'd id leaves no header-only file behind
+    if not Event.find_by_id(event_id):
+        raise ValueError("Event not found")
+    return {"event_id": event_id, "path": args.path, "rows": export_event(event_id, args.path, args.format)}
+
+
+def migrate(args):
+    path = settings.sqlite_path()
+    before = stored_revision(path)
+    if args.check:
+        if before != settings.SCHEMA_REVISION:
+            # Reported as an error so cron and deploy scripts can test the exit status
+            raise ValueError(f"Schema is at {before or 'no revision'}, expected {settings.SCHEMA_REVISION}")
+        return {"revision": before, "current": True}
+    from models.schema import migrate as migrate_schema
+    before, after = migrate_schema()
+    return {"from": before, "to": after, "migrated": before != after}
+
+
+def _add_paging(parser):
+    parser.add_argument("--after", type=int, help="start after this id")
+    parser.add_argument("--before", type=int, help="the page before this id")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Event Ticketing System (run without arguments for the menu)")
+    parser.add_argument("--pretty", action="store_true", help="indent the JSON output")
+    parser.add_argument("--trace-sql", action="store_true", help="print the SQL trace of a write command to stderr")
+    parser.add_argument("--trace-json", metavar="PATH", help="save the SQL trace of a write command as JSON")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    events = groups.add_parser("events", aliases=["event"], help="list, show, create and purge events")
+    commands = events.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("list", help="one page of events in id order")
+    _add_paging(command)
+    command.add_argument("--location")
+    command.set_defaults(read=events_list)
+    command = commands.add_parser("show", help="one event with its availability")
+    command.add_argument("event_id", type=int)
+    command.set_defaults(read=events_show)
+    command = commands.add_parser("attendees", help="one page of an event's tickets and attendees")
+    command.add_argument("event_id", type=int)
+    _add_paging(command)
+    command.set_defaults(read=events_attendees)
+    command = commands.add_parser("create", help="create an event")
+    command.add_argument("--name", required=True)
+    command.add_argument("--location", required=True)
+    command.add_argument("--date", required=True, help="YYYY-MM-DD")
+    command.add_argument("--capacity", type=int, required=True)
+    command.set_defaults(write=events_create)
+    command = commands.add_parser("purge", help="delete every event dated before a day, with its tickets")
+    command.add_argument("--before", required=True, help="YYYY-MM-DD")
+    command.add_argument("--batch-size", type=int, default=1000, help="events deleted per transaction")
+    command.set_defaults(write=events_purge)
+
+    attendees = groups.add_parser("attendee", aliases=["attendees"], help="list and show attendees")
+    commands = attendees.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("list", help="one page of attendees with their ticket counts")
+    _add_paging(command)
+    command.add_argument("--name-prefix")
+    command.set_defaults(read=attendees_list)
+    command = commands.add_parser("show", help="one attendee with their tickets")
+    command.add_argument("attendee_id", type=int)
+    command.set_defaults(read=attendee_show)
+
+    tickets = groups.add_parser("ticket", aliases=["tickets"], help="book, cancel and show tickets")
+    commands = tickets.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("show", help="one ticket")
+    command.add_argument("ticket_id", type=int)
+    command.set_defaults(read=ticket_show)
+    command = commands.add_parser("book", help="book a ticket, creating the attendee if needed")
+    command.add_argument("event_id", type=int)
+    command.add_argument("--name", required=True)
+    command.add_argument("--contact", required=True, help="email or phone")
+    command.set_defaults(write=ticket_book)
+    command = commands.add_parser("group", help="book every name,contact row of a CSV file, all or nothing")
+    command.add_argument("event_id", type=int)
+    command.add_argument("path")
+    command.set_defaults(write=ticket_group)
+    command = commands.add_parser("cancel", help="cancel a ticket")
+    command.add_argument("ticket_id", type=int)
+    command.set_defaults(write=ticket_cancel)
+    command = commands.add_parser("hold", help="hold a seat for a checkout, creating the attendee if needed")
+    command.add_argument("event_id", type=int)
+    command.add_argument("--name", required=True)
+    command.add_argument("--contact", required=True, help="email or phone")
+    command.add_argument("--ttl", type=int, help="seconds before the hold expires")
+    command.set_defaults(write=ticket_hold)
+    command = commands.add_parser("confirm", help="turn a seat hold into a ticket")
+    command.add_argument("hold_id", type=int)
+    command.set_defaults(write=ticket_confirm)
+
+    command = groups.add_parser("holds", help="reclaim expired seat holds (for a cron job)")
+    command.add_argument("action", choices=("sweep",))
+    command.set_defaults(write=holds_sweep)
+
+    command = groups.add_parser("flash", help="reconcile an event after a flash sale died")
+    command.add_argument("action", choices=("recover",))
+    command.add_argument("event_id", type=int)
+    command.add_argument("--force", action="store_true",
+                         help="recover even though the sale's recorded process id is running")
+    command.set_defaults(write=flash_recover)
+
+    command = groups.add_parser("stats", help="backfill the hourly booking stats from the tickets table")
+    command.add_argument("action", choices=("rebuild",))
+    command.add_argument("--event", type=int, help="only this event (default: all)")
+    command.set_defaults(write=stats_rebuild)
+
+    command = groups.add_parser("import", help="import events or attendees from CSV/JSONL")
+    command.add_argument("kind", choices=("events", "attendees"))
+    command.add_argument("path")
+    command.add_argument("--chunk-size", type=int, default=1000)
+    command.add_argument("--rejects", help="append rejected rows to this CSV file")
+    command.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    command.set_defaults(write=import_data)
+
+    command = groups.add_parser("export", help="export attendee manifests")
+    command.add_argument("event_id", help="event id, or 'all'")
+    command.add_argument("path", help="output file, or a directory for 'all'")
+    command.add_argument("--format", choices=("csv", "jsonl"))
+    command.add_argument("--workers", type=int)
+    command.set_defaults(write=export_manifest)
+
+    command = groups.add_parser("migrate", help="upgrade the database schema to the current revision")
+    command.add_argument("--check", action="store_true", help="only report whether the schema is current")
+    command.set_defaults(write=migrate, skip_schema_check=True)
+    return parser
+
+
+def run(argv=None):
+    """Run one subcommand and print its JSON result; returns the exit status"""
+    args = build_parser().parse_args(argv)
+    try:
+        path = None if getattr(args, "skip_schema_check", False) else ensure_schema()
+        if hasattr(args, "read"):
+            connection = _read_only(path)
+            try:
+                result = args.read(connection, args)
+            finally:
+                connection.close()
+        elif args.trace_sql or args.trace_json:
+            from models.instrumentation import sql_trace
+            sql_trace.enable()
+            try:
+                with sql_trace.action(args.write.__name__) as trace:
+                    result = args.write(args)
+            finally:
+                if args.trace_sql:
+                    print(trace.summary(), file=sys.stderr)
+                if args.trace_json:
+                    sql_trace.export(args.trace_json)
+        else:
+            result = args.write(args)
+        status = 0
+    except Exception as e:
+        result = {"error": str(e)}
+        errors = getattr(e, "errors", None)
+        if errors:
+            result["rows"] = [{"row": row, "error": message} for row, message in errors]
+        status = 1
+    json.dump(result, sys.stdout, indent=2 if args.pretty else None)
+    sys.stdout.write("\n")
+    return status
@@ -0,0 +1,129 @@
+"""Streaming attendee manifest (door list) export.
+
+Tickets and attendees are read as plain column tuples in batches
+(yield_per), never as ORM objects, and written straight to the output file,
+so memory stays flat however large the event is.
+
+    python exporter.py event 5 door_list.csv
+    python exporter.py all exports/ --format jsonl --workers 4
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select
+
+from models import get_session
+from models.event import Event
+from models.attendee import Attendee
+from models.ticket import Ticket
+
+MANIFEST_COLUMNS = ("ticket_id", "attendee_id", "name", "contact", "booked_at")
+DEFAULT_BATCH_SIZE = 1000
+FORMATS = ("csv", "jsonl")
+
+
+def stream_manifest(event_id, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield (ticket_id, attendee_id, name, contact, booked_at) for an event, in ticket order"""
+    session = get_session()
+    try:
+        rows = session.execute(
+            select(Ticket.id, Attendee.id, Attendee.name, Attendee.contact, Ticket.booked_at)
+            .join(Attendee, Ticket.attendee_id == Attendee.id)
+            .where(Ticket.event_id == event_id)
+            .order_by(Ticket.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            yield tuple(row)
+    finally:
+        session.close()
+
+
+def _format_for(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError("Export format must be csv or jsonl")
+    return fmt
+
+
+def export_event(event_id, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Write one event's manifest to path as CSV or JSONL; returns the number of rows"""
+    fmt = _format_for(path, fmt)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(MANIFEST_COLUMNS)
+            for row in stream_manifest(event_id, batch_size):
+                writer.writerow(row[:4] + (row[4].strftime("%Y-%m-%d %H:%M:%S") if row[4] else "",))
+                count += 1
+        else:
+            for row in stream_manifest(event_id, batch_size):
+                record = dict(zip(MANIFEST_COLUMNS, row))
+                record["booked_at"] = row[4].isoformat() if row[4] else None
+                f.write(json.dumps(record) + "\n")
+                count += 1
+    return count
+
+
+def _export_worker(args):
+    event_id, path, fmt = args
+    started = time.perf_counter()
+    return event_id, path, export_event(event_id, path, fmt), time.perf_counter() - started
+
+
+def _reset_engine():
+    # Forked workers must open their own connections
+    from models import engine
+    engine.dispose(close=False)
+
+
+def export_all_events(directory, fmt="csv", workers=None):
+    """Export every event to <directory>/event_<id>.<fmt>, several events at a time
+
+    Returns a list of (event_id, path, rows, seconds), one per event.
+    """
+    fmt = _format_for("", fmt)
+    os.makedirs(directory, exist_ok=True)
+    session = get_session()
+    try:
+        event_ids = session.execute(select(Event.id).order_by(Event.id)).scalars().all()
+    finally:
+        session.close()
+    jobs = [(event_id, os.path.join(directory, f"event_{event_id}.{fmt}"), fmt) for event_id in event_ids]
+    if not jobs:
+        return []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_reset_engine) as pool:
+        return list(pool.map(_export_worker, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export attendee manifests to CSV/JSONL")
+    commands = parser.add_subparsers(dest="command", required=True)
+    one = commands.add_parser("event", help="export one event")
+    one.add_argument("event_id", type=int)
+    one.add_argument("path", help="output file ending in .csv or .jsonl")
+    every = commands.add_parser("all", help="export every event to its own file")
+    every.add_argument("directory")
+    every.add_argument("--format", choices=FORMATS, default="csv")
+    every.add_argument("--workers", type=int, default=None, help="parallel processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "event":
+        rows = export_event(args.event_id, args.path)
+        print(f"Exported {rows} attendees to {args.path}")
+    else:
+        results = export_all_events(args.directory, args.format, args.workers)
+        rows = sum(result[2] for result in results)
+        print(f"Exported {len(results)} events ({rows} attendees) to {args.directory}")
+    elapsed = time.perf_counter() - started
+    print(f"Throughput: {rows / elapsed if elapsed else 0:,.0f} rows/s in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
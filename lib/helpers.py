@@ -1,8 +1,13 @@
 from models.event import Event
 from models.attendee import Attendee
-from models.ticket import Ticket
+from models.ticket import Ticket, GroupBookingError
+from models.waitlist import WaitlistEntry
+from models.booking_stats import HourlyBookingStats
 from datetime import datetime
-from models import SessionLocal
+import csv
+from models import unit_of_work, DEFAULT_PAGE_SIZE
+from importer import import_file, DEFAULT_CHUNK_SIZE
+from exporter import export_event, export_all_events
 from sqlalchemy.orm import joinedload
 
 
@@ -13,6 +18,111 @@ def exit_program():
     exit()
 
 
+def browse_pages(fetch_page, show_page, by_date=False):
+    """Show rows a page at a time until the user is done
+
+    fetch_page(after_id=..., before_id=...) returns one page of rows in id
+    order, or in (date, id) order with by_date, where it must also take
+    from_id to start a page at a given event. Every page is a keyset query,
+    so paging deep into a large table is as fast as the first page. Returns
+    False if there was nothing to show.
+    """
+    def fetch_and_show(**bounds):
+        # The page query and whatever its display loads share one session
+        with unit_of_work():
+            page = fetch_page(**bounds)
+            if page:
+                show_page(page)
+            return page
+
+    rows = fetch_and_show()
+    if not rows:
+        return False
+
+    while True:
+        choice = input("\n[n]ext  [p]revious  [j]ump to ID  [Enter] done: ").strip().lower()
+        if not choice or choice == "q":
+            return True
+        if choice == "n":
+            page = fetch_and_show(after_id=rows[-1].id)
+        elif choice == "p":
+            page = fetch_and_show(before_id=rows[0].id)
+        elif choice == "j":
+            jump_str = input("Jump to ID: ").strip()
+            if not jump_str.isdigit():
+                print("ID must be a valid number")
+                continue
+            if by_date:
+                # Ids are not in date order; start at the event's own (date, id)
+                page = fetch_and_show(from_id=int(jump_str))
+            else:
+                page = fetch_and_show(after_id=int(jump_str) - 1)
+            if not page:
+                print("Nothing to show from that ID.")
+                continue
+        else:
+            print("Invalid choice!")
+            continue
+
+        if page:
+            rows = page
+        else:
+            print("No more rows in that direction.")
+
+
+def read_date(prompt):
+    """Ask for a YYYY-MM-DD date"""
+    try:
+        return datetime.strptime(input(prompt).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+
+
+def print_events_page(events):
+    print("-" * 107)
+    print(f"{'ID':<4} {'Name':<25} {'Location':<20} {'Date':<12} {'Capacity':<10} {'Booked':<8} {'Held':<6} {'Available':<10}")
+    print("-" * 107)
+    for event in events:
+        booked_tickets = event.tickets_sold
+        # Seats held by checkouts in progress are not available
+        available_spots = event.available_spots()
+        date_str = event.date.strftime(
+            "%Y-%m-%d") if hasattr(event.date, "strftime") else str(event.date)
+        print(
+            f"{event.id:<4} {event.name[:24]:<25} {event.location[:19]:<20} {date_str:<12} {event.capacity:<10} {booked_tickets:<8} {event.seats_held:<6} {available_spots:<10}")
+    print("-" * 107)
+
+
+def print_event_choices(events):
+    print("-" * 60)
+    for event in events:
+        print(f"ID: {event.id} | {event.name} | Attendees: {event.tickets_sold}")
+    print("-" * 60)
+
+
+def print_tickets_page(tickets):
+    print("-" * 80)
+    print(f"{'Ticket ID':<10} {'Name':<25} {'Contact':<25} {'Booked At':<20}")
+    print("-" * 80)
+    for ticket in tickets:
+        booked_at_str = ticket.booked_at.strftime('%Y-%m-%d %H:%M:%S')
+        print(
+            f"{ticket.id:<10} {ticket.attendee.name[:24]:<25} {ticket.attendee.contact[:24]:<25} {booked_at_str:<20}")
+    print("-" * 80)
+
+
+def print_attendees_page(attendees):
+    # One grouped count for the whole page instead of a query per attendee
+    events_counts = Ticket.count_by_attendee([attendee.id for attendee in attendees])
+    print("-" * 80)
+    print(f"{'ID':<4} {'Name':<25} {'Contact':<25} {'Events Registered':<20}")
+    print("-" * 80)
+    for attendee in attendees:
+        print(
+            f"{attendee.id:<4} {attendee.name[:24]:<25} {attendee.contact[:24]:<25} {events_counts[attendee.id]:<20}")
+    print("-" * 80)
+
+
 def create_event_menu():
     print("\n" + "="*40)
     print("         CREATE NEW EVENT")
@@ -79,29 +189,12 @@ def book_ticket_menu():
 
     try:
         # Show available events first
-        events = Event.get_all()
-        if not events:
+        print("\nUpcoming Events:")
+        if not browse_pages(Event.upcoming, print_events_page, by_date=True):
             print("No events available!")
             input("Press Enter to continue...")
             return
 
-        print("\nAvailable Events:")
-        print("-" * 100)
-        print(f"{'ID':<4} {'Name':<25} {'Location':<20} {'Date':<12} {'Capacity':<10} {'Booked':<8} {'Available':<10}")
-        print("-" * 100)
-        for event in events:
-            # Get ticket count for this event
-            event_tickets = Ticket.get_tickets_for_event(event.id)
-            booked_tickets = len(event_tickets)
-            available_spots = event.capacity - booked_tickets
-            date_str = event.date.strftime(
-                "%Y-%m-%d") if hasattr(event.date, "strftime") else str(event.date)
-
-            print(
-                f"{event.id:<4} {event.name[:24]:<25} {event.location[:19]:<20} {date_str:<12} {event.capacity:<10} {booked_tickets:<8} {available_spots:<10}")
-
-        print("-" * 100)
-
         # Get event ID
         event_id_str = input("\nEnter Event ID: ").strip()
         if not event_id_str:
@@ -117,8 +210,15 @@ def book_ticket_menu():
         if not event:
             raise ValueError("Event not found")
 
+        join_waitlist = False
+        if event.is_full():
+            join = input(f"\n'{event.name}' is full. Join the waitlist instead? (yes/no): ").strip().lower()
+            if join not in ['yes', 'y']:
+                raise ValueError("Event is at full capacity")
+            join_waitlist = True
+
         # Get attendee details
-        print(f"\nBooking ticket for: {event.name}")
+        print(f"\n{'Joining the waitlist' if join_waitlist else 'Booking ticket'} for: {event.name}")
         attendee_name = input("Attendee name: ").strip()
         if not attendee_name:
             raise ValueError("Attendee name cannot be empty")
@@ -127,16 +227,29 @@ def book_ticket_menu():
         if not attendee_contact:
             raise ValueError("Attendee contact cannot be empty")
 
-        # Create or find attendee
-        attendee = Attendee.find_by_contact(attendee_contact)
-        if not attendee:
-            attendee = Attendee.create(attendee_name, attendee_contact)
+        # Find or create the attendee and book in one transaction, so a
+        # refused booking does not leave a new attendee behind
+        with unit_of_work():
+            attendee = Attendee.find_by_contact(attendee_contact)
+            is_new_attendee = attendee is None
+            if is_new_attendee:
+                attendee = Attendee.create(attendee_name, attendee_contact)
+            if join_waitlist:
+                entry = WaitlistEntry.join(event_id, attendee.id)
+                position = entry.position()
+            else:
+                ticket = Ticket.create(event_id, attendee.id)
+
+        if is_new_attendee:
             print(f"New attendee created: {attendee.name}")
         else:
             print(f"Found existing attendee: {attendee.name}")
 
-        # Create ticket
-        ticket = Ticket.create(event_id, attendee.id)
+        if join_waitlist:
+            print(f"\n{attendee.name} is number {position} on the waitlist for {event.name}.")
+            print("A ticket is booked automatically when a seat is cancelled.")
+            input("\nPress Enter to continue...")
+            return
 
         print(f"\nTicket booked successfully!")
         print(f"Ticket ID: {ticket.id}")
@@ -153,6 +266,121 @@ def book_ticket_menu():
     input("\nPress Enter to continue...")
 
 
+def book_group_menu():
+    print("\n" + "="*40)
+    print("        BOOK GROUP TICKETS")
+    print("="*40)
+
+    try:
+        event_id_str = input("Enter Event ID: ").strip()
+        if not event_id_str:
+            raise ValueError("Event ID cannot be empty")
+
+        try:
+            event_id = int(event_id_str)
+        except ValueError:
+            raise ValueError("Event ID must be a valid number")
+
+        event = Event.find_by_id(event_id)
+        if not event:
+            raise ValueError("Event not found")
+        print(f"\nBooking group for: {event.name} ({event.available_spots()} spots available)")
+
+        # Attendees come from a CSV file (name,contact per row) or are typed in
+        csv_path = input("CSV file with name,contact rows (leave blank to type them): ").strip()
+        if csv_path:
+            with open(csv_path, newline="") as f:
+                attendees = [(row[0], row[1] if len(row) > 1 else "") for row in csv.reader(f) if row]
+        else:
+            print("Enter one attendee per line as: name, contact (blank line to finish)")
+            attendees = []
+            while True:
+                line = input(f"{len(attendees) + 1}: ").strip()
+                if not line:
+                    break
+                name, _, contact = line.partition(",")
+                attendees.append((name, contact))
+
+        tickets = Ticket.create_many(event_id, attendees)
+        print(f"\n{len(tickets)} tickets booked successfully!")
+        print(f"Ticket IDs: {tickets[0].id} - {tickets[-1].id}")
+
+    except GroupBookingError as e:
+        print(f"\nGroup booking failed, nothing was booked: {str(e)}")
+        for row, message in e.errors:
+            print(f"  Row {row}: {message}")
+    except Exception as e:
+        print(f"\nError booking group: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def import_data_menu():
+    print("\n" + "="*40)
+    print("      IMPORT EVENTS / ATTENDEES")
+    print("="*40)
+
+    try:
+        kind = input("Import what? (events/attendees): ").strip().lower()
+        if kind not in ("events", "attendees"):
+            raise ValueError("Choose events or attendees")
+
+        path = input("CSV or JSONL file path: ").strip()
+        if not path:
+            raise ValueError("File path cannot be empty")
+
+        chunk_str = input(f"Chunk size (default {DEFAULT_CHUNK_SIZE}): ").strip()
+        try:
+            chunk_size = int(chunk_str) if chunk_str else DEFAULT_CHUNK_SIZE
+        except ValueError:
+            raise ValueError("Chunk size must be a valid number")
+
+        # An interrupted import resumes from its checkpoint when run again
+        print(f"\n{import_file(kind, path, chunk_size)}")
+
+    except Exception as e:
+        print(f"\nError importing data: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def export_manifest_menu():
+    print("\n" + "="*40)
+    print("      EXPORT ATTENDEE MANIFEST")
+    print("="*40)
+
+    try:
+        event_id_str = input("Event ID (or 'all' for every event): ").strip().lower()
+        if not event_id_str:
+            raise ValueError("Event ID cannot be empty")
+
+        if event_id_str == "all":
+            directory = input("Output directory: ").strip()
+            if not directory:
+                raise ValueError("Output directory cannot be empty")
+            fmt = input("Format (csv/jsonl, default csv): ").strip().lower() or "csv"
+            results = export_all_events(directory, fmt)
+            print(f"\nExported {len(results)} events "
+                  f"({sum(result[2] for result in results)} attendees) to {directory}")
+        else:
+            try:
+                event_id = int(event_id_str)
+            except ValueError:
+                raise ValueError("Event ID must be a valid number")
+            if not Event.find_by_id(event_id):
+                raise ValueError("Event not found")
+            path = input("Output file (.csv or .jsonl): ").strip()
+            if not path:
+                raise ValueError("Output file cannot be empty")
+            rows = export_event(event_id, path)
+            print(f"\nExported {rows} attendees to {path}")
+
+    except Exception as e:
+        print(f"\nError exporting manifest: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
 def cancel_ticket_menu():
     print("\n" + "="*40)
     print("         CANCEL TICKET")
@@ -185,8 +413,11 @@ def cancel_ticket_menu():
         confirm = input(
             "\nAre you sure you want to cancel this ticket? (yes/no): ").strip().lower()
         if confirm in ['yes', 'y']:
-            ticket.delete()
+            promoted = ticket.delete()
             print("\nTicket cancelled successfully!")
+            if promoted:
+                attendee = Attendee.find_by_id(promoted.attendee_id)
+                print(f"The seat went to {attendee.name} from the waitlist (Ticket ID: {promoted.id}).")
         else:
             print("\nTicket cancellation aborted.")
 
@@ -198,33 +429,36 @@ def cancel_ticket_menu():
 
 def view_events_menu():
     print("\n" + "="*40)
-    print("         ALL EVENTS")
+    print("           EVENTS")
     print("="*40)
 
     try:
-        events = Event.get_all()
-        if not events:
-            print("No events found!")
-            input("Press Enter to continue...")
-            return
-
-        print(f"\nTotal Events: {len(events)}")
-        print("-" * 100)
-        # T internally
-        print(f"{'ID':<4} {'Name':<25} {'Location':<20} {'Date':<12} {'Capacity':<10} {'Booked':<8} {'Available':<10}")
-        print("-" * 100)
-
-        for event in events:
-            # Get ticket count for this event
-            event_tickets = Ticket.get_tickets_for_event(event.id)
-            booked_tickets = len(event_tickets)
-            available_spots = event.capacity - booked_tickets
-            date_str = event.date.strftime(
-                "%Y-%m-%d") if hasattr(event.date, "strftime") else str(event.date)
-            print(
-            f"{event.id:<4} {event.name[:24]:<25} {event.location[:19]:<20} {date_str:<12} {event.capacity:<10} {booked_tickets:<8} {available_spots:<10}")
+        print("\n[Enter] upcoming  [d] one date  [r] date range  [l] venue and date range  [a] all events")
+        view = input("Show: ").strip().lower()
+        if not view:
+            fetch_page = Event.upcoming
+        elif view == "d":
+            day = read_date("Date (YYYY-MM-DD): ")
+            fetch_page = lambda **keys: Event.on_date(day, **keys)
+        elif view == "r":
+            start = read_date("From (YYYY-MM-DD): ")
+            end = read_date("To (YYYY-MM-DD): ")
+            fetch_page = lambda **keys: Event.upcoming(start, end, **keys)
+        elif view == "l":
+            location = input("Venue: ").strip()
+            if not location:
+                raise ValueError("Venue cannot be empty")
+            start = read_date("From (YYYY-MM-DD): ")
+            end = read_date("To (YYYY-MM-DD): ")
+            fetch_page = lambda **keys: Event.by_location_and_range(location, start, end, **keys)
+        elif view == "a":
+            fetch_page = Event.page
+        else:
+            raise ValueError("Invalid choice!")
 
-        print("-" * 100)
+        if browse_pages(fetch_page, print_events_page, by_date=view != "a"):
+            return
+        print("No events found!")
 
     except Exception as e:
         print(f"Error retrieving events: {str(e)}")
@@ -239,19 +473,12 @@ def view_attendees_menu():
 
     try:
         # Show available events first
-        events = Event.get_all()
-        if not events:
+        print("\nUpcoming Events:")
+        if not browse_pages(Event.upcoming, print_event_choices, by_date=True):
             print("No events available!")
             input("Press Enter to continue...")
             return
 
-        print("\nAvailable Events:")
-        print("-" * 60)
-        for event in events:
-            attendee_count = len(event.tickets)
-            print(f"ID: {event.id} | {event.name} | Attendees: {attendee_count}")
-        print("-" * 60)
-
         # Get event ID
         event_id_str = input("\nEnter Event ID: ").strip()
         if not event_id_str:
@@ -267,26 +494,18 @@ def view_attendees_menu():
         if not event:
             raise ValueError("Event not found")
 
-        # Get attendees
-        tickets = Ticket.get_tickets_for_event(event_id)
-        if not tickets:
+        if not event.tickets_sold:
             print(f"\nNo attendees registered for '{event.name}'")
             input("Press Enter to continue...")
             return
 
         print(f"\nAttendees for '{event.name}':")
-        print(f"Total Attendees: {len(tickets)}")
-        print("-" * 80)
-        print(f"{'Ticket ID':<10} {'Name':<25} {'Contact':<25} {'Booked At':<20}")
-        print("-" * 80)
-
-        for ticket in tickets:
-            booked_at_str = ticket.booked_at.strftime('%Y-%m-%d %H:%M:%S')
-
-            print(
-                f"{ticket.id:<10} {ticket.attendee.name[:24]:<25} {ticket.attendee.contact[:24]:<25} {booked_at_str:<20}")
-
-        print("-" * 80)
+        print(f"Total Attendees: {event.tickets_sold}")
+        browse_pages(
+            lambda **keys: Ticket.page(event_id=event_id, with_attendee=True, **keys),
+            print_tickets_page,
+        )
+        return
 
     except Exception as e:
         print(f"Error retrieving attendees: {str(e)}")
@@ -300,26 +519,9 @@ def view_all_attendees_menu():
     print("="*40)
 
     try:
-        attendees = Attendee.get_all()
-        if not attendees:
-            print("No attendees found!")
-            input("Press Enter to continue...")
+        if browse_pages(Attendee.page, print_attendees_page):
             return
-
-        print(f"\nTotal Attendees: {len(attendees)}")
-        print("-" * 80)
-
-        print(f"{'ID':<4} {'Name':<25} {'Contact':<25} {'Events Registered':<20}")
-        print("-" * 80)
-
-        for attendee in attendees:
-            # Get ticket count for this attendee
-            attendee_tickets = Ticket.get_tickets_for_attendee(attendee.id)
-            events_count = len(attendee_tickets)
-            print(
-                f"{attendee.id:<4} {attendee.name[:24]:<25} {attendee.contact[:24]:<25} {events_count:<20}")
-
-        print("-" * 80)
+        print("No attendees found!")
 
     except Exception as e:
         print(f"Error retrieving attendees: {str(e)}")
@@ -348,9 +550,6 @@ def find_event_menu():
             input("Press Enter to continue...")
             return
 
-        # Get ticket count for this event
-        event_tickets = Ticket.get_tickets_for_event(event.id)
-
         # Display event details
         print(f"\nEvent Found:")
         print("-" * 50)
@@ -361,10 +560,11 @@ def find_event_menu():
             "%Y-%m-%d") if hasattr(event.date, "strftime") else str(event.date)
         print(f"Date: {date_str}")
         print(f"Capacity: {event.capacity}")
-        print(f"Tickets Sold: {len(event_tickets)}")
-        print(f"Available Spots: {event.capacity - len(event_tickets)}")
+        print(f"Tickets Sold: {event.tickets_sold}")
+        print(f"Held for Checkout: {event.seats_held}")
+        print(f"Available Spots: {event.available_spots()}")
         print(
-            f"Status: {'FULL' if len(event_tickets) >= event.capacity else 'AVAILABLE'}")
+            f"Status: {'FULL' if event.is_full() else 'AVAILABLE'}")
         print("-" * 50)
 
     except Exception as e:
@@ -373,6 +573,247 @@ def find_event_menu():
     input("\nPress Enter to continue...")
 
 
+def search_events_menu():
+    print("\n" + "="*40)
+    print("          SEARCH EVENTS")
+    print("="*40)
+
+    try:
+        query = input("Search by name or location (word starts are enough): ").strip()
+        if not query:
+            raise ValueError("Search text cannot be empty")
+
+        events = Event.search(query)
+        if not events:
+            print(f"No events match '{query}'")
+        else:
+            print(f"\nBest matches for '{query}':")
+            print_events_page(events)
+            if len(events) == DEFAULT_PAGE_SIZE:
+                print(f"Showing the top {DEFAULT_PAGE_SIZE}; add words to narrow the search.")
+
+    except Exception as e:
+        print(f"Error searching events: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def print_waitlist_page(entries):
+    # Queue positions continue from the first entry of the page
+    first_position = entries[0].position()
+    print("-" * 80)
+    print(f"{'Position':<10} {'Name':<25} {'Contact':<25} {'Joined At':<20}")
+    print("-" * 80)
+    for position, entry in enumerate(entries, start=first_position):
+        joined_at_str = entry.joined_at.strftime('%Y-%m-%d %H:%M:%S')
+        print(
+            f"{position:<10} {entry.attendee.name[:24]:<25} {entry.attendee.contact[:24]:<25} {joined_at_str:<20}")
+    print("-" * 80)
+
+
+def join_waitlist_menu():
+    print("\n" + "="*40)
+    print("          JOIN WAITLIST")
+    print("="*40)
+
+    try:
+        event_id_str = input("Enter Event ID: ").strip()
+        if not event_id_str:
+            raise ValueError("Event ID cannot be empty")
+
+        try:
+            event_id = int(event_id_str)
+        except ValueError:
+            raise ValueError("Event ID must be a valid number")
+
+        event = Event.find_by_id(event_id)
+        if not event:
+            raise ValueError("Event not found")
+        if not event.is_full():
+            raise ValueError(f"'{event.name}' still has {event.available_spots()} spots; book a ticket instead")
+
+        print(f"\nJoining the waitlist for: {event.name}")
+        attendee_name = input("Attendee name: ").strip()
+        if not attendee_name:
+            raise ValueError("Attendee name cannot be empty")
+
+        attendee_contact = input("Attendee contact (email or phone): ").strip()
+        if not attendee_contact:
+            raise ValueError("Attendee contact cannot be empty")
+
+        with unit_of_work():
+            attendee = Attendee.find_by_contact(attendee_contact)
+            if attendee is None:
+                attendee = Attendee.create(attendee_name, attendee_contact)
+            entry = WaitlistEntry.join(event_id, attendee.id)
+            position = entry.position()
+
+        print(f"\n{attendee.name} is number {position} on the waitlist for {event.name}.")
+
+    except Exception as e:
+        print(f"\nError joining waitlist: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def leave_waitlist_menu():
+    print("\n" + "="*40)
+    print("          LEAVE WAITLIST")
+    print("="*40)
+
+    try:
+        event_id_str = input("Enter Event ID: ").strip()
+        if not event_id_str:
+            raise ValueError("Event ID cannot be empty")
+
+        try:
+            event_id = int(event_id_str)
+        except ValueError:
+            raise ValueError("Event ID must be a valid number")
+
+        attendee_contact = input("Attendee contact (email or phone): ").strip()
+        if not attendee_contact:
+            raise ValueError("Attendee contact cannot be empty")
+
+        attendee = Attendee.find_by_contact(attendee_contact)
+        if not attendee:
+            raise ValueError("Attendee not found")
+
+        entry = WaitlistEntry.find_by_event_and_attendee(event_id, attendee.id)
+        if not entry:
+            raise ValueError(f"{attendee.name} is not on the waitlist for this event")
+
+        entry.delete()
+        print(f"\n{attendee.name} has left the waitlist.")
+
+    except Exception as e:
+        print(f"\nError leaving waitlist: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def view_waitlist_menu():
+    print("\n" + "="*40)
+    print("          VIEW WAITLIST")
+    print("="*40)
+
+    try:
+        event_id_str = input("Enter Event ID: ").strip()
+        if not event_id_str:
+            raise ValueError("Event ID cannot be empty")
+
+        try:
+            event_id = int(event_id_str)
+        except ValueError:
+            raise ValueError("Event ID must be a valid number")
+
+        event = Event.find_by_id(event_id)
+        if not event:
+            raise ValueError("Event not found")
+
+        waiting = WaitlistEntry.count_for_event(event_id)
+        if not waiting:
+            print(f"\nNobody is waiting for '{event.name}'")
+            input("Press Enter to continue...")
+            return
+
+        print(f"\nWaitlist for '{event.name}':")
+        print(f"Total Waiting: {waiting}")
+        browse_pages(
+            lambda **keys: WaitlistEntry.page(event_id, with_attendee=True, **keys),
+            print_waitlist_page,
+        )
+        return
+
+    except Exception as e:
+        print(f"Error retrieving waitlist: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def sales_report_menu():
+    print("\n" + "="*40)
+    print("          SALES REPORT")
+    print("="*40)
+
+    try:
+        event_id_str = input("Enter Event ID (Enter for today's report across events): ").strip()
+        if not event_id_str:
+            today = datetime.utcnow().date()
+            rows = HourlyBookingStats.day_report(today)
+            if not rows:
+                print(f"\nNo bookings or cancellations on {today}")
+            else:
+                print(f"\nActivity on {today} (UTC):")
+                print("-" * 80)
+                print(f"{'ID':<6} {'Name':<35} {'Bookings':<10} {'Cancelled':<10} {'Fill Rate':<10}")
+                print("-" * 80)
+                for event_id, name, bookings, cancellations, fill_rate in rows:
+                    print(f"{event_id:<6} {name[:34]:<35} {bookings:<10} {cancellations:<10} {fill_rate:<10.0%}")
+                print("-" * 80)
+            input("\nPress Enter to continue...")
+            return
+
+        try:
+            event_id = int(event_id_str)
+        except ValueError:
+            raise ValueError("Event ID must be a valid number")
+
+        event = Event.find_by_id(event_id)
+        if not event:
+            raise ValueError("Event not found")
+
+        report = HourlyBookingStats.event_report(event_id)
+        print(f"\nSales for '{event.name}':")
+        print(f"Bookings: {report['bookings']}  Cancellations: {report['cancellations']}")
+        print(f"Fill Rate: {report['fill_rate']:.0%} ({report['tickets_sold']} of {event.capacity})")
+        if report["peak_hour"]:
+            print(f"Busiest Hour: {report['peak_hour'].strftime('%Y-%m-%d %H:00')} "
+                  f"({report['peak_hour_bookings']} bookings)")
+        print(f"Last 24 Hours: {report['bookings_per_hour_last_day']:.1f} bookings per hour")
+
+        days = HourlyBookingStats.daily(event_id)
+        if days:
+            peak = max(bookings for _, bookings, _ in days)
+            print("\nLast 30 days (UTC):")
+            print("-" * 80)
+            for day, bookings, cancellations in days:
+                bar = "#" * max(1, round(40 * bookings / peak)) if bookings else ""
+                print(f"{day} {bookings:>6} booked {cancellations:>5} cancelled  {bar}")
+            print("-" * 80)
+
+    except Exception as e:
+        print(f"Error retrieving sales report: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
+def purge_events_menu():
+    print("\n" + "="*40)
+    print("         PURGE PAST EVENTS")
+    print("="*40)
+
+    try:
+        before = read_date("Delete events dated before (YYYY-MM-DD): ")
+        events, tickets = Event.count_before(before)
+        if not events:
+            print(f"\nNo events dated before {before}")
+        else:
+            # Everything goes: tickets, holds, waitlists and sales stats
+            confirm = input(
+                f"\nDelete {events} events and their {tickets} tickets? (yes/no): ").strip().lower()
+            if confirm in ['yes', 'y']:
+                purged = Event.purge_before(before)
+                print(f"\n{purged} events deleted successfully!")
+            else:
+                print("\nPurge aborted.")
+
+    except Exception as e:
+        print(f"\nError purging events: {str(e)}")
+
+    input("\nPress Enter to continue...")
+
+
 def find_attendee_menu():
     print("\n" + "="*40)
     print("       FIND ATTENDEE BY ID")
@@ -388,19 +829,18 @@ def find_attendee_menu():
         except ValueError:
             raise ValueError("Attendee ID must be a valid number")
 
-        
-        with SessionLocal() as session:
-          attendee = session.query(Attendee).options(
-            joinedload(Attendee.tickets).joinedload(Ticket.event)
-          ).filter_by(id=attendee_id).first()
+        with unit_of_work() as session:
+            attendee = session.query(Attendee).options(
+                joinedload(Attendee.tickets).joinedload(Ticket.event)
+            ).filter_by(id=attendee_id).first()
 
         if not attendee:
             print("Attendee not found!")
             input("Press Enter to continue...")
             return
 
-        # Get tickets for this attendee
-        attendee_tickets = Ticket.get_tickets_for_attendee(attendee.id)
+        # Loaded with the attendee, events included
+        attendee_tickets = attendee.tickets
 
         # Display attendee details
         print(f"\nAttendee Found:")
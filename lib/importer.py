@@ -0,0 +1,251 @@
+"""Streaming bulk import of events and attendees from CSV or JSONL files.
+
+Rows are read one at a time, validated in chunks with the same rules as the
+models, and written with one batched INSERT per chunk. Every chunk commits
+together with its ImportCheckpoint, so an interrupted import picks up after
+the last committed chunk when it is run again.
+
+    python importer.py events events.csv --chunk-size 5000
+    python importer.py attendees people.jsonl --rejects rejected.csv
+
+CSV files need a header row (name,location,date,capacity for events and
+name,contact for attendees); JSONL files hold one object per line with the
+same keys.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from models import get_session
+from models.event import Event
+from models.attendee import Attendee
+from models.ticket import Ticket  # noqa: F401 (completes the Event/Attendee mappings)
+from models.import_checkpoint import ImportCheckpoint
+
+DEFAULT_CHUNK_SIZE = 1000
+# Rejected rows kept on the report; all of them go to the rejects file
+MAX_REPORTED_REJECTS = 20
+IN_CLAUSE_CHUNK = 500
+
+
+def read_rows(path):
+    """Yield (line number, row) from a CSV or JSONL file, one row at a time
+
+    A JSONL line that does not parse is yielded as a ValueError so it can be
+    rejected like any other bad row.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if extension in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = ValueError(f"Invalid JSON: {e.msg}")
+                yield line_no, row
+        elif extension == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            raise ValueError("Import files must be .csv or .jsonl")
+
+
+def _field(row, key):
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object with named fields")
+    value = row.get(key)
+    return "" if value is None else str(value)
+
+
+def event_values(row):
+    """Validate an event row and return the column values to insert"""
+    event = Event()
+    event.name_property = _field(row, "name")
+    location = _field(row, "location").strip()
+    if not location:
+        raise ValueError("Event location cannot be empty")
+    try:
+        date = datetime.strptime(_field(row, "date").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    try:
+        capacity = int(_field(row, "capacity"))
+    except ValueError:
+        raise ValueError("Capacity must be a valid number")
+    if capacity <= 0:
+        raise ValueError("Capacity must be a positive number")
+    return {"name": event.name_property, "location": location, "date": date, "capacity": capacity}
+
+
+def attendee_values(row):
+    """Validate an attendee row and return the column values to insert"""
+    attendee = Attendee()
+    attendee.name_property = _field(row, "name")
+    attendee.contact_property = _field(row, "contact")
+    return {"name": attendee.name_property, "contact": attendee.contact_property,
+            "contact_normalized": attendee.contact_normalized}
+
+
+def new_attendees(session, values):
+    """Drop attendees whose normalized contact repeats within the chunk or already exists"""
+    by_contact = {}
+    for row in values:
+        by_contact.setdefault(row["contact_normalized"], row)
+    contacts = list(by_contact)
+    for start in range(0, len(contacts), IN_CLAUSE_CHUNK):
+        chunk = contacts[start:start + IN_CLAUSE_CHUNK]
+        for contact in session.execute(
+            select(Attendee.contact_normalized).where(Attendee.contact_normalized.in_(chunk))
+        ).scalars():
+            by_contact.pop(contact, None)
+    return list(by_contact.values())
+
+
+IMPORTERS = {
+    "events": (Event, event_values),
+    "attendees": (Attendee, attendee_values),
+}
+
+
+class ImportReport:
+    """Counts and throughput for one import run"""
+
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.resumed_from = 0
+        self.already_finished = False
+        self.rows_read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.rejected_rows = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line_no, message):
+        self.rejected += 1
+        if len(self.rejected_rows) < MAX_REPORTED_REJECTS:
+            self.rejected_rows.append((line_no, message))
+
+    def __str__(self):
+        if self.already_finished:
+            return f"{self.path} was already imported (use restart to import it again)"
+        lines = [
+            f"Imported {self.imported} {self.kind} from {self.path}",
+            f"Rows read: {self.rows_read} (resumed after row {self.resumed_from})" if self.resumed_from
+            else f"Rows read: {self.rows_read}",
+            f"Duplicates skipped: {self.duplicates}",
+            f"Rejected: {self.rejected}",
+            f"Throughput: {self.rows_per_second:,.0f} rows/s in {self.elapsed:.2f}s",
+        ]
+        lines += [f"  line {line_no}: {message}" for line_no, message in self.rejected_rows]
+        if self.rejected > len(self.rejected_rows):
+            lines.append(f"  ... and {self.rejected - len(self.rejected_rows)} more")
+        return "\n".join(lines)
+
+
+def import_file(kind, path, chunk_size=DEFAULT_CHUNK_SIZE, rejects_path=None, restart=False):
+    """Stream a CSV/JSONL file into the events or attendees table
+
+    Memory stays bounded by chunk_size. Attendees are deduplicated by
+    contact. Rejected rows are counted on the returned ImportReport and, if
+    rejects_path is given, appended there as line,error rows.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f"Unknown import kind '{kind}' (expected events or attendees)")
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be a positive number")
+    model, validate = IMPORTERS[kind]
+    source = f"{kind}:{os.path.abspath(path)}"
+    # Resuming skips rows by count, so it only makes sense on the same file
+    file_stat = os.stat(path)
+    report = ImportReport(kind, path)
+
+    session = get_session()
+    rejects_file = open(rejects_path, "a", newline="", encoding="utf-8") if rejects_path else None
+    try:
+        rejects_writer = csv.writer(rejects_file) if rejects_file else None
+        if restart:
+            ImportCheckpoint.save(session, source, file_stat, 0)
+            session.commit()
+        rows_done, finished = ImportCheckpoint.rows_done_for(session, source, file_stat)
+        if finished:
+            report.already_finished = True
+            return report
+        report.resumed_from = rows_done
+
+        started = time.perf_counter()
+        rows = itertools.islice(read_rows(path), rows_done, None)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            values, rejected = [], []
+            for line_no, row in chunk:
+                try:
+                    values.append(validate(row))
+                except ValueError as e:
+                    rejected.append((line_no, str(e)))
+            valid = len(values)
+            if model is Attendee:
+                values = new_attendees(session, values)
+            if values:
+                session.execute(insert(model), values)
+            rows_done += len(chunk)
+            ImportCheckpoint.save(session, source, file_stat, rows_done)
+            session.commit()
+
+            # Only report a chunk once it is committed, so a resumed run
+            # does not list the same rejects twice
+            report.rows_read += len(chunk)
+            report.imported += len(values)
+            report.duplicates += valid - len(values)
+            for line_no, message in rejected:
+                report.reject(line_no, message)
+                if rejects_writer:
+                    rejects_writer.writerow([line_no, message])
+
+        ImportCheckpoint.save(session, source, file_stat, rows_done, finished=True)
+        session.commit()
+        report.elapsed = time.perf_counter() - started
+        return report
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+        if rejects_file:
+            rejects_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import events or attendees from CSV/JSONL")
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--rejects", help="append rejected rows to this CSV file")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    from models import create_tables
+    create_tables()
+    print(import_file(args.kind, args.path, args.chunk_size, args.rejects, args.restart))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,11 @@ from models import Base
 from models.event import Event
 from models.attendee import Attendee  
 from models.ticket import Ticket
+from models.import_checkpoint import ImportCheckpoint
+from models.waitlist import WaitlistEntry
+from models.seat_hold import SeatHold
+from models.flash_sale import FlashSaleReservation
+from models.booking_stats import HourlyBookingStats
 
 target_metadata = Base.metadata
 # other values from the config, defined by the needs of env.py,
@@ -0,0 +1,32 @@
+"""add tickets_sold to events
+
+Revision ID: 0beb2080dfa6
+Revises: 9157c5de6053
+Create Date: 2026-10-18 05:46:34.956955
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0beb2080dfa6'
+down_revision: Union[str, None] = '9157c5de6053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('tickets_sold', sa.Integer(), server_default='0', nullable=False))
+    # Backfill the counter from the tickets already booked
+    op.execute(
+        "UPDATE events SET tickets_sold = "
+        "(SELECT count(*) FROM tickets WHERE tickets.event_id = events.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('tickets_sold')
@@ -0,0 +1,64 @@
+"""on delete cascade for event and attendee children
+
+Revision ID: 3c9a5e17b2d4
+Revises: f29c7e1b4a86
+Create Date: 2026-10-18 15:02:44.180356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a5e17b2d4'
+down_revision: Union[str, None] = 'f29c7e1b4a86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite cannot alter a foreign key, so each child table is rebuilt. Its
+# foreign keys were created unnamed; reflection names them by this convention.
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+FOREIGN_KEYS = {
+    'tickets': [('event_id', 'events'), ('attendee_id', 'attendees')],
+    'waitlist': [('event_id', 'events'), ('attendee_id', 'attendees')],
+    'seat_holds': [('event_id', 'events'), ('attendee_id', 'attendees')],
+    'flash_sales': [('event_id', 'events')],
+    'booking_stats_hourly': [('event_id', 'events')],
+}
+
+
+def rebuild_foreign_keys(ondelete):
+    for table, keys in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, recreate='always', naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, parent in keys:
+                name = f"fk_{table}_{column}_{parent}"
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, parent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    # Foreign keys were never enforced, so rows may point at deleted parents.
+    # Orphaned tickets and holds of a live event still count in its counters.
+    orphaned_tickets = "SELECT event_id FROM tickets WHERE attendee_id NOT IN (SELECT id FROM attendees)"
+    orphaned_holds = "SELECT event_id FROM seat_holds WHERE attendee_id NOT IN (SELECT id FROM attendees)"
+    op.execute(
+        "UPDATE events SET "
+        f"tickets_sold = tickets_sold - (SELECT count(*) FROM ({orphaned_tickets}) WHERE event_id = events.id), "
+        f"seats_held = seats_held - (SELECT count(*) FROM ({orphaned_holds}) WHERE event_id = events.id) "
+        f"WHERE id IN ({orphaned_tickets} UNION {orphaned_holds})"
+    )
+    for table, keys in FOREIGN_KEYS.items():
+        orphaned = " OR ".join(f"{column} NOT IN (SELECT id FROM {parent})" for column, parent in keys)
+        op.execute(f"DELETE FROM {table} WHERE {orphaned}")
+    rebuild_foreign_keys('CASCADE')
+    # Deleting an attendee looks up their rows in these tables
+    op.create_index('ix_waitlist_attendee_id', 'waitlist', ['attendee_id'])
+    op.create_index('ix_seat_holds_attendee_id', 'seat_holds', ['attendee_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_seat_holds_attendee_id', table_name='seat_holds')
+    op.drop_index('ix_waitlist_attendee_id', table_name='waitlist')
+    rebuild_foreign_keys(None)
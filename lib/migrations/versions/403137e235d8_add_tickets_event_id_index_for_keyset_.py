@@ -0,0 +1,32 @@
+"""add tickets event_id index for keyset paging
+
+Revision ID: 403137e235d8
+Revises: 662f7ce5982d
+Create Date: 2026-10-18 05:53:31.166062
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '403137e235d8'
+down_revision: Union[str, None] = '662f7ce5982d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite appends the rowid to every index, so tickets(event_id) gives
+    # "event_id = ? AND id > ? ORDER BY id" as a pure range scan. The unique
+    # (event_id, attendee_id) index would need a sort of the whole event.
+    # 898217452911 creates the index now; this only adds it to databases
+    # that went through that revision before it did.
+    op.create_index('ix_tickets_event_id', 'tickets', ['event_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    # The index belongs to 898217452911, which drops it
+    pass
@@ -0,0 +1,34 @@
+"""add flash sales
+
+Revision ID: 5b8c3e07d2fa
+Revises: e6b0d47a9c15
+Create Date: 2026-10-18 09:12:47.190388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8c3e07d2fa'
+down_revision: Union[str, None] = 'e6b0d47a9c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'flash_sales',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('seats', sa.Integer(), nullable=False),
+        sa.Column('pid', sa.Integer(), nullable=False),
+        sa.Column('opened_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+        sa.PrimaryKeyConstraint('event_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('flash_sales')
@@ -0,0 +1,32 @@
+"""add import checkpoints
+
+Revision ID: 662f7ce5982d
+Revises: 898217452911
+Create Date: 2026-10-18 05:50:27.021034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '662f7ce5982d'
+down_revision: Union[str, None] = '898217452911'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('import_checkpoints',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('rows_done', sa.Integer(), nullable=False),
+    sa.Column('finished', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_checkpoints')
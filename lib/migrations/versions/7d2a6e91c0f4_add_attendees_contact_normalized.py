@@ -0,0 +1,94 @@
+"""add attendees contact_normalized and merge duplicate attendees
+
+Revision ID: 7d2a6e91c0f4
+Revises: c4e1a9f27b3d
+Create Date: 2026-10-18 07:05:44.902117
+
+"""
+from typing import Sequence, Union
+import logging
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a6e91c0f4'
+down_revision: Union[str, None] = 'c4e1a9f27b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+log = logging.getLogger("alembic.runtime.migration")
+
+
+def normalize_contact(contact):
+    # models.attendee.normalize_contact as of this revision
+    contact = contact.strip()
+    if "@" not in contact and re.fullmatch(r"[\+]?[0-9\s\-\(\)]+", contact):
+        digits = re.sub(r"\D", "", contact)
+        if contact.startswith("+"):
+            return "+" + digits
+        if digits.startswith("00"):
+            return "+" + digits[2:]
+        return digits
+    return contact.lower()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.add_column('attendees', sa.Column('contact_normalized', sa.String(), nullable=True))
+    bind.connection.driver_connection.create_function(
+        "normalize_contact", 1, normalize_contact, deterministic=True
+    )
+    op.execute("UPDATE attendees SET contact_normalized = normalize_contact(contact)")
+
+    # Every attendee sharing a normalized contact merges into the first one
+    # registered; their tickets move with them
+    op.execute(
+        "CREATE TEMP TABLE attendee_merges AS "
+        "SELECT attendees.id AS old_id, keep.id AS new_id FROM attendees JOIN "
+        "(SELECT contact_normalized, min(id) AS id FROM attendees GROUP BY contact_normalized "
+        "HAVING count(*) > 1) AS keep USING (contact_normalized) "
+        "WHERE attendees.id != keep.id"
+    )
+    merged = bind.exec_driver_sql("SELECT count(*) FROM attendee_merges").scalar()
+    if merged:
+        # A ticket whose event the kept attendee already holds would break the
+        # unique (event_id, attendee_id) index; OR IGNORE leaves it behind
+        op.execute(
+            "UPDATE OR IGNORE tickets SET attendee_id = "
+            "(SELECT new_id FROM attendee_merges WHERE old_id = tickets.attendee_id) "
+            "WHERE attendee_id IN (SELECT old_id FROM attendee_merges)"
+        )
+        op.execute(
+            "CREATE TEMP TABLE recount_events AS SELECT DISTINCT event_id FROM tickets "
+            "WHERE attendee_id IN (SELECT old_id FROM attendee_merges)"
+        )
+        dropped = bind.exec_driver_sql(
+            "DELETE FROM tickets WHERE attendee_id IN (SELECT old_id FROM attendee_merges)"
+        ).rowcount
+        op.execute(
+            "UPDATE events SET tickets_sold = "
+            "(SELECT count(*) FROM tickets WHERE tickets.event_id = events.id) "
+            "WHERE id IN (SELECT event_id FROM recount_events)"
+        )
+        op.execute("DELETE FROM attendees WHERE id IN (SELECT old_id FROM attendee_merges)")
+        op.execute("DROP TABLE recount_events")
+        log.info("Merged %d duplicate attendees; dropped %d tickets they held twice", merged, dropped)
+    op.execute("DROP TABLE attendee_merges")
+
+    # SQLite cannot add NOT NULL to a column in place; batch mode rebuilds the table
+    with op.batch_alter_table('attendees') as batch_op:
+        batch_op.alter_column('contact_normalized', existing_type=sa.String(), nullable=False)
+        # Lookups go by the normalized contact now
+        batch_op.drop_index('ix_attendees_contact')
+        batch_op.create_index('uq_attendees_contact_normalized', ['contact_normalized'], unique=True)
+
+
+def downgrade() -> None:
+    # Merged attendees are not split again
+    with op.batch_alter_table('attendees') as batch_op:
+        batch_op.drop_index('uq_attendees_contact_normalized')
+        batch_op.create_index('ix_attendees_contact', ['contact'])
+        batch_op.drop_column('contact_normalized')
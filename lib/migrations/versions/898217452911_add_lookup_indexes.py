@@ -0,0 +1,49 @@
+"""add lookup indexes
+
+Revision ID: 898217452911
+Revises: 0beb2080dfa6
+Create Date: 2026-10-18 05:47:43.054053
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '898217452911'
+down_revision: Union[str, None] = '0beb2080dfa6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop duplicate (event, attendee) tickets, keeping the earliest booking,
+    # so the unique index can be built
+    op.execute(
+        "DELETE FROM tickets WHERE id NOT IN "
+        "(SELECT min(id) FROM tickets GROUP BY event_id, attendee_id)"
+    )
+
+    op.create_index('uq_tickets_event_attendee', 'tickets', ['event_id', 'attendee_id'], unique=True)
+    # SQLite appends the rowid to every index, so this one also returns an
+    # event's tickets in id order without a sort
+    op.create_index('ix_tickets_event_id', 'tickets', ['event_id'])
+    op.create_index('ix_tickets_attendee_id', 'tickets', ['attendee_id'])
+    op.create_index('ix_attendees_contact', 'attendees', ['contact'])
+
+    # Recount only the events that lost duplicate tickets
+    op.execute(
+        "UPDATE events SET tickets_sold = counts.sold FROM "
+        "(SELECT event_id, count(*) AS sold FROM tickets GROUP BY event_id) AS counts "
+        "WHERE counts.event_id = events.id AND counts.sold != events.tickets_sold"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attendees_contact', table_name='attendees')
+    op.drop_index('ix_tickets_attendee_id', table_name='tickets')
+    # Missing on a database that reached this revision before it created the index
+    op.drop_index('ix_tickets_event_id', table_name='tickets', if_exists=True)
+    op.drop_index('uq_tickets_event_attendee', table_name='tickets')
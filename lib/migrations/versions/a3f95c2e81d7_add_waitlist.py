@@ -0,0 +1,39 @@
+"""add waitlist
+
+Revision ID: a3f95c2e81d7
+Revises: 7d2a6e91c0f4
+Create Date: 2026-10-18 07:48:21.306145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f95c2e81d7'
+down_revision: Union[str, None] = '7d2a6e91c0f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'waitlist',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('attendee_id', sa.Integer(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['attendee_id'], ['attendees.id'], ),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_waitlist_event_attendee', 'waitlist', ['event_id', 'attendee_id'], unique=True)
+    op.create_index('ix_waitlist_event_position', 'waitlist', ['event_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_waitlist_event_position', table_name='waitlist')
+    op.drop_index('uq_waitlist_event_attendee', table_name='waitlist')
+    op.drop_table('waitlist')
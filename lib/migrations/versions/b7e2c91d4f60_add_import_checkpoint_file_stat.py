@@ -0,0 +1,30 @@
+"""add import checkpoint file size and mtime
+
+Revision ID: b7e2c91d4f60
+Revises: 3c9a5e17b2d4
+Create Date: 2026-10-18 19:12:05.417302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c91d4f60'
+down_revision: Union[str, None] = '3c9a5e17b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Left NULL on existing checkpoints: the file they counted is unknown, so
+    # the importer will not resume from them without a restart
+    op.add_column('import_checkpoints', sa.Column('file_size', sa.Integer(), nullable=True))
+    op.add_column('import_checkpoints', sa.Column('file_mtime_ns', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('import_checkpoints', 'file_mtime_ns')
+    op.drop_column('import_checkpoints', 'file_size')
@@ -0,0 +1,53 @@
+"""add events full text search
+
+Revision ID: c4e1a9f27b3d
+Revises: 403137e235d8
+Create Date: 2026-10-18 06:40:12.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a9f27b3d'
+down_revision: Union[str, None] = '403137e235d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # External-content FTS5 index: the text stays in events, the index only
+    # holds the terms. prefix='2 3' keeps short prefix queries off a term scan.
+    op.execute(
+        "CREATE VIRTUAL TABLE events_fts USING fts5("
+        "name, location, content='events', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN "
+        "INSERT INTO events_fts(rowid, name, location) VALUES (new.id, new.name, new.location); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+        "END"
+    )
+    # Only name and location changes; bookings update tickets_sold constantly
+    op.execute(
+        "CREATE TRIGGER events_fts_update AFTER UPDATE OF name, location ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+        "INSERT INTO events_fts(rowid, name, location) VALUES (new.id, new.name, new.location); "
+        "END"
+    )
+    op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER events_fts_update")
+    op.execute("DROP TRIGGER events_fts_delete")
+    op.execute("DROP TRIGGER events_fts_insert")
+    op.execute("DROP TABLE events_fts")
@@ -0,0 +1,28 @@
+"""add events date and location-date indexes
+
+Revision ID: d81f4b6a2c37
+Revises: 5b8c3e07d2fa
+Create Date: 2026-10-18 11:02:47.318506
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f4b6a2c37'
+down_revision: Union[str, None] = '5b8c3e07d2fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Upcoming and calendar listings scan these by date instead of the whole table
+    op.create_index('ix_events_date', 'events', ['date'])
+    op.create_index('ix_events_location_date', 'events', ['location', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_location_date', table_name='events')
+    op.drop_index('ix_events_date', table_name='events')
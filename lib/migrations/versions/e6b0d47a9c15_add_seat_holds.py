@@ -0,0 +1,45 @@
+"""add seat holds and events seats_held
+
+Revision ID: e6b0d47a9c15
+Revises: a3f95c2e81d7
+Create Date: 2026-10-18 08:31:05.774210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b0d47a9c15'
+down_revision: Union[str, None] = 'a3f95c2e81d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No holds exist yet, so the counter starts at 0 everywhere
+    op.add_column('events', sa.Column('seats_held', sa.Integer(), server_default='0', nullable=False))
+    op.create_table(
+        'seat_holds',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('attendee_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['attendee_id'], ['attendees.id'], ),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_seat_holds_event_attendee', 'seat_holds', ['event_id', 'attendee_id'], unique=True)
+    op.create_index('ix_seat_holds_expires_at', 'seat_holds', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_seat_holds_expires_at', table_name='seat_holds')
+    op.drop_index('uq_seat_holds_event_attendee', table_name='seat_holds')
+    op.drop_table('seat_holds')
+    # ALTER TABLE ... DROP COLUMN (SQLite 3.35+) keeps the events_fts
+    # triggers, which a batch rebuild of events would silently drop
+    op.drop_column('events', 'seats_held')
@@ -0,0 +1,42 @@
+"""add hourly booking stats
+
+Revision ID: f29c7e1b4a86
+Revises: d81f4b6a2c37
+Create Date: 2026-10-18 13:27:09.541832
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f29c7e1b4a86'
+down_revision: Union[str, None] = 'd81f4b6a2c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'booking_stats_hourly',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('bookings', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('cancellations', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+        sa.PrimaryKeyConstraint('event_id', 'hour')
+    )
+    op.create_index('ix_booking_stats_hourly_hour', 'booking_stats_hourly', ['hour'])
+    # Backfill bookings from the existing tickets; past cancellations were never recorded
+    op.execute(
+        "INSERT INTO booking_stats_hourly (event_id, hour, bookings, cancellations) "
+        "SELECT event_id, strftime('%Y-%m-%d %H:00:00.000000', booked_at), count(*), 0 "
+        "FROM tickets GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_booking_stats_hourly_hour', table_name='booking_stats_hourly')
+    op.drop_table('booking_stats_hourly')
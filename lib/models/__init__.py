@@ -1,33 +1,196 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from contextvars import ContextVar
 import os
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
+from settings import lib_dir, db_path, DB_CONFIG_PATH, db_config, DATABASE_URL, SCHEMA_REVISION
 
-# Go up one level to lib/ director
-lib_dir = os.path.dirname(current_dir)
 
+# Engine profiles: SQLite pragmas applied to every new connection, plus pool sizing.
+# "default" keeps SQLite's stock settings (rollback journal, full sync, the
+# driver's 5 s lock timeout).
+ENGINE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    # WAL lets readers run alongside the single writer, and busy_timeout makes
+    # writers queue for the lock instead of failing with "database is locked"
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -65536,       # 64 MiB
+            "mmap_size": 268435456,     # 256 MiB
+            "temp_store": "MEMORY",
+            "busy_timeout": 10000,
+        },
+        "pool_size": 10,
+        "max_overflow": 20,
+    },
+    # Imports and data generation: no fsync per commit, large cache. A crash
+    # can lose the last transactions, so use it for jobs that can be rerun.
+    "bulk": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "cache_size": -262144,      # 256 MiB
+            "mmap_size": 1073741824,    # 1 GiB
+            "temp_store": "MEMORY",
+            "busy_timeout": 60000,
+        },
+        "pool_size": 2,
+        "max_overflow": 0,
+    },
+}
 
-# Set database path in the lib directory
-db_path = os.path.join(lib_dir, "event_ticketing.db")
-DATABASE_URL = f"sqlite:///{db_path}"
+# EVENT_TICKETING_DB_PROFILE wins over the config file
+DB_PROFILE = os.environ.get("EVENT_TICKETING_DB_PROFILE") or db_config.get(
+    "database", "profile", fallback="default")
+if DB_PROFILE not in ENGINE_PROFILES:
+    raise ValueError(f"Unknown database profile '{DB_PROFILE}' (choose from {', '.join(ENGINE_PROFILES)})")
+
+# Every profile enforces foreign keys: deleting an event or attendee relies on
+# ON DELETE CASCADE to remove its tickets, holds and waitlist entries
+SQLITE_PRAGMAS = {"foreign_keys": "ON", **ENGINE_PROFILES[DB_PROFILE]["pragmas"]}
+if db_config.has_section("pragmas"):
+    SQLITE_PRAGMAS.update(db_config.items("pragmas"))
+
+engine_options = {}
+if ":memory:" not in DATABASE_URL:
+    engine_options["pool_size"] = db_config.getint(
+        "database", "pool_size", fallback=ENGINE_PROFILES[DB_PROFILE]["pool_size"])
+    engine_options["max_overflow"] = db_config.getint(
+        "database", "max_overflow", fallback=ENGINE_PROFILES[DB_PROFILE]["max_overflow"])
 
 
 # Create Engine
-engine =  create_engine(DATABASE_URL)
+engine =  create_engine(DATABASE_URL, **engine_options)
+
+@event.listens_for(engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the profile's pragmas to each new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+    # Let SQLAlchemy issue BEGIN itself (see begin_transaction below). This
+    # leaves raw DBAPI connections from engine.raw_connection() in autocommit
+    # mode: they must send their own BEGIN, or every statement commits alone.
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def begin_transaction(connection):
+    """Start every transaction explicitly
+
+    pysqlite only opens a transaction ahead of INSERT/UPDATE/DELETE, so a
+    SAVEPOINT issued first would open its own and its RELEASE would commit,
+    out of reach of the unit of work's rollback.
+    """
+    connection.exec_driver_sql("BEGIN")
 
 # Create base class for models
 Base = declarative_base()
 
-# Create session factory
-SessionLocal  = sessionmaker(autocommit = False, autoflush =  False, bind = engine)
+# Create session factory. Objects keep their loaded values after commit, so
+# model methods can hand them back without a refresh query.
+SessionLocal  = sessionmaker(autocommit = False, autoflush =  False, bind = engine, expire_on_commit = False)
 
 # Function to get database session
 def get_session():
     return SessionLocal()
 
+# Session of the unit of work running in this thread/task, if any
+_current_session = ContextVar("current_session", default=None)
+
+@contextmanager
+def unit_of_work():
+    """Run one user action on a single session, connection and transaction
+
+    Model methods called inside the block pick up this session instead of
+    opening their own. Their writes become savepoints of the one
+    transaction, and the objects they return stay attached, so lazy
+    relationships keep working. Commits when the block exits and rolls back
+    if it raises. A nested unit_of_work joins the outer one. Keep input()
+    prompts outside the block so no transaction waits on a user.
+    """
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+    session = SessionLocal()
+    token = _current_session.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        session.close()
+
+@contextmanager
+def read_session():
+    """Session for a model read: the unit of work's, or a private one closed afterwards"""
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@contextmanager
+def write_session():
+    """Session for a model write that must apply as one step
+
+    Inside a unit of work the write runs in a SAVEPOINT, so a failed write
+    undoes only itself. Otherwise a private session commits on success and
+    rolls back on error.
+    """
+    session = _current_session.get()
+    if session is not None:
+        with session.begin_nested():
+            yield session
+        return
+    session = SessionLocal()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+# Rows per page for the keyset-paginated listings
+DEFAULT_PAGE_SIZE = 20
+
+def keyset_page(query, id_column, after_id=None, before_id=None, limit=DEFAULT_PAGE_SIZE):
+    """Return up to `limit` rows of query in id order, after or before a known id
+
+    Each page is an index range scan that starts at the given id, so a page
+    deep into the table costs the same as the first one (OFFSET would walk
+    every skipped row).
+    """
+    if before_id is not None:
+        rows = query.filter(id_column < before_id).order_by(id_column.desc()).limit(limit).all()
+        rows.reverse()
+        return rows
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    return query.order_by(id_column).limit(limit).all()
+
 # Function to create all tables
 def create_tables():
-    """Create all tables in the database"""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """Bring the database schema up to date: create it, or migrate it if it is behind"""
+    from .schema import migrate
+    migrate()
@@ -0,0 +1,170 @@
+"""Asyncio counterparts of the model methods, on aiosqlite
+
+The same mapped classes, statements and error messages as the blocking
+methods, but every query is awaited, so an async service can keep thousands
+of clients in flight on one event loop:
+
+    from models.aio import AsyncTicket
+
+    ticket = await AsyncTicket.create(event_id, attendee_id)
+
+The async engine points at the same database as models.engine, with the same
+profile pragmas and pool sizing.
+"""
+from datetime import datetime
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import make_transient_to_detached
+from . import DATABASE_URL, engine_options, apply_sqlite_pragmas, begin_transaction
+from .cache import event_cache
+from .event import Event
+from .attendee import Attendee, normalize_contact
+from .ticket import Ticket, _BookingRefused
+from .waitlist import WaitlistEntry
+from .booking_stats import HourlyBookingStats
+
+# sqlite:///path (or sqlite+pysqlite:///path) -> sqlite+aiosqlite:///path
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="sqlite+aiosqlite")
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options)
+event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "begin", begin_transaction)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class AsyncEvent:
+    """Async versions of the Event classmethods"""
+
+    @staticmethod
+    async def create(name, location, date, capacity):
+        """Create a new event"""
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+        async with AsyncSessionLocal() as session, session.begin():
+            new_event = Event(name=name, location=location, date=date, capacity=capacity)
+            session.add(new_event)
+        return new_event
+
+    @staticmethod
+    async def get_all():
+        """Get all events"""
+        async with AsyncSessionLocal() as session:
+            return (await session.scalars(select(Event))).all()
+
+    @staticmethod
+    async def find_by_id(event_id):
+        """Find event by ID, from the event cache when it has the whole event"""
+        columns, counts = event_cache.get(event_id)
+        if columns is not None and counts is not None:
+            tickets_sold, seats_held = counts
+            cached = Event(tickets_sold=tickets_sold, seats_held=seats_held, **columns)
+            make_transient_to_detached(cached)
+            return cached
+        async with AsyncSessionLocal() as session:
+            found = await session.get(Event, event_id)
+        if found is not None:
+            event_cache.put(found)
+        return found
+
+
+class AsyncAttendee:
+    """Async versions of the Attendee classmethods"""
+
+    @staticmethod
+    async def create(name, contact):
+        """Create a new attendee"""
+        attendee = Attendee()
+        attendee.name_property = name
+        attendee.name = attendee.name_property
+        attendee.contact_property = contact
+        attendee.contact = attendee.contact_property
+        async with AsyncSessionLocal() as session, session.begin():
+            session.add(attendee)
+        return attendee
+
+    @staticmethod
+    async def get_all():
+        """Get all attendees"""
+        async with AsyncSessionLocal() as session:
+            return (await session.scalars(select(Attendee))).all()
+
+    @staticmethod
+    async def find_by_id(attendee_id):
+        """Find attendee by ID"""
+        async with AsyncSessionLocal() as session:
+            return await session.get(Attendee, attendee_id)
+
+    @staticmethod
+    async def find_by_contact(contact):
+        """Find attendee by contact information, however it is spelled"""
+        async with AsyncSessionLocal() as session:
+            return (await session.scalars(
+                select(Attendee).where(Attendee.contact_normalized == normalize_contact(contact))
+            )).first()
+
+
+class AsyncTicket:
+    """Async versions of the Ticket booking and cancel paths"""
+
+    @staticmethod
+    async def create(event_id, attendee_id):
+        """Book a ticket, with the same conditional UPDATE and INSERT ... SELECT as Ticket.create"""
+        booked_at = datetime.utcnow()
+        reclaimed = {}
+        async with AsyncSessionLocal() as session:
+            try:
+                async with session.begin():
+                    ticket_id = None
+                    counts = await session.run_sync(Ticket._take_seats, event_id, 1, reclaimed)
+                    if counts is not None:
+                        ticket_id = (await session.execute(
+                            Ticket._insert_statement(event_id, attendee_id, booked_at)
+                        )).scalar_one_or_none()
+                    if ticket_id is None:
+                        raise _BookingRefused()
+                    await session.execute(HourlyBookingStats._record_statement(event_id, booked_at, bookings=1))
+            except _BookingRefused:
+                reason = await session.run_sync(Ticket._booking_failure, event_id, attendee_id)
+                raise ValueError(reason) from None
+        reclaimed[event_id] = tuple(counts)
+        for changed_id, changed in reclaimed.items():
+            event_cache.availability_changed(changed_id, *changed)
+        ticket = Ticket(id=ticket_id, event_id=event_id, attendee_id=attendee_id, booked_at=booked_at)
+        make_transient_to_detached(ticket)
+        return ticket
+
+    @staticmethod
+    async def find_by_id(ticket_id):
+        """Find ticket by ID"""
+        async with AsyncSessionLocal() as session:
+            return await session.get(Ticket, ticket_id)
+
+    @staticmethod
+    async def get_all():
+        """Get all tickets"""
+        async with AsyncSessionLocal() as session:
+            return (await session.scalars(select(Ticket))).all()
+
+    @staticmethod
+    async def delete(ticket):
+        """Cancel a booking and give the seat back, promoting the waitlist like Ticket.delete"""
+        promoted = None
+        async with AsyncSessionLocal() as session, session.begin():
+            if not (await session.execute(delete(Ticket).where(Ticket.id == ticket.id))).rowcount:
+                raise ValueError("Ticket not found")
+            await session.execute(
+                HourlyBookingStats._record_statement(ticket.event_id, datetime.utcnow(), cancellations=1)
+            )
+            counts = (await session.execute(
+                update(Event)
+                .where(Event.id == ticket.event_id)
+                .values(tickets_sold=Event.tickets_sold - 1)
+                .returning(Event.tickets_sold, Event.seats_held)
+            )).one()
+            promotion = await session.run_sync(WaitlistEntry._promote, ticket.event_id)
+            if promotion:
+                promoted, counts = promotion
+        event_cache.availability_changed(ticket.event_id, *counts)
+        return promoted
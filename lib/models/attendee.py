@@ -1,17 +1,49 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index, select, update, delete, func
 from sqlalchemy.orm import relationship
-from . import Base, get_session
+from . import Base, read_session, write_session, keyset_page, DEFAULT_PAGE_SIZE
+from .cache import event_cache
+from .booking_stats import HourlyBookingStats
+from collections import Counter
+from datetime import datetime
 import re
 
+
+def normalize_contact(contact):
+    """The form two spellings of one contact share: digits for a phone, lowercase otherwise
+
+    " Ann@Example.com" and "ann@example.com" are one attendee, as are
+    "+254 712-345-678", "00254712345678" and "+254712345678". International
+    numbers keep their "+"; a local number is just its digits, since its
+    country is unknown. Never raises, so any lookup string can be normalized.
+    """
+    contact = contact.strip()
+    if "@" not in contact and re.fullmatch(r"[\+]?[0-9\s\-\(\)]+", contact):
+        digits = re.sub(r"\D", "", contact)
+        if contact.startswith("+"):
+            return "+" + digits
+        if digits.startswith("00"):
+            return "+" + digits[2:]
+        return digits
+    return contact.lower()
+
+
 class Attendee(Base):
     __tablename__ = 'attendees'
+    __table_args__ = (
+        # One attendee per contact, however it was typed; also the lookup index
+        Index('uq_attendees_contact_normalized', 'contact_normalized', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
+    # As entered, for display
     contact = Column(String, nullable=False)
+    # Set by contact_property; see normalize_contact
+    contact_normalized = Column(String, nullable=False)
     
     # Relationship to tickets
-    tickets = relationship("Ticket", back_populates="attendee", cascade="all, delete-orphan")
+    # The database deletes the tickets (ON DELETE CASCADE); the ORM never loads them to do it
+    tickets = relationship("Ticket", back_populates="attendee", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Attendee(id={self.id}, name='{self.name}', contact='{self.contact}')>"
@@ -53,71 +85,93 @@ class Attendee(Base):
             raise ValueError("Contact must be a valid email address or phone number")
         
         self._contact = contact_clean
+        self.contact_normalized = normalize_contact(contact_clean)
     
     # ORM Methods
     @classmethod
     def create(cls, name, contact):
         """Create a new attendee"""
-        session = get_session()
-        try:
-            attendee = cls(name=name, contact=contact)
+        attendee = cls()
+        attendee.name_property = name
+        attendee.name = attendee.name_property
+        attendee.contact_property = contact
+        attendee.contact = attendee.contact_property
+        with write_session() as session:
             session.add(attendee)
-            session.commit()
-            session.refresh(attendee)
+            session.flush()
             return attendee
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
     
     @classmethod
     def get_all(cls):
         """Get all attendees"""
-        session = get_session()
-        try:
+        with read_session() as session:
             return session.query(cls).all()
-        finally:
-            session.close()
+    
+    @classmethod
+    def page(cls, after_id=None, limit=DEFAULT_PAGE_SIZE, before_id=None, name_prefix=None):
+        """Get one page of attendees in id order, optionally by name prefix"""
+        with read_session() as session:
+            query = session.query(cls)
+            if name_prefix:
+                query = query.filter(cls.name.startswith(name_prefix, autoescape=True))
+            return keyset_page(query, cls.id, after_id, before_id, limit)
     
     @classmethod
     def find_by_id(cls, attendee_id):
         """Find attendee by ID"""
-        session = get_session()
-        try:
+        with read_session() as session:
             return session.query(cls).filter(cls.id == attendee_id).first()
-        finally:
-            session.close()
     
     @classmethod
     def find_by_contact(cls, contact):
-        """Find attendee by contact information"""
-        session = get_session()
-        try:
-            return session.query(cls).filter(cls.contact == contact).first()
-        finally:
-            session.close()
+        """Find attendee by contact information, however it is spelled"""
+        with read_session() as session:
+            return session.query(cls).filter(cls.contact_normalized == normalize_contact(contact)).first()
     
     def delete(self):
-        """Delete this attendee"""
-        session = get_session()
-        try:
-            session.delete(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        """Delete this attendee, with their tickets, holds and waitlist places
+
+        The waitlist places go first, so the seats freed here are never
+        offered back to this attendee. The attendee row goes in one DELETE by
+        id, and its tickets with it (ON DELETE CASCADE).
+        """
+        from .event import Event
+        from .ticket import Ticket
+        from .waitlist import WaitlistEntry
+        from .seat_hold import SeatHold
+        with write_session() as session:
+            session.execute(delete(WaitlistEntry).where(WaitlistEntry.attendee_id == self.id))
+            changed = SeatHold._give_back(session, Counter(session.execute(
+                delete(SeatHold).where(SeatHold.attendee_id == self.id).returning(SeatHold.event_id)
+            ).scalars()))
+            # Give back the seats of the tickets the cascade is about to remove
+            booked = select(func.count()).where(
+                Ticket.event_id == Event.id, Ticket.attendee_id == self.id
+            ).scalar_subquery()
+            counts = session.execute(
+                update(Event)
+                .where(Event.id.in_(select(Ticket.event_id).where(Ticket.attendee_id == self.id)))
+                .values(tickets_sold=Event.tickets_sold - booked)
+                .returning(Event.id, Event.tickets_sold, Event.seats_held)
+            ).all()
+            # ON DELETE CASCADE removes the tickets, in the same statement
+            session.execute(delete(Attendee).where(Attendee.id == self.id))
+            # One ticket per event at most, so each event lost one booking
+            cancelled_at = datetime.utcnow()
+            for event_id, _, _ in counts:
+                HourlyBookingStats._record(session, event_id, cancelled_at, cancellations=1)
+            # Each freed seat goes to the head of that event's waitlist
+            for event_id, tickets_sold, seats_held in counts:
+                promotion = WaitlistEntry._promote(session, event_id)
+                changed[event_id] = promotion[1] if promotion else (tickets_sold, seats_held)
+        for event_id, counts in changed.items():
+            event_cache.availability_changed(event_id, *counts)
     
     def get_events(self):
         """Get all events this attendee is registered for"""
-        session = get_session()
-        try:
-            from .event import Event
+        from .event import Event
+        with read_session() as session:
             return session.query(Event).join(Event.tickets).filter_by(attendee_id=self.id).all()
-        finally:
-            session.close()
     
     def get_tickets(self):
         """Get all tickets for this attendee"""
@@ -0,0 +1,230 @@
+"""Single-writer booking queue with group commit
+
+SQLite has one writer. When many threads call Ticket.create directly, each
+one waits for the write lock and then pays for its own commit. A
+BookingService owns the only writing thread instead: callers put book and
+cancel requests on its queue and get a Future back, and the writer applies
+them in batches, one transaction and one commit per batch:
+
+    from models.booking_service import BookingService
+
+    with BookingService() as bookings:
+        ticket = bookings.book(event_id, attendee_id).result()
+
+Each request runs through the usual model method inside the batch's unit of
+work, so it is a SAVEPOINT of its own: a refused booking undoes only itself
+and its future gets the same ValueError Ticket.create would raise. Futures
+are completed once the batch has committed. If the commit fails, every
+request in the batch fails with the same error.
+
+Other processes reach the writer over a multiprocessing Pipe: the service
+calls listen() on one end and the producer wraps the other in a
+BookingClient, which has the same book() and cancel().
+"""
+from concurrent.futures import Future
+from . import unit_of_work, db_config
+import itertools
+import queue
+import threading
+import time
+
+# Requests applied per transaction, and how long the writer waits for a
+# batch to fill once its first request has arrived. Requests that arrive
+# while a batch is being applied form the next one anyway, so a linger only
+# pays off where each commit's fsync is slow.
+#
+#   [booking_queue]
+#   batch_size = 64
+#   linger = 0
+DEFAULT_BATCH_SIZE = db_config.getint("booking_queue", "batch_size", fallback=64)
+DEFAULT_LINGER = db_config.getfloat("booking_queue", "linger", fallback=0.0)
+
+_STOP = object()
+
+
+def _book(session, event_id, attendee_id):
+    from .ticket import Ticket
+    return Ticket.create(event_id, attendee_id)
+
+
+def _cancel(session, ticket_id):
+    from .ticket import Ticket
+    ticket = session.get(Ticket, ticket_id)
+    if ticket is None:
+        raise ValueError("Ticket not found")
+    return ticket.delete()
+
+
+_HANDLERS = {"book": _book, "cancel": _cancel}
+
+
+class BookingService:
+    """A writer thread that applies queued bookings and cancellations in group commits"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, linger=DEFAULT_LINGER):
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive number")
+        self.batch_size = batch_size
+        self.linger = linger
+        self.batches = 0
+        self.applied = 0
+        self._requests = queue.Queue()
+        self._closed = False
+        # Held around the closed check and the put, so no request lands behind _STOP
+        self._submit_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._run, name="booking-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def book(self, event_id, attendee_id):
+        """Queue a booking; the Future gives the Ticket, or raises why it was refused"""
+        return self._submit("book", event_id, attendee_id)
+
+    def cancel(self, ticket_id):
+        """Queue a cancellation; the Future gives the waitlist promotion's ticket, or None"""
+        return self._submit("cancel", ticket_id)
+
+    def _submit(self, kind, *args):
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise ValueError("Booking service is closed")
+            self._requests.put((kind, args, future))
+        return future
+
+    def close(self):
+        """Apply every request already queued, then stop the writer"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(_STOP)
+        self._writer.join()
+
+    def listen(self, connection):
+        """Serve a BookingClient in another process over one end of a multiprocessing Pipe
+
+        Returns the thread reading the connection; it stops when the client
+        closes its end.
+        """
+        send_lock = threading.Lock()
+
+        def reply(tag, future):
+            error = future.exception()
+            with send_lock:
+                connection.send((tag, None if error else future.result(), error))
+
+        def serve():
+            while True:
+                try:
+                    tag, kind, args = connection.recv()
+                except EOFError:
+                    return
+                try:
+                    future = self._submit(kind, *args)
+                except ValueError as e:
+                    future = Future()
+                    future.set_exception(e)
+                future.add_done_callback(lambda done, tag=tag: reply(tag, done))
+
+        listener = threading.Thread(target=serve, name="booking-listener", daemon=True)
+        listener.start()
+        return listener
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+            self._apply(batch)
+            if stopping:
+                return
+
+    def _apply(self, batch):
+        """Run a batch in one transaction; complete the futures once it commits"""
+        # A caller may have cancelled its future while it was queued
+        batch = [request for request in batch if request[2].set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            with unit_of_work() as session:
+                for kind, args, future in batch:
+                    try:
+                        outcomes.append((future, _HANDLERS[kind](session, *args), None))
+                    except Exception as e:
+                        # Its savepoint rolled back; the rest of the batch goes on
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.applied += len(batch)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+class BookingClient:
+    """book() and cancel() for a process whose BookingService runs elsewhere"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._pending = {}
+        self._tags = itertools.count()
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, name="booking-client", daemon=True)
+        self._reader.start()
+
+    def book(self, event_id, attendee_id):
+        return self._submit("book", event_id, attendee_id)
+
+    def cancel(self, ticket_id):
+        return self._submit("cancel", ticket_id)
+
+    def _submit(self, kind, *args):
+        future = Future()
+        with self._lock:
+            tag = next(self._tags)
+            self._pending[tag] = future
+            self._connection.send((tag, kind, args))
+        return future
+
+    def close(self):
+        self._connection.close()
+
+    def _read(self):
+        while True:
+            try:
+                tag, result, error = self._connection.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(tag)
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        # The service went away: nothing still waiting will be answered
+        with self._lock:
+            waiting, self._pending = list(self._pending.values()), {}
+        for future in waiting:
+            future.set_exception(ValueError("Booking service is closed"))
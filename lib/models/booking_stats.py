@@ -0,0 +1,167 @@
+from collections import Counter
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, select, update, delete, func, literal
+from sqlalchemy.dialects.sqlite import insert
+from . import Base, read_session, write_session
+from datetime import datetime, timedelta
+
+
+class HourlyBookingStats(Base):
+    """Bookings and cancellations of one event in one hour
+
+    The booking and cancel paths upsert these rows in the same transaction
+    as the ticket they write or delete, so reports read a few rows per
+    event and day instead of aggregating the tickets table. rebuild()
+    backfills the bookings from the tickets table.
+    """
+    __tablename__ = 'booking_stats_hourly'
+    __table_args__ = (
+        # Reports across every event for one day read a range of this index
+        Index('ix_booking_stats_hourly_hour', 'hour'),
+    )
+
+    # The primary key (event_id, hour) serves one event's curve as a range scan
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    bookings = Column(Integer, nullable=False, default=0, server_default="0")
+    cancellations = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<HourlyBookingStats(event_id={self.event_id}, hour={self.hour}, bookings={self.bookings}, cancellations={self.cancellations})>"
+
+    @staticmethod
+    def _hour(moment):
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def _record_statement(cls, event_id, moment, bookings=0, cancellations=0):
+        """Upsert adding bookings and cancellations to the hour of `moment`"""
+        statement = insert(cls).values(
+            event_id=event_id, hour=cls._hour(moment), bookings=bookings, cancellations=cancellations
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[cls.event_id, cls.hour],
+            set_={
+                "bookings": cls.bookings + statement.excluded.bookings,
+                "cancellations": cls.cancellations + statement.excluded.cancellations,
+            },
+        )
+
+    @classmethod
+    def _record(cls, session, event_id, moment, bookings=0, cancellations=0):
+        """Count bookings or cancellations inside the caller's transaction"""
+        session.execute(cls._record_statement(event_id, moment, bookings, cancellations))
+
+    @classmethod
+    def _record_bookings(cls, session, event_id, booked_at_times):
+        """Count a batch of bookings, one upsert per hour they fall in"""
+        for hour, bookings in Counter(cls._hour(booked_at) for booked_at in booked_at_times).items():
+            cls._record(session, event_id, hour, bookings=bookings)
+
+    @classmethod
+    def rebuild(cls, event_id=None):
+        """Recount bookings per event and hour from the tickets table
+
+        For backfilling, or after tickets were written outside the models.
+        Cancelled tickets are gone from the tickets table, so the
+        cancellation counts are kept as recorded, and a booking that was
+        later cancelled is no longer counted. Returns the number of hourly
+        rows with bookings.
+        """
+        from .ticket import Ticket
+        # Same text as a DateTime stored by SQLAlchemy, so rebuilt rows meet recorded ones
+        hour = func.strftime('%Y-%m-%d %H:00:00.000000', Ticket.booked_at)
+        counted = select(Ticket.event_id, hour, func.count(), literal(0)).group_by(Ticket.event_id, hour)
+        reset = update(cls).values(bookings=0)
+        if event_id is not None:
+            counted = counted.where(Ticket.event_id == event_id)
+            reset = reset.where(cls.event_id == event_id)
+        statement = insert(cls).from_select(["event_id", "hour", "bookings", "cancellations"], counted)
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.event_id, cls.hour], set_={"bookings": statement.excluded.bookings}
+        )
+        with write_session() as session:
+            session.execute(reset)
+            rows = session.execute(statement).rowcount
+            session.execute(delete(cls).where(cls.bookings == 0, cls.cancellations == 0))
+        return rows
+
+    # Reports: they read only the hourly rows, and the event's own counters
+    @classmethod
+    def sales_curve(cls, event_id, days=30, until=None):
+        """(hour, bookings, cancellations) for every hour with activity in the `days` days up to `until`"""
+        until = until or datetime.utcnow()
+        with read_session() as session:
+            return session.execute(
+                select(cls.hour, cls.bookings, cls.cancellations)
+                .where(cls.event_id == event_id, cls.hour > until - timedelta(days=days), cls.hour <= until)
+                .order_by(cls.hour)
+            ).all()
+
+    @classmethod
+    def daily(cls, event_id, days=30, until=None):
+        """(day, bookings, cancellations) per day with activity, from the hourly rows"""
+        totals = {}
+        for hour, bookings, cancellations in cls.sales_curve(event_id, days, until):
+            day = totals.setdefault(hour.date(), [0, 0])
+            day[0] += bookings
+            day[1] += cancellations
+        return [(day, bookings, cancellations) for day, (bookings, cancellations) in totals.items()]
+
+    @classmethod
+    def event_report(cls, event_id, now=None):
+        """Totals, fill rate, busiest hour and the last day's bookings per hour for one event"""
+        from .event import Event
+        now = now or datetime.utcnow()
+        with read_session() as session:
+            event = session.execute(
+                select(Event.capacity, Event.tickets_sold).where(Event.id == event_id)
+            ).one_or_none()
+            if event is None:
+                raise ValueError("Event not found")
+            bookings, cancellations = session.execute(
+                select(func.coalesce(func.sum(cls.bookings), 0), func.coalesce(func.sum(cls.cancellations), 0))
+                .where(cls.event_id == event_id)
+            ).one()
+            peak = session.execute(
+                select(cls.hour, cls.bookings).where(cls.event_id == event_id)
+                .order_by(cls.bookings.desc(), cls.hour).limit(1)
+            ).one_or_none()
+            last_day = session.execute(
+                select(func.coalesce(func.sum(cls.bookings), 0))
+                .where(cls.event_id == event_id, cls.hour > now - timedelta(days=1))
+            ).scalar_one()
+        capacity, tickets_sold = event
+        return {
+            "event_id": event_id,
+            "bookings": bookings,
+            "cancellations": cancellations,
+            "tickets_sold": tickets_sold,
+            "fill_rate": tickets_sold / capacity if capacity else 0.0,
+            "peak_hour": peak[0] if peak else None,
+            "peak_hour_bookings": peak[1] if peak else 0,
+            "bookings_per_hour_last_day": last_day / 24,
+        }
+
+    @classmethod
+    def day_report(cls, day):
+        """(event_id, name, bookings, cancellations, fill rate) for every event with activity on one day"""
+        from .event import Event
+        start = datetime.combine(day, datetime.min.time())
+        with read_session() as session:
+            totals = (
+                select(cls.event_id, func.sum(cls.bookings).label("bookings"),
+                       func.sum(cls.cancellations).label("cancellations"))
+                .where(cls.hour >= start, cls.hour < start + timedelta(days=1))
+                .group_by(cls.event_id)
+                .subquery()
+            )
+            rows = session.execute(
+                select(Event.id, Event.name, totals.c.bookings, totals.c.cancellations,
+                       Event.tickets_sold, Event.capacity)
+                .join(totals, totals.c.event_id == Event.id)
+                .order_by(totals.c.bookings.desc(), Event.id)
+            ).all()
+        return [
+            (event_id, name, bookings, cancellations, tickets_sold / capacity if capacity else 0.0)
+            for event_id, name, bookings, cancellations, tickets_sold, capacity in rows
+        ]
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from sqlalchemy import event
+from . import SessionLocal, _current_session, db_config
+import os
+import threading
+import time
+
+
+class LRUCache:
+    """Bounded mapping whose entries expire after `ttl` seconds
+
+    When full, the least recently used entry makes room. Counts hits and
+    misses; an expired entry counts as a miss.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached value, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class EventCache:
+    """Read-through cache of event rows, with availability kept apart
+
+    An event's name, location, date and capacity rarely change, so they are
+    kept for `ttl` seconds. tickets_sold and seats_held change on every
+    booking and hold: the booking, hold and cancel paths write the new
+    counts through as soon as their transaction commits, and
+    `availability_ttl` only bounds how long a change made by another
+    process can go unseen. Bookings never trust the cache; the conditional
+    UPDATE in Ticket.create still decides.
+    """
+
+    def __init__(self, enabled=True, size=1024, ttl=300.0, availability_ttl=10.0):
+        self.rows = LRUCache(size, ttl)
+        self.availability = LRUCache(size, availability_ttl)
+        self.enabled = enabled
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        # Writes are not tracked while off, so start empty either way
+        self._enabled = bool(value)
+        self.clear()
+
+    def get(self, event_id):
+        """(column values, (tickets_sold, seats_held)) for an event; either part may be None
+
+        Always empty inside a unit of work, whose reads must see its own
+        uncommitted writes.
+        """
+        if not self.enabled or _current_session.get() is not None:
+            return None, None
+        columns = self.rows.get(event_id)
+        if columns is None:
+            return None, None
+        return columns, self.availability.get(event_id)
+
+    def put(self, event):
+        """Remember a loaded event (once the caller's transaction commits)"""
+        columns = {
+            "id": event.id,
+            "name": event.name,
+            "location": event.location,
+            "date": event.date,
+            "capacity": event.capacity,
+        }
+        self._after_commit(event.id, columns, (event.tickets_sold, event.seats_held))
+
+    def availability_changed(self, event_id, tickets_sold, seats_held):
+        """Write new counts through once the caller's transaction commits"""
+        self._after_commit(event_id, None, (tickets_sold, seats_held))
+
+    def invalidate(self, event_id):
+        """Forget an event once the caller's transaction commits"""
+        self._after_commit(event_id, None, None)
+
+    def _after_commit(self, event_id, columns, counts):
+        if not self.enabled:
+            return
+        session = _current_session.get()
+        if session is not None:
+            # Inside a unit of work nothing is committed yet
+            session.info.setdefault("event_cache", []).append((event_id, columns, counts))
+        else:
+            self._apply(event_id, columns, counts)
+
+    def _apply(self, event_id, columns, counts):
+        if columns is not None:
+            self.rows.put(event_id, columns)
+        if counts is not None:
+            self.availability.put(event_id, counts)
+        else:
+            self.rows.pop(event_id)
+            self.availability.pop(event_id)
+
+    def clear(self):
+        self.rows.clear()
+        self.availability.clear()
+
+    def stats(self):
+        """Hit and miss counts for rows and availability"""
+        return {
+            name: {"hits": part.hits, "misses": part.misses, "size": len(part)}
+            for name, part in (("rows", self.rows), ("availability", self.availability))
+        }
+
+    def reset_stats(self):
+        for part in (self.rows, self.availability):
+            part.hits = part.misses = 0
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_pending(session):
+    if session.in_nested_transaction():
+        return
+    for change in session.info.pop("event_cache", ()):
+        event_cache._apply(*change)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_pending(session):
+    if not session.in_nested_transaction():
+        session.info.pop("event_cache", None)
+
+
+# EVENT_TICKETING_CACHE=off wins over the config file
+#
+#   [cache]
+#   enabled = true
+#   size = 1024
+#   ttl = 300
+#   availability_ttl = 10
+_switch = os.environ.get("EVENT_TICKETING_CACHE")
+event_cache = EventCache(
+    enabled=(_switch.lower() not in ("0", "off", "false", "no")) if _switch
+    else db_config.getboolean("cache", "enabled", fallback=True),
+    size=db_config.getint("cache", "size", fallback=1024),
+    ttl=db_config.getfloat("cache", "ttl", fallback=300.0),
+    availability_ttl=db_config.getfloat("cache", "availability_ttl", fallback=10.0),
+)
@@ -1,24 +1,36 @@
-from sqlalchemy import Column, Integer, String, Date
-from sqlalchemy.orm import relationship
-from . import Base, get_session
+from sqlalchemy import Column, Integer, String, Date, DDL, Index, select, delete, text, tuple_, literal, func
+from sqlalchemy.event import listen
+from sqlalchemy.orm import relationship, make_transient_to_detached
+from . import Base, read_session, write_session, keyset_page, DEFAULT_PAGE_SIZE
+from .cache import event_cache
 from datetime import datetime
-from sqlalchemy.orm import relationship, joinedload
+import re
 
 class Event(Base):
     # Setting table name to events
     __tablename__ = 'events'
+    __table_args__ = (
+        # With the implicit rowid suffix these serve date-ordered pages as range scans
+        Index('ix_events_date', 'date'),
+        Index('ix_events_location_date', 'location', 'date'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
     location = Column(String, nullable=False)
     date = Column(Date, nullable=False)
     capacity = Column(Integer, nullable=False)
+    # Maintained by the booking and cancel paths so availability is O(1)
+    tickets_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    # Seats taken by checkout holds not yet confirmed or reclaimed (see SeatHold)
+    seats_held = Column(Integer, nullable=False, default=0, server_default="0")
 
     #Relationship to tickets
-    tickets = relationship("Ticket", back_populates="event", cascade="all, delete-orphan")
+    # The database deletes the tickets (ON DELETE CASCADE); the ORM never loads them to do it
+    tickets = relationship("Ticket", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
-        return f"<Event(id={self.id}, name='{self.name}', location='{self.location}', date='{self.date}', capacity={self.capacity})>"
+        return f"<Event(id={self.id}, name='{self.name}', location='{self.location}', date='{self.date}', capacity={self.capacity}, tickets_sold={self.tickets_sold}, seats_held={self.seats_held})>"
     
     # Property methods 
     @property
@@ -48,72 +60,249 @@ class Event(Base):
     @classmethod
     def create(cls, name, location, date, capacity):
         """Create a new event"""
-        session = get_session()
-        try:
-            # Validate date
-            if isinstance(date, str):
-                date = datetime.strptime(date, '%Y-%m-%d').date()
-            
+        # Validate date
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+
+        with write_session() as session:
             event = cls(name=name, location=location, date=date, capacity=capacity)
             session.add(event)
-            session.commit()
-            session.refresh(event)
+            session.flush()
             return event
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
 
     #  Returns all events from the database
     @classmethod
     def get_all(cls):
         """Get all events"""
-        session = get_session()
-        try:
-            from sqlalchemy.orm import joinedload
-            return session.query(cls).options(joinedload(cls.tickets)).all()
-        finally:
-            session.close()
+        with read_session() as session:
+            return session.query(cls).all()
+    
+    # Returns one page of events, for listings that must not load the whole table
+    @classmethod
+    def page(cls, after_id=None, limit=DEFAULT_PAGE_SIZE, before_id=None, location=None):
+        """Get one page of events in id order, optionally at one location"""
+        with read_session() as session:
+            query = session.query(cls)
+            if location:
+                query = query.filter(cls.location == location)
+            events = keyset_page(query, cls.id, after_id, before_id, limit)
+        # Listings warm the cache for the find and booking menus that follow
+        for event in events:
+            event_cache.put(event)
+        return events
     
+    # Date-ordered listings, so past events are never read
+    @classmethod
+    def upcoming(cls, start=None, end=None, limit=DEFAULT_PAGE_SIZE, after_id=None, before_id=None, from_id=None):
+        """Get one page of events from start (default today) to end (inclusive), soonest first"""
+        start = _as_date(start) or datetime.now().date()
+        return cls._date_page([], start, _as_date(end), after_id, before_id, limit, from_id)
+
+    @classmethod
+    def on_date(cls, day, limit=DEFAULT_PAGE_SIZE, after_id=None, before_id=None, from_id=None):
+        """Get one page of the events on one day"""
+        day = _as_date(day)
+        return cls._date_page([], day, day, after_id, before_id, limit, from_id)
+
+    @classmethod
+    def by_location_and_range(cls, location, start, end, limit=DEFAULT_PAGE_SIZE, after_id=None, before_id=None,
+                              from_id=None):
+        """Get one page of one venue's events from start to end (inclusive), soonest first"""
+        return cls._date_page([cls.location == location], _as_date(start), _as_date(end), after_id, before_id, limit,
+                              from_id)
+
+    @classmethod
+    def _date_page(cls, conditions, start, end, after_id, before_id, limit, from_id=None):
+        """Keyset page in (date, id) order between two dates, after or before a known event id
+
+        from_id starts the page at a known event itself instead of after it,
+        for jumping to an event; like after_id, the page is empty if that
+        event does not exist.
+
+        The known event's date is looked up first and the page starts from
+        (date, id) > (its date, its id), a range scan of ix_events_date (or
+        ix_events_location_date) that starts at that event however far
+        into the range it is. The range bound on that side is left out when
+        the known event is inside the range: SQLite would start the scan
+        from the range bound instead and step over every row before the
+        known one.
+        """
+        with read_session() as session:
+            forward_id = from_id if from_id is not None else after_id
+            known_id = forward_id if forward_id is not None else before_id
+            known_date = None
+            if known_id is not None:
+                known_date = session.execute(select(cls.date).where(cls.id == known_id)).scalar_one_or_none()
+                if known_date is None:
+                    return []
+                known = tuple_(literal(known_date, Date), literal(known_id))
+                if from_id is not None:
+                    conditions = [*conditions, tuple_(cls.date, cls.id) >= known]
+                elif after_id is not None:
+                    conditions = [*conditions, tuple_(cls.date, cls.id) > known]
+                else:
+                    conditions = [*conditions, tuple_(cls.date, cls.id) < known]
+            if start is not None and (forward_id is None or known_date < start):
+                conditions = [*conditions, cls.date >= start]
+            if end is not None and (forward_id is not None or known_date is None or known_date > end):
+                conditions = [*conditions, cls.date <= end]
+            query = session.query(cls).filter(*conditions)
+            if forward_id is None and before_id is not None:
+                events = query.order_by(cls.date.desc(), cls.id.desc()).limit(limit).all()
+                events.reverse()
+            else:
+                events = query.order_by(cls.date, cls.id).limit(limit).all()
+        for event in events:
+            event_cache.put(event)
+        return events
+
     # Returns a single event by its ID
     @classmethod
     def find_by_id(cls, event_id):
-        """Find event by ID"""
-        session = get_session()
-        try:
-            return session.query(cls).filter(cls.id == event_id).first()
-        finally:
-            session.close()
+        """Find event by ID, from the event cache when it has the event"""
+        event = cls._from_cache(event_id)
+        if event is not None:
+            return event
+        with read_session() as session:
+            event = session.query(cls).filter(cls.id == event_id).first()
+        if event is not None:
+            event_cache.put(event)
+        return event
+
+    @classmethod
+    def _from_cache(cls, event_id):
+        """Detached Event built from the cache, or None"""
+        columns, counts = event_cache.get(event_id)
+        if columns is None:
+            return None
+        if counts is None:
+            # The row is still fresh, only its counts need reading again
+            with read_session() as session:
+                counts = session.execute(
+                    select(cls.tickets_sold, cls.seats_held).where(cls.id == event_id)
+                ).one_or_none()
+            if counts is None:
+                event_cache.invalidate(event_id)
+                return None
+            event_cache.availability_changed(event_id, *counts)
+        tickets_sold, seats_held = counts
+        event = cls(tickets_sold=tickets_sold, seats_held=seats_held, **columns)
+        make_transient_to_detached(event)
+        return event
    
+    # Returns the events whose name or location best match the search words
+    @classmethod
+    def search(cls, query, limit=DEFAULT_PAGE_SIZE):
+        """Events matching every word of query as a prefix, best match first
+
+        Runs against the events_fts index, ranked by BM25 with name matches
+        weighted above location matches. Punctuation is ignored, so any
+        user input is safe to pass.
+        """
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        match = " ".join(f'"{word}"*' for word in words)
+        with read_session() as session:
+            # Rank inside the index first so only the top rows are joined to events
+            events = session.query(cls).from_statement(text(
+                "SELECT events.* FROM ("
+                "SELECT rowid, bm25(events_fts, 10.0, 1.0) AS score FROM events_fts "
+                "WHERE events_fts MATCH :match ORDER BY score LIMIT :limit"
+                ") AS hits JOIN events ON events.id = hits.rowid ORDER BY hits.score"
+            )).params(match=match, limit=limit).all()
+        for event in events:
+            event_cache.put(event)
+        return events
+
     # Deletes this event from the database
     def delete(self):
-        """Delete this event"""
-        session = get_session()
-        try:
-            session.delete(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        """Delete this event
+
+        One DELETE by id, whichever session loaded the event. Its tickets,
+        waitlist, seat holds, flash sale and sales stats go with it (ON
+        DELETE CASCADE).
+        """
+        with write_session() as session:
+            session.execute(delete(Event).where(Event.id == self.id))
+        event_cache.invalidate(self.id)
+
+    # Counts what purge_before would delete
+    @classmethod
+    def count_before(cls, day):
+        """(events, tickets) dated before `day`"""
+        with read_session() as session:
+            return tuple(session.execute(
+                select(func.count(), func.coalesce(func.sum(cls.tickets_sold), 0)).where(cls.date < _as_date(day))
+            ).one())
+
+    # Deletes every event dated before a day
+    @classmethod
+    def purge_before(cls, day, batch_size=1000):
+        """Delete every event dated before `day`, and everything belonging to them
+
+        Deletes up to `batch_size` events per statement, oldest first, each
+        batch in its own transaction, so bookings for other events get the
+        write lock in between. ON DELETE CASCADE removes the events'
+        tickets, holds, waitlist entries and stats. Returns the number of
+        events deleted.
+        """
+        day = _as_date(day)
+        purged = 0
+        while True:
+            oldest = select(cls.id).where(cls.date < day).order_by(cls.date, cls.id).limit(batch_size)
+            with write_session() as session:
+                event_ids = session.execute(
+                    delete(cls).where(cls.id.in_(oldest)).returning(cls.id)
+                ).scalars().all()
+            for event_id in event_ids:
+                event_cache.invalidate(event_id)
+            purged += len(event_ids)
+            if len(event_ids) < batch_size:
+                return purged
 
         # Returns all attendees for this event
     def get_attendees(self):
         """Get all attendees for this event"""
-        session = get_session()
-        try:
-            from .attendee import Attendee
+        from .attendee import Attendee
+        with read_session() as session:
             return session.query(Attendee).join(Attendee.tickets).filter_by(event_id=self.id).all()
-        finally:
-            session.close()
     # Checks if there are available spots for this event
     def available_spots(self):
-        """Get number of available spots"""
-        return self.capacity - len(self.tickets)
+        """Get number of available spots; held seats are not available"""
+        return self.capacity - self.tickets_sold - self.seats_held
     
     # Checks if the event is at full capacity
     def is_full(self):
-        """Check if event is at capacity"""
-        return len(self.tickets) >= self.capacity
\ No newline at end of file
+        """Check if event is at capacity, counting held seats"""
+        return self.tickets_sold + self.seats_held >= self.capacity
+
+
+def _as_date(value):
+    """A date from a date or a YYYY-MM-DD string; None stays None"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+# Full-text index over name and location for Event.search, for databases
+# built by create_all (migration c4e1a9f27b3d adds the same to older ones)
+EVENTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE events_fts USING fts5("
+    "name, location, content='events', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, name, location) VALUES (new.id, new.name, new.location); "
+    "END",
+    "CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+    "END",
+    # Only name and location changes; bookings update tickets_sold constantly
+    "CREATE TRIGGER events_fts_update AFTER UPDATE OF name, location ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+    "INSERT INTO events_fts(rowid, name, location) VALUES (new.id, new.name, new.location); "
+    "END",
+)
+for statement in EVENTS_FTS_DDL:
+    listen(Event.__table__, "after_create", DDL(statement))
+listen(Event.__table__, "before_drop", DDL("DROP TABLE IF EXISTS events_fts"))
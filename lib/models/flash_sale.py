@@ -0,0 +1,362 @@
+"""Flash-sale mode: seats granted from memory, tickets written in batches
+
+For an on-sale rush, even the single-statement Ticket.create queues every
+request behind the one SQLite writer. A flash sale takes the event's
+remaining seats in one UPDATE when it opens, splits them into in-process
+shards, and grants each request from memory under its shard's lock:
+
+    from models.flash_sale import FlashSale
+
+    with FlashSale.open(event_id) as sale:
+        if sale.grant(attendee_id):
+            ...  # seat granted; the ticket is written within flush_interval
+
+A background thread writes granted tickets in batches, one transaction per
+batch. The reserved seats sit in events.seats_held, so ordinary bookings
+and holds see the event as full while the sale runs, and every batch moves
+its seats from seats_held to tickets_sold. A flash_sales row records how
+many reserved seats are not tickets yet.
+
+A grant is only durable once its batch commits: if the process dies, grants
+still in memory are lost, never oversold. FlashSale.recover(event_id)
+recounts the event's counters from the tickets and seat_holds tables and
+drops the reservation; open() refuses to start over a reservation left by a
+crash until it has run. recover() in turn refuses while the process that
+opened the sale is still alive, unless forced.
+"""
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import (Column, Integer, ForeignKey, DateTime, select, insert, update, delete,
+                        exists, func, literal, values, column)
+from sqlalchemy.exc import IntegrityError
+from . import Base, write_session
+from .cache import event_cache
+from .booking_stats import HourlyBookingStats
+import os
+import threading
+
+DEFAULT_SHARDS = 8
+DEFAULT_BATCH_SIZE = 500
+# Longest a granted ticket waits in memory before its batch is written
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+
+def _pid_alive(pid):
+    """Whether a process with this id is running on this machine"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, under another user
+        return True
+    return True
+
+
+def _sale_running(event_id, pid):
+    """Whether the sale that recorded `pid` on the event's reservation can still be granting"""
+    if pid == os.getpid():
+        with FlashSale._running_lock:
+            return event_id in FlashSale._running
+    return _pid_alive(pid)
+
+
+class FlashSaleReservation(Base):
+    """Seats a running flash sale has taken from an event but not yet written as tickets"""
+    __tablename__ = 'flash_sales'
+
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    seats = Column(Integer, nullable=False)
+    pid = Column(Integer, nullable=False)
+    opened_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<FlashSaleReservation(event_id={self.event_id}, seats={self.seats}, pid={self.pid}, opened_at={self.opened_at})>"
+
+
+class _Shard:
+    """Part of the inventory with its own lock, and the attendees it has granted to"""
+
+    def __init__(self, seats):
+        self.lock = threading.Lock()
+        self.seats = seats
+        self.sold = 0
+        self.granted = set()
+        self.pending = []
+
+
+class FlashSale:
+    """An open flash sale for one event, in this process"""
+
+    # Events with a sale open in this process, so recover() can tell its own
+    # live sales from reservations this process has left behind
+    _running = set()
+    _running_lock = threading.Lock()
+
+    def __init__(self, event_id, seats, shards, batch_size, flush_interval):
+        self.event_id = event_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Spread the seats evenly; the first shards take the remainder
+        self._shards = [_Shard(seats // shards + (1 if n < seats % shards else 0)) for n in range(shards)]
+        self._open = True
+        # Set by close() alone; the writer also clears _open when it stops the sale
+        self._closed = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._error = None
+        self.persisted = 0
+        # Attendees whose grant the database refused: already ticketed, or unknown
+        self.rejected = []
+        self._persister = threading.Thread(target=self._persist_loop, name=f"flash-sale-{event_id}", daemon=True)
+        self._persister.start()
+        with FlashSale._running_lock:
+            FlashSale._running.add(event_id)
+
+    @classmethod
+    def open(cls, event_id, shards=DEFAULT_SHARDS, batch_size=DEFAULT_BATCH_SIZE,
+             flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """Reserve every seat the event has left and start selling them from memory"""
+        from .event import Event
+        with write_session() as session:
+            # Checked first: with foreign keys on, a missing event fails the flush below too
+            if not session.get(Event, event_id):
+                raise ValueError("Event not found")
+            # Written before the counts are read: it takes the write lock
+            reservation = FlashSaleReservation(event_id=event_id, seats=0, pid=os.getpid(),
+                                               opened_at=datetime.utcnow())
+            session.add(reservation)
+            try:
+                session.flush()
+            except IntegrityError:
+                raise ValueError("A flash sale is already open for this event "
+                                 "(after a crash, run FlashSale.recover first)") from None
+            event = session.get(Event, event_id, populate_existing=True)
+            reservation.seats = event.available_spots()
+            if reservation.seats <= 0:
+                raise ValueError("Event is at full capacity")
+            counts = session.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(seats_held=Event.seats_held + reservation.seats)
+                .returning(Event.tickets_sold, Event.seats_held)
+            ).one()
+            seats = reservation.seats
+        event_cache.availability_changed(event_id, *counts)
+        return cls(event_id, seats, shards, batch_size, flush_interval)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def grant(self, attendee_id):
+        """Take a seat for an attendee from memory; False if sold out or already granted
+
+        The attendee's home shard records the grant, so a repeat request is
+        refused without touching the database. The seat comes from the home
+        shard or, once that is empty, from any other. Only one shard lock is
+        held at a time.
+        """
+        if not self._open:
+            raise ValueError("Flash sale is closed")
+        home = self._shards[attendee_id % len(self._shards)]
+        with home.lock:
+            if attendee_id in home.granted:
+                return False
+            home.granted.add(attendee_id)
+        start = attendee_id % len(self._shards)
+        for offset in range(len(self._shards)):
+            shard = self._shards[(start + offset) % len(self._shards)]
+            with shard.lock:
+                # Checked again under the lock: close() takes every lock before its last flush
+                if not self._open:
+                    raise ValueError("Flash sale is closed")
+                if shard.seats:
+                    shard.seats -= 1
+                    shard.sold += 1
+                    shard.pending.append((attendee_id, datetime.utcnow()))
+                    queued = len(shard.pending)
+                    break
+        else:
+            with home.lock:
+                home.granted.discard(attendee_id)
+            return False
+        if queued >= self.batch_size // len(self._shards):
+            self._wake.set()
+        return True
+
+    @property
+    def granted(self):
+        """Seats granted so far, including ones the database later rejected"""
+        return sum(shard.sold for shard in self._shards)
+
+    def seats_left(self):
+        """Seats still in memory, across every shard"""
+        return sum(shard.seats for shard in self._shards)
+
+    def close(self):
+        """Stop granting, write every pending ticket and give the unsold seats back
+
+        Returns a summary of the sale. Unsold seats go to the event's
+        waitlist first, like any released seat. If the background writer
+        failed, the seats its lost grants had taken are given back too, and
+        its error is raised afterwards.
+        """
+        if self._closed:
+            return self.summary()
+        self._closed = True
+        self._open = False
+        # Wait out grants already inside a shard lock; later ones see the sale closed
+        for shard in self._shards:
+            with shard.lock:
+                pass
+        self._stopped.set()
+        self._wake.set()
+        self._persister.join()
+        with FlashSale._running_lock:
+            FlashSale._running.discard(self.event_id)
+        try:
+            self._release()
+        except Exception:
+            if self._error is None:
+                raise
+            # The writer's error comes first; recover() can release the seats later
+        if self._error is not None:
+            raise self._error
+        return self.summary()
+
+    def _release(self):
+        """Give back the reserved seats that are not tickets and drop the reservation"""
+        from .seat_hold import SeatHold
+        with write_session() as session:
+            reservation = session.get(FlashSaleReservation, self.event_id)
+            if reservation is None:
+                # The event was deleted mid-sale, and its reservation with it
+                return
+            changed = SeatHold._give_back(session, Counter({self.event_id: reservation.seats}))
+            session.delete(reservation)
+        for event_id, counts in changed.items():
+            event_cache.availability_changed(event_id, *counts)
+
+    def summary(self):
+        """Counts for the sale so far"""
+        return {"event_id": self.event_id, "granted": self.granted, "persisted": self.persisted,
+                "rejected": len(self.rejected), "seats_left": self.seats_left()}
+
+    def _persist_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopped.is_set()
+            try:
+                self._flush()
+            except Exception as e:
+                # Stop selling: grants can no longer be written
+                self._open = False
+                self._error = e
+                return
+            if stopping:
+                return
+
+    def _flush(self):
+        """Write every pending grant, in batches of batch_size"""
+        batch = []
+        for shard in self._shards:
+            with shard.lock:
+                batch.extend(shard.pending)
+                shard.pending = []
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+
+    def _write(self, batch):
+        """One transaction: insert the tickets and move their seats from held to sold
+
+        The batch goes in as one INSERT ... SELECT over a VALUES list (as a
+        CTE, which is how SQLite takes it) that skips unknown attendees and
+        ones who already have a ticket, the same checks as Ticket.create.
+        Seats of skipped grants go back to memory. If the event has been
+        deleted, nothing is written and the sale stops.
+        """
+        from .event import Event
+        from .attendee import Attendee
+        from .ticket import Ticket
+        granted = values(
+            column("attendee_id", Integer), column("booked_at", DateTime), name="granted"
+        ).data(batch).cte()
+        allowed = select(literal(self.event_id), granted.c.attendee_id, granted.c.booked_at).where(
+            exists().where(Event.id == self.event_id),
+            exists().where(Attendee.id == granted.c.attendee_id),
+            ~exists().where(Ticket.event_id == self.event_id, Ticket.attendee_id == granted.c.attendee_id),
+        )
+        with write_session() as session:
+            inserted = set(session.execute(
+                insert(Ticket)
+                .from_select(["event_id", "attendee_id", "booked_at"], allowed)
+                .returning(Ticket.attendee_id)
+            ).scalars())
+            written = len(inserted)
+            HourlyBookingStats._record_bookings(
+                session, self.event_id, [booked_at for attendee_id, booked_at in batch if attendee_id in inserted]
+            )
+            counts = session.execute(
+                update(Event)
+                .where(Event.id == self.event_id)
+                .values(tickets_sold=Event.tickets_sold + written, seats_held=Event.seats_held - written)
+                .returning(Event.tickets_sold, Event.seats_held)
+            ).one_or_none()
+            session.execute(
+                update(FlashSaleReservation)
+                .where(FlashSaleReservation.event_id == self.event_id)
+                .values(seats=FlashSaleReservation.seats - written)
+            )
+        if counts is None:
+            # The event was deleted mid-sale, with its reservation
+            self._open = False
+            self.rejected.extend(attendee_id for attendee_id, _ in batch)
+            return
+        self.persisted += written
+        event_cache.availability_changed(self.event_id, *counts)
+        for attendee_id, _ in batch:
+            if attendee_id not in inserted:
+                # Still recorded as granted, so a repeat request is refused
+                self.rejected.append(attendee_id)
+                shard = self._shards[attendee_id % len(self._shards)]
+                with shard.lock:
+                    shard.seats += 1
+
+    @staticmethod
+    def recover(event_id, force=False):
+        """Reconcile an event after a flash sale died: recount its counters and drop the reservation
+
+        tickets_sold becomes the number of tickets and seats_held the number
+        of seat holds, so seats granted in memory but never written go back
+        on sale. Returns the reconciled (tickets_sold, seats_held).
+
+        Refuses while the process recorded on the reservation is alive: its
+        sale would keep granting seats that had been put back on sale. This
+        process counts as alive only while its own sale for the event is
+        open. Pass force=True when that pid now belongs to some other process.
+        """
+        from .event import Event
+        from .ticket import Ticket
+        from .seat_hold import SeatHold
+        with write_session() as session:
+            reservation = session.get(FlashSaleReservation, event_id)
+            if reservation is not None and not force and _sale_running(event_id, reservation.pid):
+                raise ValueError(f"The flash sale for this event is still running in process {reservation.pid}")
+            counts = session.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(
+                    tickets_sold=select(func.count()).where(Ticket.event_id == event_id).scalar_subquery(),
+                    seats_held=select(func.count()).where(SeatHold.event_id == event_id).scalar_subquery(),
+                )
+                .returning(Event.tickets_sold, Event.seats_held)
+            ).one_or_none()
+            if counts is None:
+                raise ValueError("Event not found")
+            session.execute(delete(FlashSaleReservation).where(FlashSaleReservation.event_id == event_id))
+        event_cache.availability_changed(event_id, *counts)
+        return tuple(counts)
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.dialects.sqlite import insert
+from . import Base
+from datetime import datetime
+
+class ImportCheckpoint(Base):
+    """How far a bulk import of one file has got
+
+    The importer upserts this row in the same transaction as each chunk it
+    writes, so after a crash the import resumes exactly after the last
+    committed chunk. It also records the file's size and modification time,
+    and refuses to resume from a file that has changed since: skipping the
+    first rows_done rows of a different file would lose rows silently.
+    """
+    __tablename__ = 'import_checkpoints'
+
+    # "<kind>:<absolute path of the source file>"
+    source = Column(String, primary_key=True)
+    rows_done = Column(Integer, nullable=False, default=0)
+    finished = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    # os.stat() of the file the checkpoint counts rows of; NULL on checkpoints
+    # saved before these were recorded
+    file_size = Column(Integer)
+    file_mtime_ns = Column(Integer)
+
+    def __repr__(self):
+        return f"<ImportCheckpoint(source='{self.source}', rows_done={self.rows_done}, finished={self.finished})>"
+
+    @classmethod
+    def rows_done_for(cls, session, source, file_stat):
+        """Rows already imported from source (0 if never started), and whether it finished
+
+        Raises ValueError if rows were imported from a file that does not
+        match file_stat (size and mtime) any more, or was never recorded.
+        """
+        checkpoint = session.get(cls, source)
+        if not checkpoint:
+            return 0, False
+        if (checkpoint.rows_done or checkpoint.finished) and \
+                (checkpoint.file_size, checkpoint.file_mtime_ns) != (file_stat.st_size, file_stat.st_mtime_ns):
+            raise ValueError("The file has changed since it was last imported; "
+                             "use restart to import it from the start")
+        return checkpoint.rows_done, checkpoint.finished
+
+    @classmethod
+    def save(cls, session, source, file_stat, rows_done, finished=False):
+        """Upsert the checkpoint inside the caller's transaction"""
+        values = {"rows_done": rows_done, "finished": finished, "updated_at": datetime.utcnow(),
+                  "file_size": file_stat.st_size, "file_mtime_ns": file_stat.st_mtime_ns}
+        session.execute(
+            insert(cls).values(source=source, **values)
+            .on_conflict_do_update(index_elements=[cls.source], set_=values)
+        )
@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from . import engine, db_config
+import json
+import re
+import time
+
+# A statement shape run this many times in one action is reported as a likely
+# N+1: a query per row where one query for all the rows would do
+N_PLUS_ONE_THRESHOLD = db_config.getint("instrumentation", "n_plus_one_threshold", fallback=5)
+
+# Transaction control repeats by design and is never an N+1
+_TRANSACTION_CONTROL = {"BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE"}
+
+
+def statement_shape(statement):
+    """The statement with whitespace collapsed and IN lists and savepoint names folded"""
+    shape = " ".join(statement.split())
+    shape = re.sub(r"\?(?:, \?)+", "?, ...", shape)
+    return re.sub(r"sa_savepoint_\d+", "sa_savepoint_N", shape)
+
+
+class ActionTrace:
+    """SQL work done by one user action"""
+
+    def __init__(self, name):
+        self.name = name
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.checkouts = 0
+        # shape -> [times run, seconds]
+        self.shapes = {}
+
+    def record(self, statement, seconds):
+        self.statements += 1
+        self.db_seconds += seconds
+        totals = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def n_plus_one(self, threshold=None):
+        """(shape, times run) for every non-transaction shape run at least threshold times"""
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        return [
+            (shape, count) for shape, (count, _) in sorted(self.shapes.items(), key=lambda item: -item[1][0])
+            if count >= threshold and shape.split(" ", 1)[0].upper() not in _TRANSACTION_CONTROL
+        ]
+
+    def as_dict(self):
+        return {
+            "action": self.name,
+            "statements": self.statements,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "rows": self.rows,
+            "checkouts": self.checkouts,
+            "shapes": [
+                {"statement": shape, "count": count, "db_ms": round(seconds * 1000, 3)}
+                for shape, (count, seconds) in sorted(self.shapes.items(), key=lambda item: -item[1][1])
+            ],
+            "n_plus_one": [{"statement": shape, "count": count} for shape, count in self.n_plus_one()],
+        }
+
+    def summary(self):
+        lines = [
+            f"SQL trace [{self.name}]: {self.statements} statements, {self.db_seconds * 1000:.1f} ms in the database, "
+            f"{self.rows} rows fetched, {self.checkouts} connection checkouts"
+        ]
+        for shape, count in self.n_plus_one():
+            # The column list is noise; the WHERE clause shows which row it was run for
+            brief = re.sub(r"^SELECT .+? FROM ", "SELECT ... FROM ", shape)
+            lines.append(f"  N+1 suspect ({count}x): {brief[:160]}")
+        return "\n".join(lines)
+
+
+class _CountingCursor:
+    """DBAPI cursor stand-in that adds every fetched row to an ActionTrace"""
+
+    def __init__(self, cursor, trace):
+        self._cursor = cursor
+        self._trace = trace
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._trace.rows += 1
+        return row
+
+    def fetchmany(self, *size):
+        rows = self._cursor.fetchmany(*size)
+        self._trace.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._trace.rows += len(rows)
+        return rows
+
+
+class SQLTrace:
+    """Per-action statement, time, row and checkout counts for the engine
+
+    Nothing is attached to the engine until enable(), so a disabled trace
+    costs nothing per statement. Work is credited to the innermost
+    action() block of the running thread or task; statements outside any
+    action are not recorded.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.enabled = False
+        self.actions = []
+        self._current = ContextVar("sql_trace_action", default=None)
+
+    def enable(self):
+        if self.enabled:
+            return
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(self.engine, "checkout", self._checkout)
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        event.remove(self.engine, "checkout", self._checkout)
+        self.enabled = False
+
+    @contextmanager
+    def action(self, name):
+        """Credit the block's SQL to a new ActionTrace, kept in self.actions"""
+        if not self.enabled:
+            yield None
+            return
+        trace = ActionTrace(name)
+        token = self._current.set(trace)
+        try:
+            yield trace
+        finally:
+            self._current.reset(token)
+            self.actions.append(trace)
+
+    def export(self, path):
+        """Write every finished action as JSON"""
+        with open(path, "w") as f:
+            json.dump({"actions": [trace.as_dict() for trace in self.actions]}, f, indent=2)
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        if self._current.get() is not None:
+            context.sql_trace_started = time.perf_counter()
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        trace = self._current.get()
+        if trace is None or not hasattr(context, "sql_trace_started"):
+            return
+        trace.record(statement, time.perf_counter() - context.sql_trace_started)
+        # The result object fetches through context.cursor, which is only read
+        # after this event
+        if cursor.description is not None:
+            context.cursor = _CountingCursor(cursor, trace)
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        trace = self._current.get()
+        if trace is not None:
+            trace.checkouts += 1
+
+
+sql_trace = SQLTrace(engine)
@@ -0,0 +1,199 @@
+"""Capacity and occupancy analytics on NumPy columns
+
+OccupancySnapshot.load() reads events and tickets with two projection
+queries straight into contiguous NumPy arrays, one per column, without
+building Event or Ticket objects. The analytics are vectorized over those
+arrays:
+
+    from models.occupancy import OccupancySnapshot
+
+    snapshot = OccupancySnapshot.load()
+    rates = snapshot.fill_rate()
+    days, bookings = snapshot.daily_bookings()
+
+Needs numpy, which only this module imports.
+"""
+from datetime import datetime
+from itertools import chain
+import sqlite3
+import numpy as np
+from sqlalchemy import select, func, cast, Integer
+from . import read_session
+from .event import Event
+from .ticket import Ticket
+
+# Rows converted per round trip while the arrays fill
+CHUNK_SIZE = 100_000
+SECONDS_PER_DAY = 86400
+# julianday() of 1970-01-01
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+# booked_at of a ticket stored without one (the column is nullable, and older
+# or imported rows can hold NULL); earlier than any real time
+UNKNOWN_BOOKED_AT = np.iinfo(np.int64).min
+
+
+def _epoch_seconds_sql(column):
+    """Seconds since the epoch of a stored DateTime, UNKNOWN_BOOKED_AT for NULL
+
+    unixepoch() skips strftime's text round trip.
+    """
+    if sqlite3.sqlite_version_info >= (3, 38):
+        seconds = func.unixepoch(column)
+    else:
+        seconds = cast(func.strftime('%s', column), Integer)
+    return func.coalesce(seconds, int(UNKNOWN_BOOKED_AT))
+
+
+def _load_columns(connection, statement, count):
+    """One int64 array per selected column, `count` rows long, filled a chunk at a time"""
+    width = len(statement.selected_columns)
+    columns = [np.empty(count, dtype=np.int64) for _ in range(width)]
+    start = 0
+    result = connection.execute(statement)
+    try:
+        while True:
+            # The driver's plain tuples: building a Row per ticket would cost more than the query
+            rows = result.cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            chunk = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width)
+            for column, values in zip(columns, chunk.reshape(len(rows), width).T):
+                column[start:start + len(rows)] = values
+            start += len(rows)
+    finally:
+        result.close()
+    return columns
+
+
+def _epoch_seconds(moment):
+    return int(np.datetime64(moment, 's').astype(np.int64))
+
+
+class OccupancySnapshot:
+    """Every event and ticket as NumPy columns, read in one transaction
+
+    Event columns (event_ids, dates, capacity, tickets_sold, seats_held) are
+    in id order. Ticket columns (ticket_event_ids, attendee_ids, booked_at)
+    are in table order, with booked_at as int64 seconds since the epoch, in
+    UTC like the stored times. A ticket stored without a booking time keeps
+    its row, so it still counts towards attendees, with booked_at set to
+    UNKNOWN_BOOKED_AT; the booking-time analytics leave it out.
+    """
+
+    def __init__(self, event_ids, dates, capacity, tickets_sold, seats_held,
+                 ticket_event_ids, attendee_ids, booked_at, taken_at):
+        self.event_ids = event_ids
+        self.dates = dates
+        self.capacity = capacity
+        self.tickets_sold = tickets_sold
+        self.seats_held = seats_held
+        self.ticket_event_ids = ticket_event_ids
+        self.attendee_ids = attendee_ids
+        self.booked_at = booked_at
+        self.taken_at = taken_at
+        # Position of each ticket's event in the event columns
+        self.ticket_event_index = np.searchsorted(event_ids, ticket_event_ids)
+
+    def __repr__(self):
+        return f"<OccupancySnapshot(events={len(self.event_ids)}, tickets={len(self.booked_at)}, taken_at={self.taken_at})>"
+
+    @classmethod
+    def load(cls):
+        """Read both tables; inside a unit of work, as that unit sees them"""
+        taken_at = datetime.utcnow()
+        day = cast(func.julianday(Event.date) - UNIX_EPOCH_JULIAN_DAY, Integer)
+        booked_at = _epoch_seconds_sql(Ticket.booked_at)
+        with read_session() as session:
+            # Core rows, no ORM result processing; counts and rows come from the same read transaction
+            connection = session.connection()
+            events = connection.execute(select(func.count()).select_from(Event)).scalar_one()
+            tickets = connection.execute(select(func.count()).select_from(Ticket)).scalar_one()
+            event_ids, days, capacity, tickets_sold, seats_held = _load_columns(
+                connection,
+                select(Event.id, day, Event.capacity, Event.tickets_sold, Event.seats_held).order_by(Event.id),
+                events,
+            )
+            ticket_event_ids, attendee_ids, booked_at = _load_columns(
+                connection, select(Ticket.event_id, Ticket.attendee_id, booked_at), tickets
+            )
+        return cls(event_ids, days.astype('datetime64[D]'), capacity, tickets_sold, seats_held,
+                   ticket_event_ids, attendee_ids, booked_at, taken_at)
+
+    def _position(self, event_id):
+        position = int(np.searchsorted(self.event_ids, event_id))
+        if position == len(self.event_ids) or self.event_ids[position] != event_id:
+            raise ValueError("Event not found")
+        return position
+
+    def fill_rate(self):
+        """tickets_sold / capacity per event, aligned with event_ids; 0 for no capacity"""
+        return np.divide(self.tickets_sold, self.capacity, out=np.zeros(len(self.capacity)),
+                         where=self.capacity > 0)
+
+    def fill_summary(self, percentiles=(50, 90, 99)):
+        """Event count, sold-out count (held seats included), mean fill rate and its percentiles"""
+        rates = self.fill_rate()
+        summary = {
+            "events": len(rates),
+            "sold_out": int(np.count_nonzero(self.tickets_sold + self.seats_held >= self.capacity)),
+            "mean": float(rates.mean()) if len(rates) else 0.0,
+        }
+        values = np.percentile(rates, percentiles) if len(rates) else np.zeros(len(percentiles))
+        summary.update({f"p{p}": float(value) for p, value in zip(percentiles, values)})
+        return summary
+
+    def daily_bookings(self, event_id=None):
+        """(days, bookings): tickets booked per UTC day, every day from the first booking to the last
+
+        Only tickets still standing are counted; for cancellations see
+        models.booking_stats. Tickets with no booking time are left out.
+        """
+        booked_at = self.booked_at
+        if event_id is not None:
+            booked_at = booked_at[self.ticket_event_index == self._position(event_id)]
+        booked_at = booked_at[booked_at != UNKNOWN_BOOKED_AT]
+        if len(booked_at) == 0:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64)
+        days = booked_at // SECONDS_PER_DAY
+        first = days.min()
+        counts = np.bincount(days - first)
+        return np.arange(first, first + len(counts)).astype('datetime64[D]'), counts
+
+    def tickets_per_attendee(self):
+        """Histogram: element k is how many attendees hold tickets for k events"""
+        per_attendee = np.bincount(self.attendee_ids, minlength=1)
+        histogram = np.bincount(per_attendee)
+        histogram[0] = 0
+        return histogram
+
+    def repeat_attendees(self, min_events=2):
+        """How many attendees hold tickets for at least `min_events` events"""
+        return int(self.tickets_per_attendee()[min_events:].sum())
+
+    def sellout_eta(self, window_days=7, now=None):
+        """Projected sell-out time per event, at the booking rate of the last `window_days` days
+
+        datetime64[s] aligned with event_ids. An event with no seats left
+        gets `now`; one with seats left and no recent bookings gets NaT.
+        Held seats count as taken, as in Event.available_spots().
+        """
+        now = _epoch_seconds(now or self.taken_at)
+        window = window_days * SECONDS_PER_DAY
+        # UNKNOWN_BOOKED_AT is never recent
+        recent = (self.booked_at > now - window) & (self.booked_at <= now)
+        rate = np.bincount(self.ticket_event_index[recent], minlength=len(self.event_ids)) / window
+        remaining = np.maximum(self.capacity - self.tickets_sold - self.seats_held, 0)
+        seconds = np.divide(remaining, rate, out=np.full(len(rate), np.nan), where=rate > 0)
+        seconds[remaining == 0] = 0
+        eta = np.full(len(rate), np.datetime64('NaT'), dtype='datetime64[s]')
+        known = ~np.isnan(seconds)
+        eta[known] = (now + np.ceil(seconds[known]).astype(np.int64)).astype('datetime64[s]')
+        return eta
+
+    def predicted_sellouts(self, window_days=7, now=None):
+        """Ids of events not sold out yet whose projected sell-out falls on or before the event's date"""
+        eta = self.sellout_eta(window_days, now)
+        open_seats = self.capacity - self.tickets_sold - self.seats_held > 0
+        # NaT compares False, so events with no recent bookings drop out
+        in_time = eta.astype('datetime64[D]') <= self.dates
+        return self.event_ids[open_seats & in_time]
@@ -0,0 +1,87 @@
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from . import Base, engine, lib_dir, DATABASE_URL, SCHEMA_REVISION
+import os
+
+# Revision of the schema the very first create_tables() built
+BASE_REVISION = "9157c5de6053"
+
+
+def stored_revision(connection):
+    """Revision recorded in alembic_version, or None for an unversioned database"""
+    try:
+        return connection.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+    except OperationalError:
+        return None
+
+
+def stamp(connection, revision):
+    """Record revision in alembic_version without running any migration"""
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL, "
+        "CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num))"
+    )
+    connection.exec_driver_sql("DELETE FROM alembic_version")
+    connection.exec_driver_sql("INSERT INTO alembic_version VALUES (?)", (revision,))
+
+
+def alembic_config():
+    """Alembic configuration for lib/migrations, pointed at DATABASE_URL"""
+    from alembic.config import Config
+    config = Config(os.path.join(lib_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(lib_dir, "migrations"))
+    config.set_main_option("sqlalchemy.url", DATABASE_URL)
+    return config
+
+
+def migrate():
+    """Bring the database schema up to SCHEMA_REVISION; returns (before, after)
+
+    An up-to-date database costs one primary-key read of alembic_version.
+    A database with no tables is built from the models and stamped, which
+    is what a full upgrade from nothing would produce. Anything else behind
+    is upgraded by Alembic.
+    """
+    with engine.connect() as connection:
+        before = stored_revision(connection)
+        if before == SCHEMA_REVISION:
+            return before, before
+        has_tables = inspect(connection).has_table("events")
+        columns = {column["name"] for column in inspect(connection).get_columns("events")} if has_tables else set()
+
+    if before is None and not has_tables:
+        # Register every table
+        from .event import Event  # noqa: F401
+        from .attendee import Attendee  # noqa: F401
+        from .ticket import Ticket  # noqa: F401
+        from .import_checkpoint import ImportCheckpoint  # noqa: F401
+        from .waitlist import WaitlistEntry  # noqa: F401
+        from .seat_hold import SeatHold  # noqa: F401
+        from .flash_sale import FlashSaleReservation  # noqa: F401
+        from .booking_stats import HourlyBookingStats  # noqa: F401
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            stamp(connection, SCHEMA_REVISION)
+        return None, SCHEMA_REVISION
+
+    if before is None:
+        # Tables made by create_tables() before it recorded a revision. Only the
+        # original schema can be told apart safely.
+        if "tickets_sold" in columns:
+            raise RuntimeError(
+                "Database has tables but no alembic_version; run 'alembic stamp <revision>' "
+                "for the schema it has, then migrate"
+            )
+        with engine.begin() as connection:
+            stamp(connection, BASE_REVISION)
+
+    from alembic import command
+    from alembic.script import ScriptDirectory
+    config = alembic_config()
+    head = ScriptDirectory.from_config(config).get_current_head()
+    if head != SCHEMA_REVISION:
+        raise RuntimeError(f"settings.SCHEMA_REVISION is {SCHEMA_REVISION} but the newest migration is {head}")
+    command.upgrade(config, "head")
+    # Migrations can change the tables under connections opened before them
+    engine.dispose()
+    return before, SCHEMA_REVISION
@@ -0,0 +1,222 @@
+from collections import Counter
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, select, insert, update, delete, exists, literal
+from sqlalchemy.orm import relationship, make_transient_to_detached
+from . import Base, read_session, write_session, db_config
+from .cache import event_cache
+from .booking_stats import HourlyBookingStats
+from datetime import datetime, timedelta
+
+# Seconds a checkout may hold a seat before it goes back on sale
+#
+#   [holds]
+#   ttl = 600
+DEFAULT_HOLD_TTL = db_config.getint("holds", "ttl", fallback=600)
+
+
+class SeatHold(Base):
+    """A seat taken for a checkout that has not been paid for yet
+
+    hold() takes the seat at once, so a customer who is paying cannot be
+    outsold. confirm() turns the hold into a ticket; a hold that runs out
+    first is reclaimed by the sweep and the seat goes back on sale (or to
+    the event's waitlist). Held seats are counted in events.seats_held.
+    """
+    __tablename__ = 'seat_holds'
+    __table_args__ = (
+        # One hold per attendee per event
+        Index('uq_seat_holds_event_attendee', 'event_id', 'attendee_id', unique=True),
+        # The sweep reads only the expired end of this index
+        Index('ix_seat_holds_expires_at', 'expires_at'),
+        # Lets deleting an attendee find their holds without a scan
+        Index('ix_seat_holds_attendee_id', 'attendee_id'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    attendee_id = Column(Integer, ForeignKey('attendees.id', ondelete='CASCADE'), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    event = relationship("Event")
+    attendee = relationship("Attendee")
+
+    def __repr__(self):
+        return f"<SeatHold(id={self.id}, event_id={self.event_id}, attendee_id={self.attendee_id}, expires_at={self.expires_at})>"
+
+    # ORM Methods
+    @classmethod
+    def hold(cls, event_id, attendee_id, ttl=DEFAULT_HOLD_TTL):
+        """Hold a seat for `ttl` seconds while the attendee checks out
+
+        Expired holds are swept first, so their seats can be held again. The
+        seat is taken with the same kind of conditional UPDATE as
+        Ticket.create, and the hold is inserted by an INSERT ... SELECT that
+        skips attendees who already have a ticket or a hold.
+        """
+        from .ticket import _BookingRefused
+        created_at = datetime.utcnow()
+        expires_at = created_at + timedelta(seconds=ttl)
+        try:
+            with write_session() as session:
+                _, reclaimed = cls._release_expired(session, created_at)
+                hold_id = None
+                counts = session.execute(cls._hold_seat_statement(event_id)).one_or_none()
+                if counts is not None:
+                    hold_id = session.execute(
+                        cls._insert_statement(event_id, attendee_id, created_at, expires_at)
+                    ).scalar_one_or_none()
+                if hold_id is None:
+                    raise _BookingRefused()
+
+                hold = cls(id=hold_id, event_id=event_id, attendee_id=attendee_id,
+                           created_at=created_at, expires_at=expires_at)
+                make_transient_to_detached(hold)
+                session.add(hold)
+        except _BookingRefused:
+            with read_session() as session:
+                raise ValueError(cls._hold_failure(session, event_id, attendee_id)) from None
+        reclaimed[event_id] = tuple(counts)
+        for changed_id, changed in reclaimed.items():
+            event_cache.availability_changed(changed_id, *changed)
+        return hold
+
+    @staticmethod
+    def _hold_seat_statement(event_id):
+        """UPDATE that adds a held seat only if the event still has room for it"""
+        from .event import Event
+        return (
+            update(Event)
+            .where(Event.id == event_id, Event.tickets_sold + Event.seats_held + 1 <= Event.capacity)
+            .values(seats_held=Event.seats_held + 1)
+            .returning(Event.tickets_sold, Event.seats_held)
+        )
+
+    @classmethod
+    def _insert_statement(cls, event_id, attendee_id, created_at, expires_at):
+        """INSERT ... SELECT that skips unknown attendees, ticket holders and existing holds"""
+        from .attendee import Attendee
+        from .ticket import Ticket
+        allowed = select(
+            literal(event_id), literal(attendee_id),
+            literal(created_at, DateTime), literal(expires_at, DateTime),
+        ).where(
+            exists().where(Attendee.id == attendee_id),
+            ~exists().where(Ticket.event_id == event_id, Ticket.attendee_id == attendee_id),
+            ~exists().where(cls.event_id == event_id, cls.attendee_id == attendee_id),
+        )
+        return (
+            insert(cls)
+            .from_select(["event_id", "attendee_id", "created_at", "expires_at"], allowed)
+            .returning(cls.id)
+        )
+
+    @classmethod
+    def _hold_failure(cls, session, event_id, attendee_id):
+        """Explain why a hold was refused"""
+        from .ticket import Ticket
+        reason = Ticket._booking_failure(session, event_id, attendee_id)
+        if reason == "Event is at full capacity" and session.query(cls.id).filter(
+            cls.event_id == event_id, cls.attendee_id == attendee_id
+        ).first():
+            return "Attendee already holds a seat for this event"
+        return reason
+
+    @classmethod
+    def confirm(cls, hold_id):
+        """Turn an unexpired hold into a ticket; returns the Ticket"""
+        from .event import Event
+        from .ticket import Ticket
+        booked_at = datetime.utcnow()
+        with write_session() as session:
+            held = session.execute(
+                delete(cls).where(cls.id == hold_id, cls.expires_at > booked_at)
+                .returning(cls.event_id, cls.attendee_id)
+            ).one_or_none()
+            if held is None:
+                expired = session.query(cls.id).filter(cls.id == hold_id).first()
+                raise ValueError("Hold has expired" if expired else "Hold not found")
+            event_id, attendee_id = held
+            ticket_id = session.execute(
+                Ticket._insert_statement(event_id, attendee_id, booked_at)
+            ).scalar_one_or_none()
+            if ticket_id is None:
+                # Rolls back; the hold stays until it expires
+                raise ValueError("Attendee already has a ticket for this event")
+            HourlyBookingStats._record(session, event_id, booked_at, bookings=1)
+            # The held seat becomes a sold one, so capacity needs no check
+            counts = session.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(seats_held=Event.seats_held - 1, tickets_sold=Event.tickets_sold + 1)
+                .returning(Event.tickets_sold, Event.seats_held)
+            ).one()
+
+            ticket = Ticket(id=ticket_id, event_id=event_id, attendee_id=attendee_id, booked_at=booked_at)
+            make_transient_to_detached(ticket)
+            session.add(ticket)
+        event_cache.availability_changed(event_id, *counts)
+        return ticket
+
+    @classmethod
+    def find_by_id(cls, hold_id):
+        """Find hold by ID"""
+        with read_session() as session:
+            return session.query(cls).filter(cls.id == hold_id).first()
+
+    def release(self):
+        """Give the held seat back before the hold expires (checkout abandoned)"""
+        cls = type(self)
+        with write_session() as session:
+            if not session.execute(delete(cls).where(cls.id == self.id)).rowcount:
+                raise ValueError("Hold not found")
+            changed = cls._give_back(session, Counter([self.event_id]))
+        for event_id, counts in changed.items():
+            event_cache.availability_changed(event_id, *counts)
+
+    def is_expired(self, now=None):
+        """Whether the hold has run out, swept or not"""
+        return self.expires_at <= (now or datetime.utcnow())
+
+    @classmethod
+    def release_expired(cls, now=None):
+        """Reclaim every expired hold; returns how many were reclaimed"""
+        with write_session() as session:
+            reclaimed, changed = cls._release_expired(session, now or datetime.utcnow())
+        for event_id, counts in changed.items():
+            event_cache.availability_changed(event_id, *counts)
+        return reclaimed
+
+    @classmethod
+    def _release_expired(cls, session, now):
+        """Delete expired holds and give their seats back, in the caller's transaction
+
+        The DELETE is a range scan of ix_seat_holds_expires_at that stops at
+        the first unexpired hold, so it costs one index probe when nothing
+        has expired, however many holds are active. Returns the number of
+        holds reclaimed and {event_id: (tickets_sold, seats_held)} for every
+        event changed.
+        """
+        event_ids = session.execute(
+            delete(cls).where(cls.expires_at <= now).returning(cls.event_id)
+        ).scalars().all()
+        return len(event_ids), cls._give_back(session, Counter(event_ids))
+
+    @staticmethod
+    def _give_back(session, seats_by_event):
+        """Return released seats to their events, offering each to the waitlist first"""
+        from .event import Event
+        from .waitlist import WaitlistEntry
+        changed = {}
+        for event_id, seats in seats_by_event.items():
+            changed[event_id] = tuple(session.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(seats_held=Event.seats_held - seats)
+                .returning(Event.tickets_sold, Event.seats_held)
+            ).one())
+            for _ in range(seats):
+                promotion = WaitlistEntry._promote(session, event_id)
+                if not promotion:
+                    break
+                changed[event_id] = promotion[1]
+        return changed
@@ -1,15 +1,45 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
-from . import Base, get_session
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, select, insert, update, delete, exists, literal, func
+from sqlalchemy.orm import relationship, make_transient_to_detached
+from . import Base, read_session, write_session, keyset_page, DEFAULT_PAGE_SIZE
+from .cache import event_cache
+from .booking_stats import HourlyBookingStats
 from datetime import datetime
 from sqlalchemy.orm import relationship, joinedload
 
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK = 500
+
+
+def _chunks(items, size=IN_CLAUSE_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class _BookingRefused(Exception):
+    """Rolls a refused booking back before the reason is looked up"""
+
+
+class GroupBookingError(ValueError):
+    """A group booking was refused; `errors` lists (row number, message) pairs"""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
 class Ticket(Base):
     __tablename__ = 'tickets'
+    __table_args__ = (
+        # One ticket per attendee per event
+        Index('uq_tickets_event_attendee', 'event_id', 'attendee_id', unique=True),
+        # With SQLite's implicit rowid suffix these serve keyset pages in id order
+        Index('ix_tickets_event_id', 'event_id'),
+        Index('ix_tickets_attendee_id', 'attendee_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
-    attendee_id = Column(Integer, ForeignKey('attendees.id'), nullable=False)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    attendee_id = Column(Integer, ForeignKey('attendees.id', ondelete='CASCADE'), nullable=False)
     booked_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -22,111 +52,306 @@ class Ticket(Base):
     # ORM Methods
     @classmethod
     def create(cls, event_id, attendee_id):
-        """Create a new ticket"""
-        session = get_session()
+        """Create a new ticket
+
+        The seat is taken with a conditional UPDATE of events.tickets_sold,
+        which also takes the SQLite write lock, and the ticket is inserted
+        by an INSERT ... SELECT that skips duplicates. Both run in one short
+        transaction, so concurrent bookers cannot oversell. The slower
+        diagnostic reads only run when the booking was refused.
+        """
+        booked_at = datetime.utcnow()
+        reclaimed = {}
         try:
-            # Check if event exists and has capacity
-            from .event import Event
-            event = session.query(Event).filter(Event.id == event_id).first()
-            if not event:
-                raise ValueError("Event not found")
-            
-            # Check if event is full
-            current_tickets = session.query(cls).filter(cls.event_id == event_id).count()
-            if current_tickets >= event.capacity:
-                raise ValueError("Event is at full capacity")
-            
-            # Check if attendee exists
-            from .attendee import Attendee
-            attendee = session.query(Attendee).filter(Attendee.id == attendee_id).first()
-            if not attendee:
-                raise ValueError("Attendee not found")
-            
-            # Check if attendee already has ticket for this event
-            existing_ticket = session.query(cls).filter(
-                cls.event_id == event_id, 
-                cls.attendee_id == attendee_id
-            ).first()
-            if existing_ticket:
-                raise ValueError("Attendee already has a ticket for this event")
-            
-            ticket = cls(event_id=event_id, attendee_id=attendee_id)
-            session.add(ticket)
-            session.commit()
-            session.refresh(ticket)
-            return ticket
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+            with write_session() as session:
+                ticket_id = None
+                counts = cls._take_seats(session, event_id, 1, reclaimed)
+                if counts is not None:
+                    ticket_id = session.execute(
+                        cls._insert_statement(event_id, attendee_id, booked_at)
+                    ).scalar_one_or_none()
+                if ticket_id is None:
+                    raise _BookingRefused()
+                HourlyBookingStats._record(session, event_id, booked_at, bookings=1)
+
+                ticket = cls(id=ticket_id, event_id=event_id, attendee_id=attendee_id, booked_at=booked_at)
+                make_transient_to_detached(ticket)
+                # Stays attached for the rest of a unit of work
+                session.add(ticket)
+        except _BookingRefused:
+            with read_session() as session:
+                raise ValueError(cls._booking_failure(session, event_id, attendee_id)) from None
+        reclaimed[event_id] = tuple(counts)
+        for changed_id, changed in reclaimed.items():
+            event_cache.availability_changed(changed_id, *changed)
+        return ticket
+
+    @staticmethod
+    def _reserve_seat_statement(event_id, seats=1):
+        """UPDATE that takes seats only if the event still has room for them
+
+        Held seats are not free. Returns the new (tickets_sold, seats_held),
+        or no row if the seats were refused.
+        """
+        from .event import Event
+        return (
+            update(Event)
+            .where(Event.id == event_id, Event.tickets_sold + Event.seats_held + seats <= Event.capacity)
+            .values(tickets_sold=Event.tickets_sold + seats)
+            .returning(Event.tickets_sold, Event.seats_held)
+        )
+
+    @classmethod
+    def _take_seats(cls, session, event_id, seats, reclaimed):
+        """Run the reserve UPDATE; if it is refused, sweep expired holds and try once more
+
+        The events whose counts the sweep changed are added to `reclaimed`.
+        """
+        from .seat_hold import SeatHold
+        counts = session.execute(cls._reserve_seat_statement(event_id, seats)).one_or_none()
+        if counts is None:
+            released, changed = SeatHold._release_expired(session, datetime.utcnow())
+            if released:
+                reclaimed.update(changed)
+                counts = session.execute(cls._reserve_seat_statement(event_id, seats)).one_or_none()
+        return counts
+
+    @classmethod
+    def _insert_statement(cls, event_id, attendee_id, booked_at):
+        """INSERT ... SELECT that skips unknown attendees and duplicate tickets"""
+        from .attendee import Attendee
+        allowed = select(
+            literal(event_id), literal(attendee_id), literal(booked_at, DateTime)
+        ).where(
+            exists().where(Attendee.id == attendee_id),
+            ~exists().where(cls.event_id == event_id, cls.attendee_id == attendee_id),
+        )
+        return (
+            insert(cls)
+            .from_select(["event_id", "attendee_id", "booked_at"], allowed)
+            .returning(cls.id)
+        )
+
+    @classmethod
+    def _booking_failure(cls, session, event_id, attendee_id):
+        """Explain why a booking was refused"""
+        from .event import Event
+        from .attendee import Attendee
+        event = session.query(Event).populate_existing().filter(Event.id == event_id).first()
+        if not event:
+            return "Event not found"
+        if event.is_full():
+            return "Event is at full capacity"
+        if not session.query(Attendee).filter(Attendee.id == attendee_id).first():
+            return "Attendee not found"
+        if session.query(cls).filter(cls.event_id == event_id, cls.attendee_id == attendee_id).first():
+            return "Attendee already has a ticket for this event"
+        # A seat was freed between the booking attempt and this check
+        return "Event is at full capacity"
+    
+    @classmethod
+    def create_many(cls, event_id, attendees):
+        """Book a block of attendees into one event, all or nothing
+
+        `attendees` is a list of (name, contact) pairs. Attendees are matched
+        by contact or created in bulk, capacity is taken once for the whole
+        block, every ticket goes in with one batched INSERT and the block
+        commits once. If any row is refused nothing is booked, and the
+        GroupBookingError lists every bad row.
+        """
+        from .attendee import Attendee
+        attendees = list(attendees)
+        rows, errors = [], []
+        first_row_for_contact = {}
+        for number, (name, contact) in enumerate(attendees, start=1):
+            candidate = Attendee()
+            try:
+                candidate.name_property = name
+                candidate.contact_property = contact
+            except ValueError as e:
+                errors.append((number, str(e)))
+                continue
+            # Rows are matched to attendees, and to each other, by normalized contact
+            key = candidate.contact_normalized
+            if key in first_row_for_contact:
+                errors.append((number, f"Same contact as row {first_row_for_contact[key]}"))
+                continue
+            first_row_for_contact[key] = number
+            rows.append((number, candidate.name_property, candidate.contact_property, key))
+        if errors:
+            raise GroupBookingError(f"{len(errors)} of {len(attendees)} rows are invalid", errors)
+        if not rows:
+            raise ValueError("No attendees to book")
+
+        reclaimed = {}
+        try:
+            with write_session() as session:
+                counts = cls._take_seats(session, event_id, len(rows), reclaimed)
+                if counts is None:
+                    raise _BookingRefused()
+
+                keys = [key for _, _, _, key in rows]
+                attendee_ids = {}
+                for chunk in _chunks(keys):
+                    attendee_ids.update(
+                        (key, attendee_id) for attendee_id, key in session.execute(
+                            select(Attendee.id, Attendee.contact_normalized)
+                            .where(Attendee.contact_normalized.in_(chunk))
+                        )
+                    )
+                new_attendees = [
+                    {"name": name, "contact": contact, "contact_normalized": key}
+                    for _, name, contact, key in rows if key not in attendee_ids
+                ]
+                if new_attendees:
+                    attendee_ids.update(
+                        (key, attendee_id) for attendee_id, key in session.execute(
+                            insert(Attendee).returning(Attendee.id, Attendee.contact_normalized), new_attendees
+                        )
+                    )
+
+                already_booked = set()
+                for chunk in _chunks(list(attendee_ids.values())):
+                    already_booked.update(session.execute(
+                        select(cls.attendee_id).where(cls.event_id == event_id, cls.attendee_id.in_(chunk))
+                    ).scalars())
+                errors = [
+                    (number, "Attendee already has a ticket for this event")
+                    for number, _, _, key in rows if attendee_ids[key] in already_booked
+                ]
+                if errors:
+                    raise GroupBookingError(
+                        f"{len(errors)} of {len(rows)} attendees already have a ticket", errors
+                    )
+
+                booked_at = datetime.utcnow()
+                ticket_rows = [
+                    {"event_id": event_id, "attendee_id": attendee_ids[key], "booked_at": booked_at}
+                    for _, _, _, key in rows
+                ]
+                # RETURNING order is not guaranteed for a multi-row INSERT, so map
+                # ids back through the attendee, which is unique within the block
+                ticket_ids = dict(
+                    (attendee_id, ticket_id) for ticket_id, attendee_id in session.execute(
+                        insert(cls).returning(cls.id, cls.attendee_id), ticket_rows
+                    )
+                )
+                HourlyBookingStats._record(session, event_id, booked_at, bookings=len(ticket_rows))
+
+                tickets = []
+                for values in ticket_rows:
+                    ticket = cls(id=ticket_ids[values["attendee_id"]], **values)
+                    make_transient_to_detached(ticket)
+                    session.add(ticket)
+                    tickets.append(ticket)
+        except _BookingRefused:
+            with read_session() as session:
+                raise ValueError(cls._group_booking_failure(session, event_id, len(rows))) from None
+        reclaimed[event_id] = tuple(counts)
+        for changed_id, changed in reclaimed.items():
+            event_cache.availability_changed(changed_id, *changed)
+        return tickets
+
+    @classmethod
+    def _group_booking_failure(cls, session, event_id, seats):
+        """Explain why a block of seats could not be taken"""
+        from .event import Event
+        event = session.query(Event).populate_existing().filter(Event.id == event_id).first()
+        if not event:
+            return "Event not found"
+        return f"Event only has {event.available_spots()} spots left for a group of {seats}"
     
     @classmethod
     def get_all(cls):
         """Get all tickets"""
-        session = get_session()
-        try:
+        with read_session() as session:
             return session.query(cls).all()
-        finally:
-            session.close()
+    
+    @classmethod
+    def page(cls, after_id=None, limit=DEFAULT_PAGE_SIZE, before_id=None,
+             event_id=None, attendee_id=None, with_attendee=False):
+        """Get one page of tickets in id order, optionally for one event or attendee"""
+        with read_session() as session:
+            query = session.query(cls)
+            if with_attendee:
+                query = query.options(joinedload(cls.attendee))
+            if event_id is not None:
+                query = query.filter(cls.event_id == event_id)
+            if attendee_id is not None:
+                query = query.filter(cls.attendee_id == attendee_id)
+            return keyset_page(query, cls.id, after_id, before_id, limit)
+
+    @classmethod
+    def count_by_attendee(cls, attendee_ids):
+        """Map each attendee id to its number of tickets, in one grouped query"""
+        with read_session() as session:
+            counts = dict.fromkeys(attendee_ids, 0)
+            for chunk in _chunks(list(attendee_ids)):
+                counts.update(session.execute(
+                    select(cls.attendee_id, func.count())
+                    .where(cls.attendee_id.in_(chunk))
+                    .group_by(cls.attendee_id)
+                ).all())
+            return counts
     
     @classmethod
     def find_by_id(cls, ticket_id):
         """Find ticket by ID"""
-        session = get_session()
-        try:
-          from sqlalchemy.orm import joinedload
-          return session.query(cls).options(
-              joinedload(cls.event),
-              joinedload(cls.attendee)
-           ).filter(cls.id == ticket_id).first()   
-        finally:
-            session.close()
+        with read_session() as session:
+            return session.query(cls).options(
+                joinedload(cls.event),
+                joinedload(cls.attendee)
+            ).filter(cls.id == ticket_id).first()
     
     @classmethod
     def find_by_event_and_attendee(cls, event_id, attendee_id):
         """Find ticket by event and attendee"""
-        session = get_session()
-        try:
+        with read_session() as session:
             return session.query(cls).filter(
                 cls.event_id == event_id,
                 cls.attendee_id == attendee_id
             ).first()
-        finally:
-            session.close()
     
     @classmethod
     def get_tickets_for_event(cls, event_id):
         """Get all tickets for a specific event"""
-        session = get_session()
-        try:
-           from sqlalchemy.orm import joinedload
-           return session.query(cls).options(
-             joinedload(cls.attendee)
-           ).filter(cls.event_id == event_id).all()
-        finally:
-            session.close()
+        with read_session() as session:
+            return session.query(cls).options(
+                joinedload(cls.attendee)
+            ).filter(cls.event_id == event_id).all()
     
     @classmethod
     def get_tickets_for_attendee(cls, attendee_id):
         """Get all tickets for a specific attendee"""
-        session = get_session()
-        try:
+        with read_session() as session:
             return session.query(cls).filter(cls.attendee_id == attendee_id).all()
-        finally:
-            session.close()
     
     def delete(self):
-        """Delete this ticket (cancel booking)"""
-        session = get_session()
-        try:
-            session.delete(self)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        """Delete this ticket (cancel booking) and give the seat back
+
+        If the event has a waitlist, the seat goes straight to the head of
+        the queue in the same transaction; the promoted attendee's new
+        ticket is returned, otherwise None.
+        """
+        from .event import Event
+        from .waitlist import WaitlistEntry
+        cls = type(self)
+        promoted = None
+        with write_session() as session:
+            if not session.execute(delete(cls).where(cls.id == self.id)).rowcount:
+                raise ValueError("Ticket not found")
+            HourlyBookingStats._record(session, self.event_id, datetime.utcnow(), cancellations=1)
+            counts = session.execute(
+                update(Event)
+                .where(Event.id == self.event_id)
+                .values(tickets_sold=Event.tickets_sold - 1)
+                .returning(Event.tickets_sold, Event.seats_held)
+            ).one()
+            promotion = WaitlistEntry._promote(session, self.event_id)
+            if promotion:
+                promoted, counts = promotion
+        event_cache.availability_changed(self.event_id, *counts)
+        return promoted
     
     def get_event_details(self):
         """Get event details for this ticket"""
@@ -0,0 +1,134 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import relationship, make_transient_to_detached
+from . import Base, read_session, write_session, keyset_page, DEFAULT_PAGE_SIZE
+from .booking_stats import HourlyBookingStats
+from datetime import datetime
+
+
+class WaitlistEntry(Base):
+    """An attendee queued for a seat at a full event
+
+    Entries are served in id order, so the id is the queue position: the
+    first entry of an event is the one with the lowest id.
+    """
+    __tablename__ = 'waitlist'
+    __table_args__ = (
+        # One place in the queue per attendee per event
+        Index('uq_waitlist_event_attendee', 'event_id', 'attendee_id', unique=True),
+        # The queue order: the head of an event's queue is one index probe
+        Index('ix_waitlist_event_position', 'event_id', 'id'),
+        # Lets deleting an attendee find their entries without a scan
+        Index('ix_waitlist_attendee_id', 'attendee_id'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    attendee_id = Column(Integer, ForeignKey('attendees.id', ondelete='CASCADE'), nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+    event = relationship("Event")
+    attendee = relationship("Attendee")
+
+    def __repr__(self):
+        return f"<WaitlistEntry(id={self.id}, event_id={self.event_id}, attendee_id={self.attendee_id}, joined_at={self.joined_at})>"
+
+    # ORM Methods
+    @classmethod
+    def join(cls, event_id, attendee_id):
+        """Queue an attendee for a full event"""
+        from .event import Event
+        from .attendee import Attendee
+        from .ticket import Ticket
+        with write_session() as session:
+            event = session.get(Event, event_id, populate_existing=True)
+            if not event:
+                raise ValueError("Event not found")
+            if not event.is_full():
+                raise ValueError("Event still has seats; book a ticket instead")
+            if not session.get(Attendee, attendee_id):
+                raise ValueError("Attendee not found")
+            if session.query(Ticket.id).filter(Ticket.event_id == event_id, Ticket.attendee_id == attendee_id).first():
+                raise ValueError("Attendee already has a ticket for this event")
+            entry = cls(event_id=event_id, attendee_id=attendee_id, joined_at=datetime.utcnow())
+            session.add(entry)
+            try:
+                session.flush()
+            except IntegrityError:
+                raise ValueError("Attendee is already on the waitlist for this event") from None
+            return entry
+
+    @classmethod
+    def find_by_event_and_attendee(cls, event_id, attendee_id):
+        """Find an attendee's place in an event's queue"""
+        with read_session() as session:
+            return session.query(cls).filter(cls.event_id == event_id, cls.attendee_id == attendee_id).first()
+
+    @classmethod
+    def page(cls, event_id, after_id=None, limit=DEFAULT_PAGE_SIZE, before_id=None, with_attendee=False):
+        """Get one page of an event's queue, in queue order"""
+        from sqlalchemy.orm import joinedload
+        with read_session() as session:
+            query = session.query(cls).filter(cls.event_id == event_id)
+            if with_attendee:
+                query = query.options(joinedload(cls.attendee))
+            return keyset_page(query, cls.id, after_id, before_id, limit)
+
+    @classmethod
+    def count_for_event(cls, event_id):
+        """Number of attendees waiting for an event"""
+        with read_session() as session:
+            return session.execute(select(func.count()).where(cls.event_id == event_id)).scalar_one()
+
+    def position(self):
+        """1 for the head of the queue"""
+        cls = type(self)
+        with read_session() as session:
+            return session.execute(
+                select(func.count()).where(cls.event_id == self.event_id, cls.id < self.id)
+            ).scalar_one() + 1
+
+    def delete(self):
+        """Leave the waitlist"""
+        cls = type(self)
+        with write_session() as session:
+            if not session.execute(delete(cls).where(cls.id == self.id)).rowcount:
+                raise ValueError("Waitlist entry not found")
+
+    @classmethod
+    def _promote(cls, session, event_id):
+        """Book the head of an event's queue into a free seat, in the caller's transaction
+
+        Returns (new ticket, new (tickets_sold, seats_held)), or None if nobody
+        is waiting or the event has no free seat. Each step is an index probe,
+        so the cost does not grow with the queue. Entries of attendees who
+        booked a ticket some other way are dropped on the way.
+        """
+        from .event import Event
+        from .ticket import Ticket
+        head = select(cls.id).where(cls.event_id == event_id).order_by(cls.id).limit(1)
+        if session.execute(head).first() is None:
+            return None
+        counts = session.execute(Ticket._reserve_seat_statement(event_id)).one_or_none()
+        if counts is None:
+            return None
+        booked_at = datetime.utcnow()
+        while True:
+            attendee_id = session.execute(
+                delete(cls).where(cls.id == head.scalar_subquery()).returning(cls.attendee_id)
+            ).scalar_one_or_none()
+            if attendee_id is None:
+                # Everyone left was already booked: hand the seat back
+                session.execute(
+                    update(Event).where(Event.id == event_id).values(tickets_sold=Event.tickets_sold - 1)
+                )
+                return None
+            ticket_id = session.execute(
+                Ticket._insert_statement(event_id, attendee_id, booked_at)
+            ).scalar_one_or_none()
+            if ticket_id is not None:
+                HourlyBookingStats._record(session, event_id, booked_at, bookings=1)
+                ticket = Ticket(id=ticket_id, event_id=event_id, attendee_id=attendee_id, booked_at=booked_at)
+                make_transient_to_detached(ticket)
+                session.add(ticket)
+                return ticket, tuple(counts)
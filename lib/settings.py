@@ -0,0 +1,40 @@
+"""Database settings, resolved without importing SQLAlchemy
+
+models builds its engine from these. The scriptable CLI reads them directly
+so read-only commands can start without loading the ORM.
+"""
+import configparser
+import os
+
+lib_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Optional settings file; EVENT_TICKETING_DB_CONFIG points at another one
+#
+#   [database]
+#   profile = production
+#   url = sqlite:////var/lib/event_ticketing.db
+#   pool_size = 10
+#
+#   [pragmas]
+#   cache_size = -131072
+DB_CONFIG_PATH = os.environ.get("EVENT_TICKETING_DB_CONFIG", os.path.join(lib_dir, "database.ini"))
+db_config = configparser.ConfigParser()
+db_config.read(DB_CONFIG_PATH)
+
+# Set database path in the lib directory
+db_path = os.path.join(lib_dir, "event_ticketing.db")
+# DATABASE_URL in the environment points the app (and benchmarks) at another database
+DATABASE_URL = os.environ.get("DATABASE_URL") or db_config.get(
+    "database", "url", fallback=f"sqlite:///{db_path}")
+
+# Alembic revision the models describe; bump it with every new migration
+SCHEMA_REVISION = "b7e2c91d4f60"
+
+
+def sqlite_path(url=DATABASE_URL):
+    """Filesystem path of a sqlite:/// URL, or None for in-memory and other databases"""
+    for prefix in ("sqlite:///", "sqlite+pysqlite:///"):
+        if url.startswith(prefix):
+            path = url[len(prefix):].split("?", 1)[0]
+            return path if path and path != ":memory:" else None
+    return None